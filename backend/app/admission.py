@@ -0,0 +1,232 @@
+import abc
+import asyncio
+import math
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Deque, Dict, Optional, Tuple
+
+from fastapi import HTTPException, status
+
+from .hashing import PASSWORD_HASH_WORKERS
+
+# /api/login and /api/register each cost a bcrypt call (~250 ms of CPU), so a
+# credential-stuffing burst or a signup spike can starve every other route on
+# the worker. Attempts are admitted here before any database or bcrypt work:
+# token buckets per client IP and per email reject floods with a fast 429,
+# and a concurrency gate bounds how many admitted attempts run at once.
+ADMISSION_CONTROL = os.getenv("ADMISSION_CONTROL", "true").lower() == "true"
+# Buckets hold at most ADMISSION_MAX_KEYS keys; the least recently used go first
+ADMISSION_MAX_KEYS = int(os.getenv("ADMISSION_MAX_KEYS", "100000"))
+ADMISSION_MAX_CONCURRENT = int(os.getenv("ADMISSION_MAX_CONCURRENT", PASSWORD_HASH_WORKERS))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", ADMISSION_MAX_CONCURRENT * 4))
+ADMISSION_MAX_WAIT = float(os.getenv("ADMISSION_MAX_WAIT", "1"))
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600}
+
+
+@dataclass(frozen=True)
+class Rate:
+    """A token bucket: bursts of ``capacity`` attempts, refilled at ``per_second``."""
+    capacity: float
+    per_second: float
+
+    @classmethod
+    def parse(cls, value: str) -> Optional["Rate"]:
+        # "20/minute" allows 20 attempts at once, then one every 3 seconds; "off" disables
+        if value.strip().lower() in ("", "0", "off"):
+            return None
+        count, _, period = value.partition("/")
+        return cls(float(count), float(count) / PERIODS[period.strip() or "second"])
+
+
+class AdmissionBackend(abc.ABC):
+    """Where bucket state lives.
+
+    The in-memory backend limits each worker on its own. A backend backed by a
+    shared store (e.g. Redis running the same refill arithmetic in a script)
+    makes the limits apply across workers.
+    """
+
+    @abc.abstractmethod
+    async def take(self, key: str, rate: Rate) -> float:
+        """Take a token from key's bucket. Returns 0 when admitted, else seconds until one is available."""
+
+    def stats(self) -> dict:
+        return {}
+
+
+class InMemoryBackend(AdmissionBackend):
+    def __init__(self, max_keys: int = ADMISSION_MAX_KEYS):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    async def take(self, key: str, rate: Rate) -> float:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (rate.capacity, now))
+            tokens = min(rate.capacity, tokens + (now - updated) * rate.per_second)
+            retry_after = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                retry_after = (1 - tokens) / rate.per_second
+            self._buckets[key] = (tokens, now)
+            # An evicted key starts again from a full bucket, which only errs towards admitting
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+                self.evictions += 1
+        return retry_after
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"keys": len(self._buckets), "evictions": self.evictions}
+
+
+class Rejected(Exception):
+    def __init__(self, reason: str, retry_after: float):
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class ConcurrencyGate:
+    """At most ``limit`` holders; up to ``max_queue`` more wait, each for at most ``max_wait`` seconds.
+
+    Always local to the process: the CPU it protects is this worker's.
+    """
+
+    def __init__(self, limit: int, max_queue: int, max_wait: float):
+        self.limit = limit
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self):
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            raise Rejected("queue_full", 1)
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.max_wait)
+        except asyncio.TimeoutError:
+            self._discard(waiter)
+            raise Rejected("queue_timeout", 1)
+        except asyncio.CancelledError:
+            # A slot handed over just as the client went away goes to the next waiter
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            else:
+                self._discard(waiter)
+            raise
+
+    def release(self):
+        # Hand the slot straight to the oldest waiter, so newcomers can't overtake the queue
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    def _discard(self, waiter: asyncio.Future):
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+
+class AdmissionController:
+    """Token buckets per route and client IP / email, then one gate shared by the routes."""
+
+    def __init__(
+        self,
+        backend: AdmissionBackend,
+        limits: Dict[str, Tuple[Optional[Rate], Optional[Rate]]],
+        gate: ConcurrencyGate,
+        enabled: bool = True,
+    ):
+        self.backend = backend
+        self.limits = limits
+        self.gate = gate
+        self.enabled = enabled
+        self.admitted: Dict[str, int] = {route: 0 for route in limits}
+        self.rejected: Dict[Tuple[str, str], int] = {}
+        self.wait_seconds: Dict[str, float] = {route: 0.0 for route in limits}
+
+    @asynccontextmanager
+    async def admit(self, route: str, client_ip: Optional[str], email: str):
+        if not self.enabled:
+            yield
+            return
+        per_ip, per_email = self.limits[route]
+        started = time.perf_counter()
+        try:
+            for scope, key, rate in (("ip", client_ip or "unknown", per_ip), ("email", email.lower(), per_email)):
+                if rate is not None:
+                    retry_after = await self.backend.take(f"{route}:{scope}:{key}", rate)
+                    if retry_after:
+                        raise Rejected(scope, retry_after)
+            await self.gate.acquire()
+        except Rejected as e:
+            self.rejected[route, e.reason] = self.rejected.get((route, e.reason), 0) + 1
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many attempts, please try again later",
+                headers={"Retry-After": str(math.ceil(e.retry_after))},
+            )
+        self.admitted[route] += 1
+        self.wait_seconds[route] += time.perf_counter() - started
+        try:
+            yield
+        finally:
+            self.gate.release()
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "max_concurrent": self.gate.limit,
+            "max_queue": self.gate.max_queue,
+            "active": self.gate.active,
+            "queued": self.gate.queued,
+            "admitted": dict(self.admitted),
+            "rejected": [
+                {"route": route, "reason": reason, "count": count}
+                for (route, reason), count in sorted(self.rejected.items())
+            ],
+            "wait_seconds": {route: round(seconds, 3) for route, seconds in self.wait_seconds.items()},
+            "backend": self.backend.stats(),
+        }
+
+
+admission = AdmissionController(
+    InMemoryBackend(),
+    {
+        "login": (
+            Rate.parse(os.getenv("ADMISSION_LOGIN_PER_IP", "30/minute")),
+            Rate.parse(os.getenv("ADMISSION_LOGIN_PER_EMAIL", "10/minute")),
+        ),
+        "register": (
+            Rate.parse(os.getenv("ADMISSION_REGISTER_PER_IP", "10/minute")),
+            Rate.parse(os.getenv("ADMISSION_REGISTER_PER_EMAIL", "3/minute")),
+        ),
+    },
+    ConcurrencyGate(ADMISSION_MAX_CONCURRENT, ADMISSION_MAX_QUEUE, ADMISSION_MAX_WAIT),
+    enabled=ADMISSION_CONTROL,
+)
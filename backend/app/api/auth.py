@@ -1,8 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Form
+from fastapi import APIRouter, Depends, HTTPException, Request, status, Form
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from .. import schemas, crud, auth
-from ..database import get_db
+from ..admission import admission
+from ..database import get_async_db
+from ..hashing import password_pool
 
 router = APIRouter()
 
@@ -15,27 +17,30 @@ class OAuth2EmailPasswordRequestForm:
         "/register", 
         summary="Register a new user",
         response_model=schemas.UserResponse)
-def register(user: schemas.UserCreate, db: Session = Depends(get_db)):
-    db_user = crud.get_user_by_email(db, email=user.email)
-    if db_user:
-        raise HTTPException(status_code=400, detail="Email already registered")
-    return crud.create_user(db, user)
+async def register(request: Request, user: schemas.UserCreate, db: AsyncSession = Depends(get_async_db)):
+    async with admission.admit("register", request.client and request.client.host, user.email):
+        db_user = await crud.get_user_by_email(db, email=user.email)
+        if db_user:
+            raise HTTPException(status_code=400, detail="Email already registered")
+        hashed_password = await password_pool.hash_password(user.password)
+        return await crud.create_user(db, user, hashed_password=hashed_password)
 
 @router.post(
         "/login",
          summary = "Login and get an access token", 
          response_model=schemas.Token)
 async def login_for_access_token(
-    form_data: OAuth2EmailPasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = crud.get_user_by_email(db, email=form_data.email)
-    print(f"User: {user}")
+    request: Request,
+    form_data: OAuth2EmailPasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)):
+    async with admission.admit("login", request.client and request.client.host, form_data.email):
+        user = await crud.get_user_by_email(db, email=form_data.email)
 
-    if not user or not user.verify_password(form_data.password):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Incorrect email or password",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+        if not user or not await password_pool.verify_password(form_data.password, user.hashed_password):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Incorrect email or password",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
     access_token = auth.create_access_token(data={"sub": user.email})
     return {
         "access_token": access_token, 
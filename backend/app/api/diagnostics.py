@@ -0,0 +1,37 @@
+from fastapi import APIRouter, Depends
+
+from ..admission import admission
+from ..auth import get_current_user, principal_cache
+from ..database import api_pool_metrics, sync_pool_metrics
+from ..hashing import password_pool
+
+# Live saturation and rejection counters would help tune an attack on the
+# admission limits, so only signed-in users get them
+router = APIRouter(dependencies=[Depends(get_current_user)])
+
+@router.get(
+        "/diagnostics/password-hashing",
+        summary="Utilization of the password hashing worker pool")
+async def password_hashing_stats():
+    return password_pool.stats()
+
+@router.get(
+        "/diagnostics/auth-cache",
+        summary="Hit and miss counters for the authenticated-principal cache")
+async def auth_cache_stats():
+    return principal_cache.stats()
+
+@router.get(
+        "/diagnostics/db-pool",
+        summary="Connection pool usage, checkout latency and timeouts")
+async def db_pool_stats():
+    return {
+        "api": api_pool_metrics.stats(),
+        "sync": sync_pool_metrics.stats(),
+    }
+
+@router.get(
+        "/diagnostics/admission",
+        summary="Admitted and rejected login/register attempts and time spent queueing")
+async def admission_stats():
+    return admission.stats()
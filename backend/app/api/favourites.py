@@ -1,41 +1,70 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import SQLAlchemyError
-from app.database import get_db
+from app.database import get_async_db
 from app.models import Recipe, User, favourites
 from .. import schemas, crud, models
 from app.schemas import RecipeOut
-from typing import List
-from app.auth import get_current_user
-from typing import List
+from typing import List, Optional
+from app.auth import Principal, get_current_user
+from app.pagination import NEXT_CURSOR_HEADER, next_cursor, validate_sort
+from app.responses import rows_response
 
 router = APIRouter()
 
+MAX_BATCH_COUNT_IDS = 500
+
 @router.post(
         "/recipes/{recipe_id}/favorite",
         summary="Toggle favorite status for a recipe",
         response_model=schemas.FavouriteOut)
-def toggle_favorite(
+async def toggle_favorite(
     recipe_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
 ):
-    return crud.toggle_favorite(db, recipe_id, current_user.id)
+    return await crud.toggle_favorite(db, recipe_id, current_user.id)
 
 @router.get(
         "/users/favorites", 
         summary="Get all favorited recipes for the current user",
         response_model=List[schemas.Recipe])
-def get_favorites(
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+async def get_favorites(
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    sort: str = "id",
+    fields: Optional[str] = Query(None, description=crud.FIELDS_DESCRIPTION),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
 ):
-    return crud.get_favorites(db, current_user.id)
+    validate_sort(sort)
+    selected = crud.select_fields(fields)
+    recipes = await crud.get_favorites(db, current_user.id, limit=limit, cursor=cursor, sort=sort, fields=selected)
+    headers = {}
+    if limit is not None:
+        next_page = next_cursor(recipes, sort, limit)
+        if next_page:
+            headers[NEXT_CURSOR_HEADER] = next_page
+    return rows_response(recipes, selected, headers)
 
 @router.get(
         "/recipes/{recipe_id}/favorite-count",
         summary="Get the number of favorites for a recipe",
         response_model=schemas.FavouriteCount)
-def get_favorite_count(recipe_id: int, db: Session = Depends(get_db)):
-    return {"count": crud.count_favorites(db, recipe_id)}
\ No newline at end of file
+async def get_favorite_count(recipe_id: int, db: AsyncSession = Depends(get_async_db)):
+    return {"count": await crud.count_favorites(db, recipe_id)}
+
+@router.get(
+        "/favorite-counts",
+        summary="Get the number of favorites for many recipes at once",
+        response_model=schemas.FavouriteCounts)
+async def get_favorite_counts(
+    ids: List[int] = Query(..., description="Recipe IDs, e.g. ?ids=1&ids=2"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    if len(ids) > MAX_BATCH_COUNT_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_BATCH_COUNT_IDS} recipe IDs can be requested at once")
+    return {"counts": await crud.count_favorites_batch(db, ids)}
@@ -0,0 +1,42 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import SQLAlchemyError
+from .. import schemas, crud
+from ..database import get_async_db
+from ..pagination import NEXT_CURSOR_HEADER, next_cursor, validate_sort
+from ..responses import database_error, rows_response
+from typing import List, Optional
+
+router = APIRouter()
+
+@router.get(
+        "/ingredients/{name}/recipes",
+        response_model=List[schemas.Recipe],
+        summary="Get recipes that use an ingredient")
+async def read_recipes_using_ingredient(
+    name: str,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    sort: str = "id",
+    fields: Optional[str] = Query(None, description=crud.FIELDS_DESCRIPTION),
+    db: AsyncSession = Depends(get_async_db)
+    ):
+    validate_sort(sort)
+    selected = crud.select_fields(fields)
+    try:
+        recipes = await crud.get_recipes_by_ingredient(
+            db, name, limit=limit, cursor=cursor, sort=sort, fields=selected
+        )
+        next_page = next_cursor(recipes, sort, limit)
+        return rows_response(recipes, selected, {NEXT_CURSOR_HEADER: next_page} if next_page else None)
+    except SQLAlchemyError as e:
+        raise database_error(e)
+
+@router.get(
+        "/recipes/{recipe_id}/ingredients",
+        response_model=List[schemas.ParsedIngredient],
+        summary="Get the parsed ingredient list of a recipe")
+async def read_parsed_ingredients(recipe_id: int, db: AsyncSession = Depends(get_async_db)):
+    if await crud.get_recipe_version(db, recipe_id) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Recipe not found")
+    return await crud.get_parsed_ingredients(db, recipe_id)
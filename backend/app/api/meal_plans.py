@@ -0,0 +1,58 @@
+import datetime
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import SQLAlchemyError
+from .. import schemas, crud
+from ..database import get_async_db
+from ..auth import Principal, get_current_user
+from ..responses import database_error
+from typing import List, Optional
+
+router = APIRouter()
+
+MAX_MEAL_PLAN_DAYS = 62
+MAX_MEAL_PLAN_ENTRIES = 300
+
+@router.get(
+        "/meal-plan",
+        summary="Get the current user's meals between two dates",
+        response_model=List[schemas.MealPlanEntry])
+async def read_meal_plan(
+    start: datetime.date,
+    end: Optional[datetime.date] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
+    ):
+    # Defaults to the week starting at `start`
+    if end is None:
+        end = start + datetime.timedelta(days=6)
+    if end < start:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="end must not be before start")
+    if (end - start).days >= MAX_MEAL_PLAN_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_MEAL_PLAN_DAYS} days can be requested at once")
+    try:
+        return await crud.get_meal_plan(db, current_user, start, end)
+    except SQLAlchemyError as e:
+        raise database_error(e)
+
+@router.put(
+        "/meal-plan",
+        summary="Set or clear many meal slots at once",
+        response_model=List[schemas.MealPlanEntry])
+async def update_meal_plan(
+    update: schemas.MealPlanUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
+    ):
+    if not update.entries:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No meal slots given")
+    if len(update.entries) > MAX_MEAL_PLAN_ENTRIES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_MEAL_PLAN_ENTRIES} meal slots can be written at once")
+    try:
+        return await crud.upsert_meal_plan(db, update.entries, current_user)
+    except SQLAlchemyError as e:
+        raise database_error(e)
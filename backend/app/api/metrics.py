@@ -0,0 +1,48 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from ..admission import admission
+from ..auth import principal_cache
+from ..database import api_pool_metrics, sync_pool_metrics
+from ..hashing import password_pool
+from ..leaderboard import leaderboard
+from ..metrics import PrometheusWriter, request_metrics, write_pool_metrics
+
+router = APIRouter()
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+@router.get("/metrics", include_in_schema=False, response_class=PlainTextResponse)
+async def prometheus_metrics():
+    out = PrometheusWriter("flavour_fusion")
+    request_metrics.write(out)
+    write_pool_metrics(out, [api_pool_metrics, sync_pool_metrics])
+
+    hashing = password_pool.stats()
+    out.gauge("password_hash_in_flight", "Password hash jobs running or queued", [({}, hashing["in_flight"])])
+    out.counter("password_hash_completed_total", "Password hash jobs completed", [({}, hashing["completed"])])
+    out.counter("password_hash_rejected_total", "Password hash jobs rejected with 503", [({}, hashing["rejected"])])
+    out.counter("password_hash_busy_seconds_total", "Worker time spent hashing", [({}, hashing["busy_seconds"])])
+    out.counter("password_hash_wait_seconds_total", "Time jobs waited for a worker", [({}, hashing["wait_seconds"])])
+
+    gate = admission.stats()
+    out.gauge("admission_active", "Login/register attempts holding an admission slot", [({}, gate["active"])])
+    out.gauge("admission_queued", "Login/register attempts waiting for a slot", [({}, gate["queued"])])
+    out.counter("admission_admitted_total", "Attempts admitted", [({"route": r}, n) for r, n in gate["admitted"].items()])
+    out.counter("admission_rejected_total", "Attempts rejected with 429", [
+        ({"route": row["route"], "reason": row["reason"]}, row["count"]) for row in gate["rejected"]
+    ])
+    out.counter("admission_wait_seconds_total", "Time admitted attempts spent queueing", [
+        ({"route": r}, seconds) for r, seconds in gate["wait_seconds"].items()
+    ])
+
+    caches = {"principal": principal_cache.stats()}
+    out.gauge("cache_size", "Entries held by in-process caches", [({"cache": n}, s["size"]) for n, s in caches.items()])
+    out.counter("cache_hits_total", "In-process cache hits", [({"cache": n}, s["hits"]) for n, s in caches.items()])
+    out.counter("cache_misses_total", "In-process cache misses", [({"cache": n}, s["misses"]) for n, s in caches.items()])
+
+    popular = leaderboard.stats()
+    out.gauge("leaderboard_recipes", "Recipes held in the overall popularity ranking", [({}, popular["size"])])
+    out.counter("leaderboard_rebuilds_total", "Full leaderboard rebuilds", [({}, popular["rebuilds"])])
+    out.counter("leaderboard_updates_total", "Favourite toggles applied to the leaderboard", [({}, popular["updates"])])
+    return PlainTextResponse(out.render(), media_type=PROMETHEUS_CONTENT_TYPE)
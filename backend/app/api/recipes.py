@@ -1,102 +1,265 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import SQLAlchemyError
 from .. import schemas, crud, models
-from ..database import get_db
-from typing import List
-from ..auth import get_current_user
+from ..bulk_import import BULK_IMPORT_BATCH_SIZE
+from ..database import get_async_db
+from ..etag import etag_matches, list_etag, not_modified, recipe_etag
+from ..export import MEDIA_TYPES, export_recipes
+from ..leaderboard import POPULAR_MAX_LIMIT
+from ..pagination import NEXT_CURSOR_HEADER, next_cursor, validate_sort
+from ..responses import database_error, rows_response
+from typing import List, Optional
+from ..auth import Principal, get_current_user
 
 router = APIRouter()
 
+def validate_filters(cuisine_type, min_cooking_time, max_cooking_time, user_id):
+    if min_cooking_time is not None and max_cooking_time is not None and min_cooking_time > max_cooking_time:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="min_cooking_time must not be greater than max_cooking_time")
+    filters = {
+        "cuisine_type": cuisine_type,
+        "min_cooking_time": min_cooking_time,
+        "max_cooking_time": max_cooking_time,
+        "user_id": user_id,
+    }
+    return {key: value for key, value in filters.items() if value is not None}
+
 @router.post(
         "/recipes/", 
         summary="Create a new recipe",
-        response_model=schemas.Recipe)
-def create_recipe(
+        response_model=schemas.RecipeCreated)
+async def create_recipe(
     recipe: schemas.RecipeCreate, 
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
     ):
     try:
-        return crud.create_recipe(db, recipe, current_user)
+        db_recipe = await crud.create_recipe(db, recipe, current_user)
+        created = schemas.RecipeCreated.model_validate(db_recipe, from_attributes=True)
+        created.near_duplicates = crud.get_near_duplicates(db_recipe.id)
+        return created
     except SQLAlchemyError as e:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+        raise database_error(e)
+
+@router.post(
+        "/recipes/import",
+        summary="Bulk import recipes from a streamed NDJSON or CSV body",
+        response_model=schemas.ImportResult)
+async def import_recipes(
+    request: Request,
+    format: Optional[str] = Query(None, pattern="^(ndjson|csv)$", description="Defaults from Content-Type"),
+    batch_size: int = Query(BULK_IMPORT_BATCH_SIZE, ge=1, le=10000),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
+    ):
+    if format is None:
+        format = "csv" if "csv" in request.headers.get("content-type", "") else "ndjson"
+    return await crud.import_recipes(db, request.stream(), format, current_user, batch_size)
 
 @router.get(
         "/recipes/", 
         response_model=List[schemas.Recipe],
         summary="Get all recipes")
-def read_recipes(
+async def read_recipes(
+    request: Request,
     skip: int = 0, 
     limit: int = 100, 
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    sort: str = "id",
+    cuisine_type: Optional[str] = None,
+    min_cooking_time: Optional[int] = Query(None, ge=0),
+    max_cooking_time: Optional[int] = Query(None, ge=0),
+    user_id: Optional[int] = None,
+    fields: Optional[str] = Query(None, description=crud.FIELDS_DESCRIPTION),
+    db: AsyncSession = Depends(get_async_db)
     ):
+    validate_sort(sort)
+    filters = validate_filters(cuisine_type, min_cooking_time, max_cooking_time, user_id)
+    selected = crud.select_fields(fields)
+    params = {"skip": skip, "limit": limit, "cursor": cursor, "sort": sort, **filters}
+    # Pages with different fields are different representations
+    etag_params = {**params, "fields": ",".join(selected)}
     try:
-        recipes = crud.get_recipes(db, skip=skip, limit=limit)
-        return recipes
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match:
+            # Answer revalidation from (id, version) pairs without loading recipe bodies
+            versions = await crud.get_recipe_versions(db, **params)
+            etag = list_etag(etag_params, ((row.id, row.version) for row in versions))
+            if etag_matches(if_none_match, etag):
+                next_page = next_cursor(versions, sort, limit)
+                return not_modified(etag, {NEXT_CURSOR_HEADER: next_page} if next_page else None)
+        recipes = await crud.get_recipes(db, fields=selected, **params)
+        headers = {"ETag": list_etag(etag_params, ((recipe.id, recipe.version) for recipe in recipes))}
+        next_page = next_cursor(recipes, sort, limit)
+        if next_page:
+            headers[NEXT_CURSOR_HEADER] = next_page
+        return rows_response(recipes, selected, headers)
     except SQLAlchemyError as e:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+        raise database_error(e)
 
 @router.get(
     "/recipes/dashboard",
     response_model=List[schemas.Recipe],
     summary="Get all recipes for the current user"
 )
-def read_user_recipes(
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+async def read_user_recipes(
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    sort: str = "id",
+    fields: Optional[str] = Query(None, description=crud.FIELDS_DESCRIPTION),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
 ):
+    validate_sort(sort)
+    selected = crud.select_fields(fields)
     try:
-        return crud.get_user_recipes(db, current_user)
+        recipes = await crud.get_user_recipes(
+            db, current_user, limit=limit, cursor=cursor, sort=sort, fields=selected
+        )
+        headers = {}
+        if limit is not None:
+            next_page = next_cursor(recipes, sort, limit)
+            if next_page:
+                headers[NEXT_CURSOR_HEADER] = next_page
+        return rows_response(recipes, selected, headers)
     except SQLAlchemyError as e:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+        raise database_error(e)
     
+@router.get(
+    "/recipes/export",
+    summary="Stream every recipe, or one user's recipes, as NDJSON or CSV",
+    response_class=StreamingResponse
+)
+async def export_recipes_stream(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    user_id: Optional[int] = None,
+    gzip: bool = False,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    filename = f"recipes.{format}" + (".gz" if gzip else "")
+    return StreamingResponse(
+        export_recipes(db, format, user_id=user_id, gzip=gzip),
+        media_type="application/gzip" if gzip else MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+@router.get(
+    "/recipes/facets",
+    response_model=schemas.RecipeFacets,
+    summary="Count recipes per cuisine and per cooking time bucket"
+)
+async def read_recipe_facets(
+    cuisine_type: Optional[str] = None,
+    min_cooking_time: Optional[int] = Query(None, ge=0),
+    max_cooking_time: Optional[int] = Query(None, ge=0),
+    user_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    filters = validate_filters(cuisine_type, min_cooking_time, max_cooking_time, user_id)
+    try:
+        return await crud.get_recipe_facets(db, **filters)
+    except SQLAlchemyError as e:
+        raise database_error(e)
+
+@router.get(
+    "/recipes/popular",
+    response_model=List[schemas.PopularRecipe],
+    summary="Get the most favourited recipes, overall or for one cuisine"
+)
+async def read_popular_recipes(
+    limit: int = Query(10, ge=1, le=POPULAR_MAX_LIMIT),
+    cuisine_type: Optional[str] = None,
+    fields: Optional[str] = Query(None, description=crud.FIELDS_DESCRIPTION),
+    db: AsyncSession = Depends(get_async_db)
+):
+    selected = crud.select_fields(fields)
+    try:
+        ranked = await crud.get_popular_recipes(db, limit=limit, cuisine_type=cuisine_type, fields=selected)
+        return ORJSONResponse([{**dict(zip(selected, row)), "favourite_count": count} for row, count in ranked])
+    except SQLAlchemyError as e:
+        raise database_error(e)
+
+@router.get(
+    "/recipes/search",
+    response_model=List[schemas.Recipe],
+    summary="Search recipes by title and ingredients"
+)
+async def search_recipes(
+    q: str = Query(..., description="Comma separated terms, e.g. 'garlic, olive oil'"),
+    match: str = Query("all", pattern="^(all|any)$", description="Require all terms or any term"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    fields: Optional[str] = Query(None, description=crud.FIELDS_DESCRIPTION),
+    db: AsyncSession = Depends(get_async_db)
+):
+    selected = crud.select_fields(fields)
+    try:
+        recipes = await crud.search_recipes(
+            db, q, match_all=match == "all", skip=skip, limit=limit, fields=selected
+        )
+        return rows_response(recipes, selected)
+    except SQLAlchemyError as e:
+        raise database_error(e)
+
 @router.get(
         "/recipes/{recipe_id}", 
         response_model=schemas.Recipe,
         summary="Get a recipe by ID"
         )
-def read_recipe(recipe_id: int, db: Session = Depends(get_db)):
+async def read_recipe(
+    recipe_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_async_db)
+):
     try:
-        db_recipe = crud.get_recipe(db, recipe_id)
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match:
+            version = await crud.get_recipe_version(db, recipe_id)
+            if version is not None and etag_matches(if_none_match, recipe_etag(recipe_id, version)):
+                return not_modified(recipe_etag(recipe_id, version))
+        db_recipe = await crud.get_recipe(db, recipe_id)
         if db_recipe is None:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Recipe not found")
+        response.headers["ETag"] = recipe_etag(db_recipe.id, db_recipe.version)
         return db_recipe
     except SQLAlchemyError as e:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+        raise database_error(e)
     
     
 @router.put(
         "/recipes/{recipe_id}", 
         response_model=schemas.Recipe,
         summary="Update a recipe by ID")
-def update_recipe(
+async def update_recipe(
     recipe_id: int, 
     recipe: schemas.RecipeCreate, 
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
     ):
     try:
-        db_recipe = crud.update_recipe(db, recipe_id, recipe, current_user)
+        db_recipe = await crud.update_recipe(db, recipe_id, recipe, current_user)
         if db_recipe is None:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Recipe not found")
         return db_recipe
     except SQLAlchemyError as e:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+        raise database_error(e)
 
 @router.delete(
         "/recipes/{recipe_id}", 
         response_model=schemas.Recipe,
         summary="Delete a recipe by ID")
-def delete_recipe(
+async def delete_recipe(
     recipe_id: int, 
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
     ):
     try:
-        db_recipe = crud.delete_recipe(db, recipe_id, current_user)
+        db_recipe = await crud.delete_recipe(db, recipe_id, current_user)
         if db_recipe is None:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Recipe not found")
         return db_recipe
     except SQLAlchemyError as e:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
\ No newline at end of file
+        raise database_error(e)
\ No newline at end of file
@@ -0,0 +1,73 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import SQLAlchemyError
+from .. import schemas, crud
+from ..auth import Principal, get_current_user
+from ..database import get_async_db
+from ..responses import database_error
+from typing import List, Optional
+
+router = APIRouter()
+
+MAX_RECOMMENDATIONS = 100
+
+def scored_response(rows, fields: List[str]) -> ORJSONResponse:
+    # Rows are the selected fields, the trailing list columns, then the score
+    return ORJSONResponse([{**dict(zip(fields, row)), "score": round(row.score, 4)} for row in rows])
+
+@router.get(
+        "/recipes/{recipe_id}/similar",
+        response_model=List[schemas.ScoredRecipe],
+        summary="Get recipes favourited by the same users as this one")
+async def read_similar_recipes(
+    recipe_id: int,
+    limit: int = Query(10, ge=1, le=MAX_RECOMMENDATIONS),
+    fields: Optional[str] = Query(None, description=crud.FIELDS_DESCRIPTION),
+    db: AsyncSession = Depends(get_async_db)
+):
+    selected = crud.select_fields(fields)
+    try:
+        rows = await crud.get_similar_recipes(db, recipe_id, limit=limit, fields=selected)
+        if not rows and await crud.get_recipe_version(db, recipe_id) is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Recipe not found")
+        return scored_response(rows, selected)
+    except SQLAlchemyError as e:
+        raise database_error(e)
+
+@router.get(
+        "/users/recommendations",
+        response_model=List[schemas.ScoredRecipe],
+        summary="Get recipes recommended from the current user's favourites")
+async def read_recommendations(
+    limit: int = Query(20, ge=1, le=MAX_RECOMMENDATIONS),
+    fields: Optional[str] = Query(None, description=crud.FIELDS_DESCRIPTION),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    selected = crud.select_fields(fields)
+    try:
+        rows = await crud.get_recommendations(db, current_user.id, limit=limit, fields=selected)
+        return scored_response(rows, selected)
+    except SQLAlchemyError as e:
+        raise database_error(e)
+
+@router.get(
+        "/recipes/{recipe_id}/similar-ingredients",
+        response_model=List[schemas.ScoredRecipe],
+        summary="Get recipes with the most ingredients in common with this one")
+async def read_similar_ingredient_recipes(
+    recipe_id: int,
+    limit: int = Query(10, ge=1, le=MAX_RECOMMENDATIONS),
+    fields: Optional[str] = Query(None, description=crud.FIELDS_DESCRIPTION),
+    db: AsyncSession = Depends(get_async_db)
+):
+    selected = crud.select_fields(fields)
+    try:
+        pairs = await crud.get_similar_ingredient_recipes(db, recipe_id, limit=limit, fields=selected)
+        if pairs is None and await crud.get_recipe_version(db, recipe_id) is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Recipe not found")
+        # Scores estimate the Jaccard similarity of the parsed ingredient names
+        return ORJSONResponse([{**dict(zip(selected, row)), "score": round(score, 4)} for row, score in pairs or []])
+    except SQLAlchemyError as e:
+        raise database_error(e)
@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import SQLAlchemyError
+from .. import schemas, crud
+from ..database import get_async_db
+from ..auth import Principal, get_current_user
+from ..responses import database_error
+
+router = APIRouter()
+
+MAX_SHOPPING_LIST_RECIPES = 200
+
+@router.post(
+        "/shopping-list",
+        summary="Build one aggregated shopping list from many recipes",
+        response_model=schemas.ShoppingList)
+async def create_shopping_list(
+    request: schemas.ShoppingListRequest,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
+    ):
+    if len(request.items) > MAX_SHOPPING_LIST_RECIPES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_SHOPPING_LIST_RECIPES} recipes can be combined at once")
+    if not request.items and not request.include_favourites:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No recipes requested")
+    try:
+        return await crud.get_shopping_list(db, request.items, request.include_favourites, current_user)
+    except SQLAlchemyError as e:
+        raise database_error(e)
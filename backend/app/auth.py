@@ -2,22 +2,124 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
+from collections import OrderedDict
+from dataclasses import dataclass
+from sqlalchemy import event, inspect
 from . import models, schemas, crud
-from .database import SessionLocal, get_db
-from passlib.context import CryptContext
+from .config import SECRET_KEY
+from .database import get_async_db
+from .passwords import hash_password
 import os
-from dotenv import load_dotenv
+import threading
+import time
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-load_dotenv()
-
-SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+PRINCIPAL_CACHE_TTL = float(os.getenv("PRINCIPAL_CACHE_TTL", "60"))
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+@dataclass(frozen=True)
+class Principal:
+    """The authenticated user, detached from any database session."""
+    id: int
+    email: str
+    username: str
+
+class PrincipalCache:
+    """Bounded LRU cache of validated tokens.
+
+    Entries live until the earlier of the token's own expiry and the cache
+    TTL, so a warm token skips both the JWT decode and the user lookup.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()  # token -> (principal, expires_at)
+        self._tokens_by_email = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, token: str):
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                self.misses += 1
+                return None
+            principal, expires_at = entry
+            if expires_at <= time.time():
+                self._remove(token)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return principal
+
+    def set(self, token: str, principal: Principal, token_expires_at: float):
+        if self.maxsize <= 0:
+            return
+        expires_at = min(token_expires_at, time.time() + self.ttl)
+        with self._lock:
+            self._remove(token)
+            self._entries[token] = (principal, expires_at)
+            self._tokens_by_email.setdefault(principal.email, set()).add(token)
+            while len(self._entries) > self.maxsize:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate_user(self, email: str):
+        """Drop every cached token for a user, e.g. after it changes or is deleted."""
+        with self._lock:
+            for token in list(self._tokens_by_email.get(email, ())):
+                self._remove(token)
+                self.invalidations += 1
+
+    def clear(self):
+        # Counters restart too, so stats describe what happened since the last clear
+        with self._lock:
+            self._entries.clear()
+            self._tokens_by_email.clear()
+            self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    def _remove(self, token: str):
+        entry = self._entries.pop(token, None)
+        if entry is not None:
+            tokens = self._tokens_by_email.get(entry[0].email)
+            if tokens is not None:
+                tokens.discard(token)
+                if not tokens:
+                    del self._tokens_by_email[entry[0].email]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+principal_cache = PrincipalCache(PRINCIPAL_CACHE_SIZE, PRINCIPAL_CACHE_TTL)
+
+@event.listens_for(models.User, "after_update")
+@event.listens_for(models.User, "after_delete")
+def _invalidate_cached_principal(mapper, connection, target):
+    # ORM changes to a user take effect on that user's next request. Code that
+    # changes users with bulk/Core statements must call invalidate_user itself.
+    history = inspect(target).attrs.email.history
+    for email in {target.email, *history.deleted}:
+        if email:
+            principal_cache.invalidate_user(email)
+
 def create_access_token(data: dict, expires_delta: timedelta = None):
     to_encode = data.copy()
     if expires_delta:
@@ -28,7 +130,10 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def get_current_user(db=Depends(get_db), token: str = Depends(oauth2_scheme)):
+async def get_current_user(db=Depends(get_async_db), token: str = Depends(oauth2_scheme)):
+    principal = principal_cache.get(token)
+    if principal is not None:
+        return principal
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -41,11 +146,13 @@ def get_current_user(db=Depends(get_db), token: str = Depends(oauth2_scheme)):
             raise credentials_exception
     except JWTError:
         raise credentials_exception
-    user = crud.get_user_by_email(db, username)
+    user = await crud.get_user_by_email(db, username)
     if user is None:
         raise credentials_exception
-    return user
+    principal = Principal(id=user.id, email=user.email, username=user.username)
+    principal_cache.set(token, principal, payload.get("exp", 0))
+    return principal
 
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    return hash_password(password)
 
@@ -0,0 +1,193 @@
+import codecs
+import csv
+import io
+import json
+import os
+from typing import AsyncIterator, List, Tuple
+
+from fastapi import HTTPException, status
+from pydantic import ValidationError
+from sqlalchemy import insert, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import schemas
+from .ingredients import ingredient_rows
+from .models import Recipe, RecipeIngredient
+
+BULK_IMPORT_BATCH_SIZE = int(os.getenv("BULK_IMPORT_BATCH_SIZE", "1000"))
+# Only the first errors are reported so memory stays flat for bad uploads
+MAX_REPORTED_ERRORS = 1000
+# Upper bound on a single NDJSON line or CSV record
+MAX_RECORD_CHARS = 1_000_000
+
+RECIPE_COLUMNS = ["id"] + list(schemas.RecipeCreate.model_fields) + ["user_id"]
+INGREDIENT_COLUMNS = ["recipe_id", "position", "name", "quantity", "unit", "raw"]
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Decode a byte stream into lines without buffering the whole body."""
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    buffer = ""
+    async for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        if len(buffer) > MAX_RECORD_CHARS:
+            raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Record is too large")
+        for line in lines:
+            yield line.rstrip("\r")
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield buffer.rstrip("\r")
+
+
+async def iter_ndjson(lines: AsyncIterator[str]) -> AsyncIterator[Tuple[int, object]]:
+    """Yield (line number, parsed object or error message)."""
+    line_number = 0
+    async for line in lines:
+        line_number += 1
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_number, f"Invalid JSON: {e.msg}"
+
+
+async def iter_csv(lines: AsyncIterator[str]) -> AsyncIterator[Tuple[int, object]]:
+    """Yield (record number, row dict or error message) from CSV with a header row.
+
+    Quoted fields may span lines; a record is complete once it contains an
+    even number of quote characters.
+    """
+    header = None
+    pending: List[str] = []
+    quotes = 0
+    record_number = 0
+    async for line in lines:
+        pending.append(line)
+        quotes += line.count('"')
+        if quotes % 2:
+            if sum(len(part) for part in pending) > MAX_RECORD_CHARS:
+                raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Record is too large")
+            continue
+        record = "\n".join(pending)
+        pending, quotes = [], 0
+        if not record.strip():
+            continue
+        values = next(csv.reader(io.StringIO(record)))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        record_number += 1
+        if len(values) != len(header):
+            yield record_number, f"Expected {len(header)} fields, got {len(values)}"
+        else:
+            yield record_number, dict(zip(header, values))
+    if pending:
+        yield record_number + 1, "Unterminated quoted field"
+
+
+class RecipeImporter:
+    """Validates parsed records and inserts them in batches for one user."""
+
+    def __init__(self, db: AsyncSession, user_id: int, batch_size: int = BULK_IMPORT_BATCH_SIZE):
+        self.db = db
+        self.user_id = user_id
+        self.batch_size = batch_size
+        self.batch: List[Tuple[int, dict]] = []
+        self.imported = 0
+        self.failed = 0
+        self.batches = 0
+        self.errors: List[dict] = []
+
+    def _error(self, row: int, message: str):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row, "error": message})
+
+    async def add(self, row: int, record):
+        if isinstance(record, str):
+            self._error(row, record)
+            return
+        try:
+            recipe = schemas.RecipeCreate.model_validate(record)
+        except ValidationError as e:
+            self._error(row, "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()))
+            return
+        self.batch.append((row, {**recipe.model_dump(), "user_id": self.user_id}))
+        if len(self.batch) >= self.batch_size:
+            await self.flush()
+
+    async def _insert(self, rows: List[dict]):
+        dialect = self.db.bind.dialect
+        if dialect.name == "postgresql" and dialect.driver == "asyncpg":
+            # COPY is the fastest way into Postgres. Ids are drawn from the
+            # sequence up front so parsed ingredients can be copied alongside.
+            ids = (await self.db.execute(
+                text("SELECT nextval(pg_get_serial_sequence('recipes', 'id')) FROM generate_series(1, :n)"),
+                {"n": len(rows)},
+            )).scalars().all()
+            for recipe_id, row in zip(ids, rows):
+                row["id"] = recipe_id
+            ingredients = [item for row in rows for item in ingredient_rows(row["id"], row["ingredients"])]
+            connection = await self.db.connection()
+            raw = (await connection.get_raw_connection()).driver_connection
+            await raw.copy_records_to_table(
+                Recipe.__tablename__,
+                records=[tuple(row[column] for column in RECIPE_COLUMNS) for row in rows],
+                columns=RECIPE_COLUMNS,
+            )
+            await raw.copy_records_to_table(
+                RecipeIngredient.__tablename__,
+                records=[tuple(item[column] for column in INGREDIENT_COLUMNS) for item in ingredients],
+                columns=INGREDIENT_COLUMNS,
+            )
+        else:
+            # executemany, batched by SQLAlchemy into multi-row INSERT .. RETURNING
+            table = Recipe.__table__
+            ids = (await self.db.execute(
+                insert(table).returning(table.c.id, sort_by_parameter_order=True), rows
+            )).scalars().all()
+            ingredients = [item for recipe_id, row in zip(ids, rows) for item in ingredient_rows(recipe_id, row["ingredients"])]
+            if ingredients:
+                await self.db.execute(insert(RecipeIngredient.__table__), ingredients)
+
+    async def flush(self):
+        if not self.batch:
+            return
+        batch, self.batch = self.batch, []
+        self.batches += 1
+        try:
+            await self._insert([row for _, row in batch])
+            await self.db.commit()
+            self.imported += len(batch)
+            return
+        except Exception:
+            await self.db.rollback()
+        # Retry row by row so one bad row is reported without losing the rest
+        for row_number, row in batch:
+            try:
+                await self._insert([row])
+                await self.db.commit()
+                self.imported += 1
+            except Exception as e:
+                await self.db.rollback()
+                self._error(row_number, str(e).splitlines()[0])
+
+    def result(self):
+        return {
+            "imported": self.imported,
+            "failed": self.failed,
+            "batches": self.batches,
+            "errors": self.errors,
+        }
+
+
+async def import_recipes(db: AsyncSession, chunks: AsyncIterator[bytes], fmt: str, user_id: int, batch_size: int):
+    lines = iter_lines(chunks)
+    records = iter_csv(lines) if fmt == "csv" else iter_ndjson(lines)
+    importer = RecipeImporter(db, user_id, batch_size)
+    async for row, record in records:
+        await importer.add(row, record)
+    await importer.flush()
+    return importer.result()
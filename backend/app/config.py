@@ -0,0 +1,15 @@
+# Core settings. .env is loaded here, once; database.py imports this module
+# before anything else in the app reads os.environ.
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Use environment variable to check if running tests
+IS_TESTING = os.getenv("TESTING", "false").lower() == "true"
+
+# Use test database if running tests
+DATABASE_URL = "sqlite:///./test.db" if IS_TESTING else os.getenv("DATABASE_URL")
+
+SECRET_KEY = os.getenv("SECRET_KEY")
@@ -1,128 +1,564 @@
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+import datetime
+from sqlalchemy import delete, exists, func, insert, literal, select, tuple_, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from sqlalchemy.orm.exc import StaleDataError
+from typing import List, Optional, get_args
 from . import models, schemas
-from app.models import Recipe, User, favourites
+from .bulk_import import import_recipes as _import_recipes
+from .facets import facet_cache, summarize, time_bucket
+from .ingredient_index import NEAR_DUPLICATE_THRESHOLD, ingredient_index, signature as ingredient_signature
+from .ingredients import ingredient_rows, normalize_name
+from .leaderboard import leaderboard
+from .pagination import SORT_COLUMNS, apply_keyset
+from .responses import database_error
+from .search import build_search_query, parse_terms
+from .shopping_list import build_shopping_list
+from app.models import MealPlan, Recipe, RecipeIngredient, RecipeSimilarity, User, favourites
 from fastapi import HTTPException, status
-from app.auth import get_current_user
+from app.auth import Principal, get_current_user
 from fastapi import Depends
 
 
-def get_recipes(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Recipe).offset(skip).limit(limit).all()
+# Columns behind schemas.Recipe, in field order. List endpoints select these (or the
+# subset asked for with ?fields=) and encode the rows without building ORM objects.
+RECIPE_FIELDS = list(schemas.Recipe.model_fields)
+FIELD_SETS = {
+    "full": RECIPE_FIELDS,
+    # Leaves out the ingredients and instructions Text columns, most of a row's size
+    "summary": [field for field in RECIPE_FIELDS if field in schemas.RecipeSummary.model_fields],
+}
 
-def get_recipe(db: Session, recipe_id: int):
-    return db.query(models.Recipe).filter(models.Recipe.id == recipe_id).first()
+FIELDS_DESCRIPTION = "'summary', 'full' (default) or comma separated fields, e.g. 'title,cooking_time'"
 
-def get_user_recipes(db: Session, current_user: User):
+def select_fields(fields: Optional[str] = None) -> List[str]:
+    """Recipe fields for ?fields=, a named set or comma separated names. id is always included."""
+    if fields is None:
+        return RECIPE_FIELDS
+    if fields in FIELD_SETS:
+        return FIELD_SETS[fields]
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = requested.difference(RECIPE_FIELDS)
+    if unknown or not requested:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields {sorted(unknown)}. Use {', '.join(FIELD_SETS)} or any of: {', '.join(RECIPE_FIELDS)}",
+        )
+    return [field for field in RECIPE_FIELDS if field == "id" or field in requested]
+
+def _list_columns(fields: List[str], sort: str = "id"):
+    # The requested fields lead so rows_response can zip them with their names; the
+    # version (for ETags) and the sort key (for cursors) trail when not requested
+    columns = [getattr(Recipe, field) for field in fields] + [Recipe.version]
+    sort_column = SORT_COLUMNS[sort]
+    if sort_column is not None and sort_column.key not in fields:
+        columns.append(sort_column)
+    return columns
+
+def _filter_recipes(
+    stmt,
+    cuisine_type: Optional[str] = None,
+    min_cooking_time: Optional[int] = None,
+    max_cooking_time: Optional[int] = None,
+    user_id: Optional[int] = None,
+):
+    if cuisine_type is not None:
+        stmt = stmt.where(Recipe.cuisine_type == cuisine_type)
+    if min_cooking_time is not None:
+        stmt = stmt.where(Recipe.cooking_time >= min_cooking_time)
+    if max_cooking_time is not None:
+        stmt = stmt.where(Recipe.cooking_time <= max_cooking_time)
+    if user_id is not None:
+        stmt = stmt.where(Recipe.user_id == user_id)
+    return stmt
+
+def _recipe_page(stmt, skip: int, limit: int, cursor: Optional[str], sort: str, filters: dict):
+    stmt = apply_keyset(_filter_recipes(stmt, **filters), sort, cursor)
+    if cursor is None and skip:
+        stmt = stmt.offset(skip)
+    return stmt.limit(limit)
+
+async def get_recipes(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    sort: str = "id",
+    fields: List[str] = RECIPE_FIELDS,
+    **filters,
+):
+    stmt = _recipe_page(select(*_list_columns(fields, sort)), skip, limit, cursor, sort, filters)
+    return (await db.execute(stmt)).all()
+
+async def get_recipe_versions(
+    db: AsyncSession, skip: int = 0, limit: int = 100, cursor: Optional[str] = None, sort: str = "id", **filters
+):
+    """The (id, version) rows of a get_recipes page, without the recipe bodies"""
+    columns = [Recipe.id, Recipe.version]
+    if SORT_COLUMNS[sort] is not None:
+        columns.append(SORT_COLUMNS[sort])
+    stmt = _recipe_page(select(*columns), skip, limit, cursor, sort, filters)
+    return (await db.execute(stmt)).all()
+
+async def get_recipe_facets(db: AsyncSession, **filters):
+    """Recipe counts per cuisine and per cooking time bucket, from one GROUP BY"""
+    key = tuple(sorted(filters.items()))
+    facets = facet_cache.get(key)
+    if facets is None:
+        # Bucket in a subquery so GROUP BY names a column, not a repeated CASE
+        recipes = _filter_recipes(
+            select(Recipe.cuisine_type, time_bucket().label("bucket")), **filters
+        ).subquery()
+        stmt = select(recipes.c.cuisine_type, recipes.c.bucket, func.count()).group_by(
+            recipes.c.cuisine_type, recipes.c.bucket
+        )
+        facets = summarize(await db.execute(stmt))
+        facet_cache.set(key, facets)
+    return facets
+
+async def _rebuild_leaderboard(db: AsyncSession):
+    # The top leaderboard.size of every cuisine; the overall top is a subset of those
+    ranked = select(
+        Recipe.id,
+        Recipe.cuisine_type,
+        Recipe.favourite_count,
+        func.row_number().over(
+            partition_by=Recipe.cuisine_type, order_by=(Recipe.favourite_count.desc(), Recipe.id)
+        ).label("rank"),
+    ).where(Recipe.favourite_count > 0).subquery()
+    stmt = (
+        select(ranked.c.id, ranked.c.cuisine_type, ranked.c.favourite_count)
+        .where(ranked.c.rank <= leaderboard.size)
+        .order_by(ranked.c.favourite_count.desc(), ranked.c.id)
+    )
+    leaderboard.start_rebuild()
+    try:
+        rows = (await db.execute(stmt)).all()
+    except BaseException:
+        leaderboard.abort_rebuild()
+        raise
+    leaderboard.finish_rebuild(rows)
+
+async def get_popular_recipes(
+    db: AsyncSession, limit: int = 10, cuisine_type: Optional[str] = None, fields: List[str] = RECIPE_FIELDS
+):
+    """The most favourited recipes as (row, favourite_count) pairs, ranked by the in-process leaderboard"""
+    if leaderboard.needs_rebuild():
+        await _rebuild_leaderboard(db)
+    ranking = leaderboard.top(limit, cuisine_type)
+    if not ranking:
+        return []
+    stmt = select(*_list_columns(fields)).where(Recipe.id.in_([recipe_id for recipe_id, _ in ranking]))
+    rows = {row.id: row for row in await db.execute(stmt)}
+    # A recipe deleted by another worker stays ranked there until its next rebuild
+    return [(rows[recipe_id], count) for recipe_id, count in ranking if recipe_id in rows]
+
+async def search_recipes(
+    db: AsyncSession, q: str, match_all: bool = True, skip: int = 0, limit: int = 20, fields: List[str] = RECIPE_FIELDS
+):
+    stmt = build_search_query(db.bind.dialect.name, parse_terms(q), match_all)
+    stmt = stmt.with_only_columns(*_list_columns(fields), maintain_column_froms=True)
+    return (await db.execute(stmt.offset(skip).limit(limit))).all()
+
+async def get_recipe(db: AsyncSession, recipe_id: int):
+    return await db.get(models.Recipe, recipe_id)
+
+async def get_recipe_version(db: AsyncSession, recipe_id: int):
+    stmt = select(Recipe.version).where(Recipe.id == recipe_id)
+    return (await db.execute(stmt)).scalar()
+
+async def get_user_recipes(
+    db: AsyncSession,
+    current_user: Principal,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    sort: str = "id",
+    fields: List[str] = RECIPE_FIELDS,
+):
     if not current_user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
-    return db.query(models.Recipe).filter(models.Recipe.user_id == current_user.id).all()
+    stmt = apply_keyset(select(*_list_columns(fields, sort)).where(Recipe.user_id == current_user.id), sort, cursor)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return (await db.execute(stmt)).all()
+
+async def _replace_parsed_ingredients(db: AsyncSession, recipe_id: int, text: Optional[str]):
+    await db.execute(delete(RecipeIngredient).where(RecipeIngredient.recipe_id == recipe_id))
+    rows = ingredient_rows(recipe_id, text)
+    if rows:
+        await db.execute(insert(RecipeIngredient.__table__), rows)
+    return rows
+
+def _index_ingredients(db_recipe: models.Recipe, rows: List[dict]):
+    ingredient_index.upsert(db_recipe.id, db_recipe.version, ingredient_signature(row["name"] for row in rows))
 
-def create_recipe(db: Session, recipe: schemas.RecipeCreate, current_user: User):
+def get_near_duplicates(recipe_id: int, limit: int = 10):
+    """Ids of recipes whose ingredients are near copies of this one's; none until the index is first synced"""
+    if not ingredient_index.ready:
+        return []
+    neighbours = ingredient_index.similar_to(recipe_id, limit, NEAR_DUPLICATE_THRESHOLD)
+    return [neighbour for neighbour, _ in neighbours or []]
+
+async def get_similar_ingredient_recipes(
+    db: AsyncSession, recipe_id: int, limit: int = 10, fields: List[str] = RECIPE_FIELDS
+):
+    """Recipes sharing the most ingredients with a recipe as (row, score) pairs, most similar first"""
+    if not ingredient_index.ready:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="The ingredient index is still loading, please try again shortly",
+            headers={"Retry-After": "5"},
+        )
+    neighbours = ingredient_index.similar_to(recipe_id, limit)
+    if not neighbours:
+        return neighbours
+    stmt = select(*_list_columns(fields)).where(Recipe.id.in_([neighbour for neighbour, _ in neighbours]))
+    rows = {row.id: row for row in await db.execute(stmt)}
+    # The index may still hold a recipe another worker deleted since the last sync
+    return [(rows[neighbour], score) for neighbour, score in neighbours if neighbour in rows]
+
+async def get_recipes_by_ingredient(
+    db: AsyncSession,
+    name: str,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    sort: str = "id",
+    fields: List[str] = RECIPE_FIELDS,
+):
+    """Recipes using an ingredient, found through the (name, recipe_id) index"""
+    using = select(RecipeIngredient.recipe_id).where(RecipeIngredient.name == normalize_name(name))
+    stmt = apply_keyset(select(*_list_columns(fields, sort)).where(Recipe.id.in_(using)), sort, cursor)
+    return (await db.execute(stmt.limit(limit))).all()
+
+async def get_parsed_ingredients(db: AsyncSession, recipe_id: int):
+    stmt = (
+        select(RecipeIngredient)
+        .where(RecipeIngredient.recipe_id == recipe_id)
+        .order_by(RecipeIngredient.position)
+    )
+    return (await db.execute(stmt)).scalars().all()
+
+async def get_shopping_list(
+    db: AsyncSession, items: List[schemas.ShoppingListItem], include_favourites: bool, current_user: Principal
+):
+    """Aggregated ingredients for the requested recipes and, optionally, the user's favourites"""
+    if not current_user:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
+    servings = {}
+    for item in items:
+        servings[item.recipe_id] = servings.get(item.recipe_id, 0) + item.servings
+    # One query for every recipe's already-parsed ingredient rows; the outer
+    # join keeps recipes without any, so they aren't reported missing
+    wanted = Recipe.id.in_(list(servings))
+    if include_favourites:
+        favourite_ids = select(favourites.c.recipe_id).where(favourites.c.user_id == current_user.id)
+        wanted = wanted | Recipe.id.in_(favourite_ids)
+    stmt = (
+        select(Recipe.id, RecipeIngredient.name, RecipeIngredient.quantity, RecipeIngredient.unit)
+        .outerjoin(RecipeIngredient, RecipeIngredient.recipe_id == Recipe.id)
+        .where(wanted)
+        .order_by(Recipe.id, RecipeIngredient.position)
+    )
+    rows = (await db.execute(stmt)).tuples().all()
+    found = {row[0] for row in rows}
+    return {
+        "recipe_ids": sorted(found),
+        "missing": [recipe_id for recipe_id in servings if recipe_id not in found],
+        "items": build_shopping_list(rows, servings),
+    }
+
+async def create_recipe(db: AsyncSession, recipe: schemas.RecipeCreate, current_user: Principal):
     if not current_user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
     db_recipe = models.Recipe(**recipe.model_dump(), user_id=current_user.id)
-    try: 
+    try:
         db.add(db_recipe)
-        db.commit()
-        db.refresh(db_recipe)
+        await db.flush()
+        rows = await _replace_parsed_ingredients(db, db_recipe.id, db_recipe.ingredients)
+        await db.commit()
+        await db.refresh(db_recipe)
+        _index_ingredients(db_recipe, rows)
         return db_recipe
     except Exception as e:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+        raise database_error(e)
 
-def update_recipe(db: Session, recipe_id: int, recipe: schemas.RecipeCreate, current_user: User):
+async def import_recipes(db: AsyncSession, chunks, fmt: str, current_user: Principal, batch_size: int):
+    """Stream NDJSON or CSV rows into recipes owned by the current user"""
     if not current_user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
-    db_recipe = db.query(models.Recipe).filter(models.Recipe.id == recipe_id).first()
+    return await _import_recipes(db, chunks, fmt, current_user.id, batch_size)
+
+async def _commit_recipe_change(db: AsyncSession):
+    # Recipe.version is the mapper's version_id_col: an UPDATE or DELETE that
+    # another request beat to the row matches nothing and raises StaleDataError
+    try:
+        await db.commit()
+    except StaleDataError:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Recipe was changed by another request; reload it and try again")
+
+async def update_recipe(db: AsyncSession, recipe_id: int, recipe: schemas.RecipeCreate, current_user: Principal):
+    if not current_user:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
+    db_recipe = await db.get(models.Recipe, recipe_id)
     if not db_recipe:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Recipe not found")
     if db_recipe.user_id != current_user.id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to update this recipe")
+    ingredients_changed = db_recipe.ingredients != recipe.ingredients
     for key, value in recipe.model_dump().items():
         setattr(db_recipe, key, value)
-    db.commit()
-    db.refresh(db_recipe)
+    if ingredients_changed:
+        rows = await _replace_parsed_ingredients(db, recipe_id, recipe.ingredients)
+    await _commit_recipe_change(db)
+    await db.refresh(db_recipe)
+    # Unchanged ingredients only bump the version; the next sync re-reads them
+    if ingredients_changed:
+        _index_ingredients(db_recipe, rows)
+    # Moves the recipe between cuisine rankings if its cuisine changed
+    leaderboard.update(recipe_id, db_recipe.cuisine_type, db_recipe.favourite_count)
     return db_recipe
 
-def delete_recipe(db: Session, recipe_id: int, current_user: User):
+async def delete_recipe(db: AsyncSession, recipe_id: int, current_user: Principal):
     if not current_user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
-    db_recipe = db.query(models.Recipe).filter(models.Recipe.id == recipe_id).first()
+    db_recipe = await db.get(models.Recipe, recipe_id)
     if not db_recipe:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Recipe not found")
     if db_recipe.user_id != current_user.id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to delete this recipe")
-    db.delete(db_recipe)
-    db.commit()
+    await db.execute(delete(RecipeIngredient).where(RecipeIngredient.recipe_id == recipe_id))
+    await db.execute(delete(MealPlan).where(MealPlan.recipe_id == recipe_id))
+    # Recipes that listed this one get their neighbours recomputed without it
+    listed_by = select(RecipeSimilarity.recipe_id).where(RecipeSimilarity.similar_recipe_id == recipe_id)
+    await db.execute(
+        update(Recipe.__table__).where(Recipe.id.in_(listed_by)).values(similarities_stale=True)
+    )
+    await db.execute(delete(RecipeSimilarity).where(
+        (RecipeSimilarity.recipe_id == recipe_id) | (RecipeSimilarity.similar_recipe_id == recipe_id)
+    ))
+    await db.delete(db_recipe)
+    await _commit_recipe_change(db)
+    leaderboard.discard(recipe_id)
+    ingredient_index.remove([recipe_id])
     return db_recipe
 
-def get_users(db: Session, skip: int = 0, limit: int = 100):
-    users = db.query(models.User).offset(skip).limit(limit).all()
+MEAL_SLOT_ORDER = {slot: position for position, slot in enumerate(get_args(schemas.MealSlot))}
+DIALECT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+async def get_meal_plan(db: AsyncSession, current_user: Principal, start: datetime.date, end: datetime.date):
+    """A user's planned meals between two dates (inclusive), recipes joined in the same query"""
+    if not current_user:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
+    stmt = (
+        select(MealPlan)
+        .options(joinedload(MealPlan.recipe))
+        .where(MealPlan.user_id == current_user.id, MealPlan.date.between(start, end))
+        .order_by(MealPlan.date)
+    )
+    entries = (await db.execute(stmt)).scalars().all()
+    return sorted(entries, key=lambda entry: (entry.date, MEAL_SLOT_ORDER[entry.slot]))
+
+async def upsert_meal_plan(db: AsyncSession, entries: List[schemas.MealPlanSlot], current_user: Principal):
+    """Set or clear many meal slots in one transaction"""
+    if not current_user:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
+    # The last entry for a slot wins, as if the slots were written in order
+    slots = {(entry.date, entry.slot): entry.recipe_id for entry in entries}
+    rows = [
+        {"user_id": current_user.id, "date": date, "slot": slot, "recipe_id": recipe_id}
+        for (date, slot), recipe_id in slots.items() if recipe_id is not None
+    ]
+    cleared = [key for key, recipe_id in slots.items() if recipe_id is None]
+
+    recipe_ids = {row["recipe_id"] for row in rows}
+    if recipe_ids:
+        found = set((await db.execute(select(Recipe.id).where(Recipe.id.in_(recipe_ids)))).scalars())
+        missing = sorted(recipe_ids - found)
+        if missing:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Recipes not found: {missing}")
+        stmt = DIALECT_INSERTS[db.bind.dialect.name](MealPlan).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["user_id", "date", "slot"], set_={"recipe_id": stmt.excluded.recipe_id}
+        )
+        await db.execute(stmt)
+    if cleared:
+        await db.execute(
+            delete(MealPlan).where(MealPlan.user_id == current_user.id, tuple_(MealPlan.date, MealPlan.slot).in_(cleared))
+        )
+    await db.commit()
+    dates = [date for date, _ in slots]
+    return await get_meal_plan(db, current_user, min(dates), max(dates))
+
+async def get_users(db: AsyncSession, skip: int = 0, limit: int = 100):
+    stmt = select(models.User).order_by(models.User.id).offset(skip).limit(limit)
+    users = (await db.execute(stmt)).scalars().all()
     if not users:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No users found")
     return users
 
-def get_user_by_email(db: Session, email: str):
-    user = db.query(models.User).filter(models.User.email == email).first()
+async def get_user_by_email(db: AsyncSession, email: str):
+    stmt = select(models.User).where(models.User.email == email)
+    user = (await db.execute(stmt)).scalars().first()
     return user
 
-def create_user(db: Session, user: schemas.UserCreate):
-    hashed_password = models.User.get_password_hash(user.password)
+async def create_user(db: AsyncSession, user: schemas.UserCreate, hashed_password: Optional[str] = None):
+    # Callers on the event loop hash on the password pool and pass the result in
+    if hashed_password is None:
+        hashed_password = models.User.get_password_hash(user.password)
     db_user = models.User(
         username=user.username,
         email=user.email,
         hashed_password=hashed_password
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
 
     user_data = schemas.UserResponse.model_validate(db_user).model_dump()
 
     user_data.pop("hashed_password", None)
-    
+
     return user_data
 
-def toggle_favorite(db: Session, recipe_id: int, user_id: int):
+def _toggle_favourite_cte(user_id: int, recipe_id: int):
+    """One Postgres statement: delete the favourite if present, otherwise insert it, and
+    move the counter by whatever actually changed. Returns (liked,
+    favourite_count, cuisine_type), or no row when the recipe does not exist."""
+    removed = (
+        delete(favourites)
+        .where(favourites.c.user_id == user_id, favourites.c.recipe_id == recipe_id)
+        .returning(favourites.c.recipe_id)
+        .cte("removed")
+    )
+    added = (
+        postgresql.insert(favourites)
+        .from_select(
+            ["user_id", "recipe_id"],
+            select(literal(user_id), Recipe.id).where(Recipe.id == recipe_id, ~exists(select(removed.c.recipe_id))),
+        )
+        # A concurrent like won the race; leave its row and report the recipe as liked
+        .on_conflict_do_nothing()
+        .returning(favourites.c.recipe_id)
+        .cte("added")
+    )
+    recipes = Recipe.__table__
+    delta = (
+        select(func.count()).select_from(added).scalar_subquery()
+        - select(func.count()).select_from(removed).scalar_subquery()
+    )
+    counted = (
+        recipes.update()
+        .where(recipes.c.id == recipe_id)
+        .values(favourite_count=recipes.c.favourite_count + delta, similarities_stale=True)
+        .returning(recipes.c.favourite_count, recipes.c.cuisine_type)
+        .cte("counted")
+    )
+    return select(~exists(select(removed.c.recipe_id)), counted.c.favourite_count, counted.c.cuisine_type)
+
+async def _toggle_favourite_sqlite(db: AsyncSession, user_id: int, recipe_id: int):
+    """SQLite has no data-modifying CTEs, so the same steps run as RETURNING statements in
+    one transaction. The first statement is a write, which takes the database write lock
+    before anything is read, so concurrent toggles are serialized."""
+    recipes = Recipe.__table__
+    removed = (await db.execute(
+        delete(favourites)
+        .where(favourites.c.user_id == user_id, favourites.c.recipe_id == recipe_id)
+        .returning(favourites.c.recipe_id)
+    )).first()
+    delta = -1
+    if not removed:
+        added = (await db.execute(
+            sqlite.insert(favourites)
+            .from_select(["user_id", "recipe_id"], select(literal(user_id), Recipe.id).where(Recipe.id == recipe_id))
+            .on_conflict_do_nothing()
+            .returning(favourites.c.recipe_id)
+        )).first()
+        delta = 1 if added else 0
+    counted = (await db.execute(
+        recipes.update()
+        .where(recipes.c.id == recipe_id)
+        .values(favourite_count=recipes.c.favourite_count + delta, similarities_stale=True)
+        .returning(recipes.c.favourite_count, recipes.c.cuisine_type)
+    )).first()
+    return None if counted is None else (not removed, *counted)
+
+async def toggle_favorite(db: AsyncSession, recipe_id: int, user_id: int):
     """Toggle favorite (like/unlike) for a recipe"""
     if not user_id:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
-    
-    recipe = db.query(models.Recipe).filter(models.Recipe.id == recipe_id).first()
-    if not recipe:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Recipe not found")
-    
-    favorite = db.query(favourites).filter(
-        favourites.c.user_id == user_id, 
-        favourites.c.recipe_id == recipe_id
-        ).first()
-    
-    if favorite:
-        db.execute(
-            favourites.delete().where(
-                (favourites.c.user_id == user_id) & (favourites.c.recipe_id == recipe_id)
-                )
-                )  
-        # Unlike
-        action = "unliked"
+
+    # The favourite row and the denormalized counter change together, atomically
+    if db.bind.dialect.name == "postgresql":
+        result = (await db.execute(_toggle_favourite_cte(user_id, recipe_id))).first()
     else:
-        db.execute(
-            favourites.insert().values(user_id=user_id, recipe_id=recipe_id))  
-        # Like
-        action = "liked"
+        result = await _toggle_favourite_sqlite(db, user_id, recipe_id)
+    if result is None:
+        await db.rollback()
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Recipe not found")
+    await db.commit()
+
+    liked, count, cuisine_type = result
+    leaderboard.update(recipe_id, cuisine_type, count)
+    action = "liked" if liked else "unliked"
+    return {"message": f"Recipe {action} successfully", "liked": liked, "count": count}
+
+async def get_favorites(
+    db: AsyncSession,
+    user_id: int,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    sort: str = "id",
+    fields: List[str] = RECIPE_FIELDS,
+):
+    if not user_id:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
+
+    stmt = select(*_list_columns(fields, sort)).join(favourites).where(favourites.c.user_id == user_id)
+    # Seek on favourites.recipe_id so the (user_id, recipe_id) primary key drives the scan
+    stmt = apply_keyset(stmt, sort, cursor, id_column=favourites.c.recipe_id)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return (await db.execute(stmt)).all()
 
-    db.commit()
-    return {"message": f"Recipe {action} successfully"}
+async def get_similar_recipes(db: AsyncSession, recipe_id: int, limit: int = 10, fields: List[str] = RECIPE_FIELDS):
+    """Precomputed neighbours of a recipe as rows ending in their score, most similar first"""
+    stmt = (
+        select(*_list_columns(fields), RecipeSimilarity.score)
+        .join(RecipeSimilarity, RecipeSimilarity.similar_recipe_id == Recipe.id)
+        .where(RecipeSimilarity.recipe_id == recipe_id)
+        .order_by(RecipeSimilarity.score.desc(), Recipe.id)
+        .limit(limit)
+    )
+    return (await db.execute(stmt)).all()
 
-def get_favorites(db: Session, user_id: int):
+async def get_recommendations(db: AsyncSession, user_id: int, limit: int = 20, fields: List[str] = RECIPE_FIELDS):
+    """Recipes the user hasn't favourited, scored by summed similarity to the ones they have"""
     if not user_id:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
-    
-    stmt = select(Recipe).join(favourites).where(favourites.c.user_id == user_id)
-    favorite_recipes = db.execute(stmt).scalars().all()
-    return favorite_recipes
-
-def count_favorites(db: Session, recipe_id: int):
-    stmt = select(favourites).where(favourites.c.recipe_id == recipe_id)
-    return len(db.execute(stmt).scalars().all())
-    
+    liked = select(favourites.c.recipe_id).where(favourites.c.user_id == user_id)
+    scored = (
+        select(RecipeSimilarity.similar_recipe_id, func.sum(RecipeSimilarity.score).label("score"))
+        .where(RecipeSimilarity.recipe_id.in_(liked), RecipeSimilarity.similar_recipe_id.not_in(liked))
+        .group_by(RecipeSimilarity.similar_recipe_id)
+        .subquery()
+    )
+    stmt = (
+        select(*_list_columns(fields), scored.c.score)
+        .join(scored, scored.c.similar_recipe_id == Recipe.id)
+        .order_by(scored.c.score.desc(), Recipe.id)
+        .limit(limit)
+    )
+    return (await db.execute(stmt)).all()
+
+async def count_favorites(db: AsyncSession, recipe_id: int):
+    stmt = select(Recipe.favourite_count).where(Recipe.id == recipe_id)
+    return (await db.execute(stmt)).scalar() or 0
+
+async def count_favorites_batch(db: AsyncSession, recipe_ids: List[int]):
+    """Favourite counts for many recipes in one indexed lookup"""
+    stmt = select(Recipe.id, Recipe.favourite_count).where(Recipe.id.in_(set(recipe_ids)))
+    return {recipe_id: count for recipe_id, count in await db.execute(stmt)}
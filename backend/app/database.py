@@ -1,21 +1,66 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from dotenv import load_dotenv
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from .config import DATABASE_URL, IS_TESTING
+from .metrics import PoolMetrics, request_metrics
 import os
 
-load_dotenv()
+# Async drivers for the API: asyncpg for Postgres, aiosqlite for SQLite
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
 
-# Use environment variable to check if running tests
-IS_TESTING = os.getenv("TESTING", "false").lower() == "true"
+def get_async_url(url):
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for {backend}")
+    return url.set(drivername=ASYNC_DRIVERS[backend])
 
-# Use test database if running tests
-DATABASE_URL = "sqlite:///./test.db" if IS_TESTING else os.getenv("DATABASE_URL")
 
+# Connection pool settings, overridable from the environment
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # seconds, -1 disables
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False} if IS_TESTING else {})
+def pool_options(metrics: PoolMetrics, base=QueuePool):
+    return {
+        "poolclass": metrics.pool_class(base),
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+sync_pool_metrics = PoolMetrics("sync")
+api_pool_metrics = PoolMetrics("api")
+
+# Synchronous engine, used by seed.py, maintenance commands and Alembic
+engine = create_engine(
+    DATABASE_URL,
+    connect_args={"check_same_thread": False} if IS_TESTING else {},
+    **pool_options(sync_pool_metrics),
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Asynchronous engine serving API requests
+async_engine = create_async_engine(
+    get_async_url(DATABASE_URL), **pool_options(api_pool_metrics, AsyncAdaptedQueuePool)
+)
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+sync_pool_metrics.attach(engine)
+api_pool_metrics.attach(async_engine.sync_engine)
+request_metrics.attach(engine)
+request_metrics.attach(async_engine.sync_engine)
+
 Base = declarative_base()
 
 # Dependency to get the database session
@@ -24,4 +69,9 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+# Dependency to get an async database session for API routes
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,249 @@
+import itertools
+import random
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Callable, Iterable, Iterator, List, Optional
+
+from sqlalchemy import bindparam, func, insert, select, text, update
+from sqlalchemy.orm import Session
+
+from .ingredients import ingredient_rows
+from .models import Recipe, RecipeIngredient, User, favourites
+from .passwords import hash_password
+
+# Cuisine -> (relative share of recipes, dishes, characteristic ingredients)
+CUISINES = {
+    "italian": (18, ["risotto", "lasagne", "carbonara", "minestrone", "focaccia", "gnocchi", "ragu"],
+                ["arborio rice", "parmesan", "basil", "spaghetti", "pancetta", "mozzarella", "oregano"]),
+    "mexican": (12, ["tacos", "enchiladas", "mole", "pozole", "quesadilla", "tamales", "salsa verde"],
+                ["corn tortilla", "black bean", "jalapeno", "coriander", "lime", "avocado", "cumin"]),
+    "indian": (12, ["dal", "biryani", "korma", "chana masala", "saag paneer", "vindaloo", "pakora"],
+               ["basmati rice", "garam masala", "turmeric", "ginger", "ghee", "chickpea", "yogurt"]),
+    "chinese": (11, ["fried rice", "mapo tofu", "kung pao chicken", "dumplings", "chow mein", "char siu"],
+                ["soy sauce", "sesame oil", "ginger", "spring onion", "tofu", "rice vinegar", "star anise"]),
+    "japanese": (8, ["ramen", "teriyaki", "katsu curry", "onigiri", "miso soup", "okonomiyaki"],
+                 ["miso", "mirin", "nori", "sushi rice", "dashi", "soy sauce", "sesame seed"]),
+    "french": (8, ["ratatouille", "coq au vin", "quiche", "bouillabaisse", "crepes", "gratin"],
+               ["butter", "shallot", "thyme", "dijon mustard", "white wine", "cream", "gruyere"]),
+    "thai": (7, ["green curry", "pad thai", "tom yum", "larb", "massaman curry", "som tam"],
+             ["fish sauce", "coconut milk", "lemongrass", "thai basil", "rice noodle", "chilli", "lime"]),
+    "greek": (6, ["moussaka", "souvlaki", "spanakopita", "gemista", "tzatziki", "pastitsio"],
+              ["feta", "olive", "oregano", "lemon", "aubergine", "filo pastry", "yogurt"]),
+    "american": (10, ["mac and cheese", "chili", "meatloaf", "pancakes", "cornbread", "burger"],
+                 ["cheddar", "ground beef", "buttermilk", "maple syrup", "bacon", "potato", "paprika"]),
+    "ethiopian": (3, ["doro wat", "misir wat", "shiro", "tibs", "gomen"],
+                  ["berbere", "red lentil", "teff flour", "niter kibbeh", "collard green", "onion"]),
+    "kenyan": (5, ["pilau", "nyama choma", "sukuma wiki", "githeri", "mandazi", "ugali"],
+               ["maize flour", "kale", "pilau masala", "goat meat", "kidney bean", "tomato", "coconut"]),
+}
+PANTRY = ["onion", "garlic", "olive oil", "salt", "black pepper", "tomato", "chicken", "egg", "flour",
+          "sugar", "carrot", "potato", "rice", "vegetable stock", "lemon", "parsley", "milk", "butter"]
+ADJECTIVES = ["Classic", "Quick", "Spicy", "Smoky", "Creamy", "Weeknight", "Grandma's", "Easy", "Rustic",
+              "Crispy", "Herby", "One-pot", "Slow-cooked", "Zesty", "Hearty", "Light"]
+LIQUIDS = {"olive oil", "sesame oil", "soy sauce", "fish sauce", "rice vinegar", "mirin", "dashi", "milk",
+           "cream", "buttermilk", "coconut milk", "white wine", "vegetable stock", "maple syrup", "yogurt"}
+SPICES = {"salt", "black pepper", "cumin", "turmeric", "garam masala", "oregano", "thyme", "paprika",
+          "berbere", "pilau masala", "star anise", "sesame seed", "dijon mustard", "miso"}
+COUNTED = {"egg", "onion", "lemon", "lime", "carrot", "potato", "tomato", "avocado", "jalapeno", "shallot",
+           "aubergine", "corn tortilla", "spring onion", "chilli"}
+# Ingredient kind -> [(unit, (low, high))]; grams and millilitres snap to 25
+MEASURES = {
+    "liquid": [("ml", (25, 500)), ("tbsp", (1, 4)), ("cup", (1, 3))],
+    "spice": [("tsp", (1, 3)), ("tbsp", (1, 2)), ("pinch", (1, 2))],
+    "counted": [(None, (1, 6))],
+    "garlic": [("clove", (1, 6))],
+    "other": [("g", (50, 800)), ("cup", (1, 3)), ("kg", (1, 2))],
+}
+STEPS = ["Prepare the {a}.", "Heat the {a} over a medium flame.", "Add the {a} and stir for {n} minutes.",
+         "Season with {a} to taste.", "Simmer gently for {n} minutes.", "Fold in the {a}.",
+         "Bake for {n} minutes until golden.", "Rest for {n} minutes before serving."]
+COOKING_TIMES = [5, 10, 15, 20, 25, 30, 35, 40, 45, 60, 75, 90, 120, 180, 240]
+COOKING_TIME_WEIGHTS = list(itertools.accumulate([2, 6, 10, 12, 12, 14, 8, 8, 8, 7, 4, 4, 3, 1, 1]))
+
+
+@dataclass
+class GeneratorConfig:
+    users: int = 2
+    recipes: int = 10
+    favourites_per_user: float = 3.0
+    zipf_exponent: float = 1.1
+    seed: int = 42
+    password: str = "password1"
+    batch_size: int = 10_000
+
+
+def zipf_cum_weights(n: int, exponent: float) -> List[float]:
+    """Cumulative weights of ranks 1..n under a Zipf law, for random.choices."""
+    return list(itertools.accumulate(1.0 / rank ** exponent for rank in range(1, n + 1)))
+
+
+def batched(rows: Iterable[dict], size: int) -> Iterator[List[dict]]:
+    iterator = iter(rows)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+class DataGenerator:
+    """Deterministic synthetic users, recipes and favourites.
+
+    Ids are assigned here, continuing after the largest existing id, so rows
+    can be written with plain executemany batches and the favourites graph
+    can be drawn without reading anything back.
+    """
+
+    def __init__(self, db: Session, config: GeneratorConfig, log: Callable[[str], None] = lambda message: None):
+        self.db = db
+        self.config = config
+        self.log = log
+        self.rng = random.Random(config.seed)
+        self.cuisines = list(CUISINES)
+        self.cuisine_weights = list(itertools.accumulate(CUISINES[c][0] for c in self.cuisines))
+        self.favourite_counts = Counter()
+
+    def _max_id(self, column) -> int:
+        return self.db.execute(select(func.coalesce(func.max(column), 0))).scalar()
+
+    def _write(self, table, rows: Iterable[dict], label: str) -> int:
+        started = time.perf_counter()
+        total = 0
+        for batch in batched(rows, self.config.batch_size):
+            self.db.execute(insert(table), batch)
+            self.db.commit()
+            total += len(batch)
+        self.log(f"{label}: {total} rows in {time.perf_counter() - started:.1f}s")
+        return total
+
+    def user_rows(self, first_id: int) -> Iterator[dict]:
+        # bcrypt is deliberately slow, so every generated user shares one hash
+        hashed_password = hash_password(self.config.password)
+        for user_id in range(first_id, first_id + self.config.users):
+            yield {
+                "id": user_id,
+                "username": f"user{user_id}",
+                "email": f"user{user_id}@example.com",
+                "hashed_password": hashed_password,
+            }
+
+    @staticmethod
+    def _kind(name: str) -> str:
+        if name in LIQUIDS:
+            return "liquid"
+        if name in SPICES:
+            return "spice"
+        if name in COUNTED:
+            return "counted"
+        return "garlic" if name == "garlic" else "other"
+
+    def _ingredients(self, cuisine: str):
+        rng = self.rng
+        specific = CUISINES[cuisine][2]
+        names = rng.sample(specific, rng.randint(2, min(5, len(specific))))
+        names = list(dict.fromkeys(names + rng.sample(PANTRY, rng.randint(2, 7))))
+        lines = []
+        for name in names:
+            unit, (low, high) = rng.choice(MEASURES[self._kind(name)])
+            quantity = rng.randint(low, high)
+            if unit in ("g", "ml"):
+                quantity = quantity // 25 * 25 or 25
+            if unit:
+                lines.append(f"{quantity} {unit} {name}")
+            else:
+                plural = name + ("es" if name in ("tomato", "potato") else "s") if quantity > 1 else name
+                lines.append(f"{quantity} {plural}")
+        return ", ".join(lines), names
+
+    def _instructions(self, names: List[str]) -> str:
+        rng = self.rng
+        steps = rng.sample(STEPS, rng.randint(3, 6))
+        return " ".join(step.format(a=rng.choice(names), n=rng.choice((2, 5, 10, 15, 20))) for step in steps)
+
+    def recipe_rows(self, first_id: int, user_ids: List[int]) -> Iterator[dict]:
+        rng = self.rng
+        # A few prolific authors write most recipes
+        author_weights = zipf_cum_weights(len(user_ids), 1.0)
+        for recipe_id in range(first_id, first_id + self.config.recipes):
+            cuisine = rng.choices(self.cuisines, cum_weights=self.cuisine_weights)[0]
+            ingredients, names = self._ingredients(cuisine)
+            yield {
+                "id": recipe_id,
+                "title": f"{rng.choice(ADJECTIVES)} {rng.choice(CUISINES[cuisine][1]).title()}",
+                "cuisine_type": cuisine,
+                "cooking_time": rng.choices(COOKING_TIMES, cum_weights=COOKING_TIME_WEIGHTS)[0],
+                "ingredients": ingredients,
+                "instructions": self._instructions(names),
+                "user_id": rng.choices(user_ids, cum_weights=author_weights)[0],
+            }
+
+    def favourite_rows(self, user_ids: List[int], recipe_ids: List[int]) -> Iterator[dict]:
+        rng = self.rng
+        # Popularity ranks are shuffled so the most liked recipes are not simply the oldest
+        ranked = recipe_ids[:]
+        rng.shuffle(ranked)
+        weights = zipf_cum_weights(len(ranked), self.config.zipf_exponent)
+        mean = self.config.favourites_per_user
+        for user_id in user_ids:
+            # Heavy-tailed activity: most users like a few recipes, some like many
+            wanted = min(len(ranked), int(rng.expovariate(1 / mean)) if mean > 0 else 0)
+            liked = set()
+            for _ in range(wanted * 3):
+                if len(liked) >= wanted:
+                    break
+                liked.add(rng.choices(ranked, cum_weights=weights)[0])
+            self.favourite_counts.update(liked)
+            for recipe_id in sorted(liked):
+                yield {"user_id": user_id, "recipe_id": recipe_id}
+
+    def _write_favourite_counts(self):
+        # Counts were tallied while drawing the graph, so only liked recipes
+        # are touched instead of reconciling the whole table. Flagging them
+        # stale lets `manage.py similarities` compute their neighbours.
+        table = Recipe.__table__
+        stmt = (
+            update(table)
+            .where(table.c.id == bindparam("recipe_id"))
+            .values(favourite_count=table.c.favourite_count + bindparam("liked"), similarities_stale=True)
+        )
+        rows = ({"recipe_id": recipe_id, "liked": count} for recipe_id, count in self.favourite_counts.items())
+        for batch in batched(rows, self.config.batch_size):
+            self.db.execute(stmt, batch)
+            self.db.commit()
+
+    def _reset_sequences(self):
+        if self.db.bind.dialect.name != "postgresql":
+            return
+        for table in ("users", "recipes"):
+            self.db.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT max(id) FROM {table}))"
+            ))
+        self.db.commit()
+
+    def run(self) -> dict:
+        first_user = self._max_id(User.id) + 1
+        first_recipe = self._max_id(Recipe.id) + 1
+        user_ids = list(range(first_user, first_user + self.config.users))
+        recipe_ids = list(range(first_recipe, first_recipe + self.config.recipes))
+
+        users = self._write(User.__table__, self.user_rows(first_user), "users")
+
+        # Parsed ingredient rows are written alongside each recipe batch
+        recipes = 0
+        parsed = 0
+        started = time.perf_counter()
+        for batch in batched(self.recipe_rows(first_recipe, user_ids), self.config.batch_size):
+            self.db.execute(insert(Recipe.__table__), batch)
+            rows = [row for recipe in batch for row in ingredient_rows(recipe["id"], recipe["ingredients"])]
+            self.db.execute(insert(RecipeIngredient.__table__), rows)
+            self.db.commit()
+            recipes += len(batch)
+            parsed += len(rows)
+        self.log(f"recipes: {recipes} rows ({parsed} parsed ingredients) in {time.perf_counter() - started:.1f}s")
+
+        liked = self._write(favourites, self.favourite_rows(user_ids, recipe_ids), "favourites")
+        self._write_favourite_counts()
+        self._reset_sequences()
+        return {"users": users, "recipes": recipes, "recipe_ingredients": parsed, "favourites": liked}
+
+
+def generate(db: Session, config: Optional[GeneratorConfig] = None, log: Callable[[str], None] = print) -> dict:
+    return DataGenerator(db, config or GeneratorConfig(), log).run()
@@ -0,0 +1,34 @@
+import hashlib
+from typing import Iterable, Optional, Tuple
+
+from fastapi import Response, status
+
+
+def recipe_etag(recipe_id: int, version: int) -> str:
+    return f'"r{recipe_id}v{version}"'
+
+
+def list_etag(params: dict, rows: Iterable[Tuple[int, int]]) -> str:
+    """ETag for a list page from its query parameters and (id, version) pairs.
+
+    Any edit, insert or delete that changes what the page would contain
+    changes the pairs, and so the tag.
+    """
+    digest = hashlib.sha1(repr(sorted(params.items())).encode())
+    for recipe_id, version in rows:
+        digest.update(b"%d:%d;" % (recipe_id, version))
+    return f'"l{digest.hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    # If-None-Match uses the weak comparison function (RFC 9110 13.1.2)
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def not_modified(etag: str, headers: Optional[dict] = None) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag, **(headers or {})})
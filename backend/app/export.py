@@ -0,0 +1,80 @@
+import csv
+import io
+import json
+import zlib
+from typing import AsyncIterator, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .models import Recipe
+
+EXPORT_COLUMNS = ["id", "title", "cuisine_type", "cooking_time", "ingredients", "instructions", "user_id"]
+EXPORT_YIELD_PER = 1000
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+async def _partitions(db: AsyncSession, user_id: Optional[int], yield_per: int):
+    # FastAPI closes request dependencies before the body is streamed, so the
+    # session is only used from here on and the stream closes it when done.
+    # stream() + yield_per reads through a server-side cursor in fixed-size chunks.
+    try:
+        stmt = (
+            select(*(getattr(Recipe, column) for column in EXPORT_COLUMNS))
+            .order_by(Recipe.id)
+            .execution_options(yield_per=yield_per)
+        )
+        if user_id is not None:
+            stmt = stmt.where(Recipe.user_id == user_id)
+        result = await db.stream(stmt)
+        async for partition in result.partitions():
+            yield partition
+    finally:
+        await db.close()
+
+
+def _encode_ndjson(rows) -> str:
+    return "".join(json.dumps(dict(zip(EXPORT_COLUMNS, row))) + "\n" for row in rows)
+
+
+def _csv_encoder():
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def encode(rows) -> str:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(rows)
+        return buffer.getvalue()
+
+    return encode
+
+
+async def export_recipes(
+    db: AsyncSession, fmt: str, user_id: Optional[int] = None, gzip: bool = False, yield_per: int = EXPORT_YIELD_PER
+) -> AsyncIterator[bytes]:
+    """Yield the encoded export one database partition at a time."""
+    if fmt == "csv":
+        encode = _csv_encoder()
+        header = encode([EXPORT_COLUMNS])
+    else:
+        encode = _encode_ndjson
+        header = ""
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS) if gzip else None
+
+    def output(text: str) -> bytes:
+        data = text.encode()
+        return compressor.compress(data) if compressor else data
+
+    if header:
+        yield output(header)
+    async for partition in _partitions(db, user_id, yield_per):
+        chunk = output(encode(partition))
+        if chunk:
+            yield chunk
+    if compressor:
+        yield compressor.flush()
@@ -0,0 +1,83 @@
+import os
+import threading
+import time
+from typing import Optional
+
+from sqlalchemy import case
+
+from .models import Recipe
+
+FACET_CACHE_TTL = float(os.getenv("FACET_CACHE_TTL", "30"))
+FACET_CACHE_SIZE = 256
+
+# (label, min_cooking_time, max_cooking_time) with inclusive bounds, so a
+# bucket maps straight onto the min/max filters of GET /recipes/
+TIME_BUCKETS = [
+    ("under_15", None, 14),
+    ("15_to_30", 15, 30),
+    ("31_to_60", 31, 60),
+    ("over_60", 61, None),
+]
+
+
+def time_bucket():
+    """SQL expression naming the cooking time bucket of a recipe."""
+    whens = [(Recipe.cooking_time <= high, label) for label, _, high in TIME_BUCKETS if high is not None]
+    return case(*whens, (Recipe.cooking_time.is_(None), "unknown"), else_=TIME_BUCKETS[-1][0])
+
+
+def summarize(rows):
+    """Fold (cuisine_type, bucket, count) rows into both facets."""
+    cuisines = {}
+    buckets = {label: 0 for label, _, _ in TIME_BUCKETS}
+    total = 0
+    for cuisine_type, bucket, count in rows:
+        cuisines[cuisine_type] = cuisines.get(cuisine_type, 0) + count
+        buckets[bucket] = buckets.get(bucket, 0) + count
+        total += count
+    return {
+        "total": total,
+        "cuisine_types": [
+            {"value": value, "count": count}
+            for value, count in sorted(cuisines.items(), key=lambda item: (-item[1], item[0] or ""))
+        ],
+        "cooking_times": [
+            {"bucket": label, "min_cooking_time": low, "max_cooking_time": high, "count": buckets.pop(label)}
+            for label, low, high in TIME_BUCKETS
+        ] + [{"bucket": label, "count": count} for label, count in buckets.items()],
+    }
+
+
+class FacetCache:
+    """Small TTL cache; facet counts may lag writes by up to ``ttl`` seconds."""
+
+    def __init__(self, ttl: float, maxsize: int = FACET_CACHE_SIZE):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= time.monotonic():
+                return None
+            return entry[0]
+
+    def set(self, key, value: dict):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            if len(self._entries) >= self.maxsize:
+                now = time.monotonic()
+                self._entries = {k: v for k, v in self._entries.items() if v[1] > now}
+                if len(self._entries) >= self.maxsize:
+                    self._entries.pop(next(iter(self._entries)))
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+facet_cache = FacetCache(FACET_CACHE_TTL)
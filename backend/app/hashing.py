@@ -0,0 +1,119 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from fastapi import HTTPException, status
+
+from .passwords import hash_password, verify_password
+
+# bcrypt is deliberately slow (~250 ms per call), so hashing and verification
+# run on a dedicated, size-limited pool instead of the event loop or
+# Starlette's shared threadpool. Threads are enough when the bcrypt backend
+# releases the GIL (the `bcrypt` package does); set
+# PASSWORD_HASH_EXECUTOR=process to scale across cores with backends that don't.
+PASSWORD_HASH_EXECUTOR = os.getenv("PASSWORD_HASH_EXECUTOR", "thread")
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", os.cpu_count() or 1))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", PASSWORD_HASH_WORKERS * 4))
+
+
+def _hash(password: str):
+    return hash_password(password)
+
+
+def _verify(password: str, hashed_password: str):
+    return verify_password(password, hashed_password)
+
+
+def _timed(fn, *args):
+    # Runs inside the worker so the measured time excludes queueing
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+
+class PasswordHashPool:
+    """Bounded worker pool for bcrypt work.
+
+    At most ``max_pending`` calls may be running or queued at once; further
+    calls are rejected with 503 so a burst of logins cannot build an
+    unbounded backlog.
+    """
+
+    def __init__(self, workers: int, max_pending: int, kind: str = "thread"):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.kind = kind
+        self._executor = None
+        self._lock = threading.Lock()
+        self._started_at = time.monotonic()
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.busy_seconds = 0.0
+        self.wait_seconds = 0.0
+
+    def _get_executor(self):
+        # Created on first use so forked server workers each get their own pool
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    if self.kind == "process":
+                        self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                    else:
+                        self._executor = ThreadPoolExecutor(
+                            max_workers=self.workers, thread_name_prefix="password-hash"
+                        )
+        return self._executor
+
+    async def run(self, fn, *args):
+        if self.in_flight >= self.max_pending:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server is busy, please try again shortly",
+                headers={"Retry-After": "1"},
+            )
+        self.in_flight += 1
+        submitted = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            result, busy = await loop.run_in_executor(self._get_executor(), _timed, fn, *args)
+        finally:
+            self.in_flight -= 1
+        self.completed += 1
+        self.busy_seconds += busy
+        self.wait_seconds += max(time.perf_counter() - submitted - busy, 0.0)
+        return result
+
+    async def hash_password(self, password: str) -> str:
+        return await self.run(_hash, password)
+
+    async def verify_password(self, password: str, hashed_password: str) -> bool:
+        return await self.run(_verify, password, hashed_password)
+
+    def stats(self):
+        uptime = time.monotonic() - self._started_at
+        return {
+            "executor": self.kind,
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "in_flight": self.in_flight,
+            "active": min(self.in_flight, self.workers),
+            "queued": max(self.in_flight - self.workers, 0),
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "wait_seconds": round(self.wait_seconds, 3),
+            # Share of available worker time spent hashing since startup
+            "utilization": round(self.busy_seconds / (uptime * self.workers), 4) if uptime else 0.0,
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_pool = PasswordHashPool(PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_PENDING, PASSWORD_HASH_EXECUTOR)
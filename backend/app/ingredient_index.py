@@ -0,0 +1,316 @@
+"""Content similarity between recipes from their parsed ingredient names.
+
+Each recipe's set of ingredient names is summarised by a MinHash signature:
+NUM_PERM minimums of random hash permutations, where the fraction of equal
+positions between two signatures estimates the Jaccard similarity of the sets.
+Signatures live in one (rows, NUM_PERM) uint32 array. Locality-sensitive
+hashing splits them into BANDS bands of ROWS values; recipes sharing any band
+are candidates, so a lookup touches a few buckets instead of every recipe.
+With 16 bands of 4, a pair with Jaccard 0.5 becomes a candidate with
+probability 0.64 and a pair at 0.8 with probability 0.99.
+
+Each worker keeps its own copy. Every INGREDIENT_INDEX_SYNC_INTERVAL seconds
+it reads the (id, version) of every recipe, a full scan that takes 3-4 s of
+the sync thread per million recipes on SQLite, and then fetches ingredients
+only for recipes whose version moved. Versions are per recipe, and deleted
+recipes leave no row behind, so there is no cheaper "changed since" query.
+Raise the interval for large catalogues.
+"""
+import os
+import threading
+import time
+import zlib
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from .models import Recipe, RecipeIngredient
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+# Largest prime below 2**32: (a * x + b) % PRIME stays inside uint64 for 32-bit a, x, b
+PRIME = 4294967291
+# Fixed so signatures written by one process are valid in every other
+SEED = 20241018
+NEAR_DUPLICATE_THRESHOLD = float(os.getenv("NEAR_DUPLICATE_THRESHOLD", "0.9"))
+INGREDIENT_INDEX_PATH = os.getenv("INGREDIENT_INDEX_PATH")
+INGREDIENT_INDEX_SYNC_INTERVAL = float(os.getenv("INGREDIENT_INDEX_SYNC_INTERVAL", "300"))
+SYNC_CHUNK_SIZE = 1000
+
+_rng = np.random.default_rng(SEED)
+_A = _rng.integers(1, PRIME, NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, PRIME, NUM_PERM, dtype=np.uint64)
+# Folds a band's ROWS values into one uint64 bucket key (wrapping arithmetic)
+_BAND_MIX = _rng.integers(1, 2**63, ROWS, dtype=np.uint64) | np.uint64(1)
+
+
+def signature(names: Iterable[str]) -> Optional[np.ndarray]:
+    """MinHash signature of a set of ingredient names, or None for an empty set."""
+    # crc32 rather than hash(): str hashes are salted per process
+    hashes = np.fromiter({zlib.crc32(name.encode()) % PRIME for name in names}, dtype=np.uint64)
+    if not len(hashes):
+        return None
+    return ((np.outer(hashes, _A) + _B) % np.uint64(PRIME)).min(axis=0).astype(np.uint32)
+
+
+def band_keys(signatures: np.ndarray) -> np.ndarray:
+    """(n, BANDS) bucket keys of (n, NUM_PERM) signatures."""
+    bands = signatures.reshape(len(signatures), BANDS, ROWS).astype(np.uint64)
+    return (bands * _BAND_MIX).sum(axis=2, dtype=np.uint64)
+
+
+class IngredientIndex:
+    """MinHash signatures with LSH buckets, updated in place and saved with np.savez.
+
+    Buckets are sorted key arrays per band, searched with np.searchsorted,
+    plus a dict of keys written since the last compaction. Updated and removed
+    recipes leave stale keys behind until compact(); they only add candidates,
+    which are always checked against the current signature.
+
+    Requests only make single-recipe updates. Bulk work (load, sync, compact)
+    runs off the event loop and holds the lock just long enough to copy or
+    swap arrays, so it never stalls a request waiting on the lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.recipe_ids = np.empty(0, dtype=np.int64)
+        self.versions = np.empty(0, dtype=np.int64)
+        self.signatures = np.empty((0, NUM_PERM), dtype=np.uint32)
+        self.size = 0
+        self.positions: Dict[int, int] = {}
+        self.base_keys = np.empty((BANDS, 0), dtype=np.uint64)
+        self.base_rows = np.empty((BANDS, 0), dtype=np.int64)
+        self.recent: List[Dict[int, List[int]]] = [{} for _ in range(BANDS)]
+        # Versions of recipes without ingredients: they have no signature, but
+        # a sync must still know they are up to date
+        self.empty: Dict[int, int] = {}
+        self.synced_at: Optional[float] = None
+        # Bumped by every write; compact() discards its work if this moved meanwhile
+        self.generation = 0
+
+    def __len__(self):
+        return len(self.positions)
+
+    @property
+    def ready(self) -> bool:
+        """Whether the index has been synced with the database at least once."""
+        return self.synced_at is not None
+
+    def _grow(self):
+        capacity = max(1024, 2 * len(self.recipe_ids))
+        recipe_ids = np.full(capacity, -1, dtype=np.int64)
+        versions = np.zeros(capacity, dtype=np.int64)
+        signatures = np.zeros((capacity, NUM_PERM), dtype=np.uint32)
+        recipe_ids[:self.size] = self.recipe_ids[:self.size]
+        versions[:self.size] = self.versions[:self.size]
+        signatures[:self.size] = self.signatures[:self.size]
+        self.recipe_ids, self.versions, self.signatures = recipe_ids, versions, signatures
+
+    def _version(self, recipe_id: int) -> int:
+        row = self.positions.get(recipe_id)
+        return int(self.versions[row]) if row is not None else self.empty.get(recipe_id, -1)
+
+    def upsert(self, recipe_id: int, version: int, sig: Optional[np.ndarray]):
+        """Store a recipe's signature; recipes without ingredients only have their version kept."""
+        self.upsert_many([(recipe_id, version, sig)])
+
+    def upsert_many(self, rows: Sequence[Tuple[int, int, Optional[np.ndarray]]]):
+        indexed = [row for row in rows if row[2] is not None]
+        keys = band_keys(np.array([sig for _, _, sig in indexed], dtype=np.uint32).reshape(-1, NUM_PERM)).tolist()
+        with self._lock:
+            self.generation += 1
+            for recipe_id, version, sig in rows:
+                if sig is None and self._version(recipe_id) <= version:
+                    self.remove([recipe_id])
+                    self.empty[recipe_id] = version
+            for (recipe_id, version, sig), row_keys in zip(indexed, keys):
+                # A sync that read the recipe before this worker rewrote it
+                if self._version(recipe_id) > version:
+                    continue
+                self.empty.pop(recipe_id, None)
+                row = self.positions.get(recipe_id)
+                if row is None:
+                    if self.size == len(self.recipe_ids):
+                        self._grow()
+                    row = self.size
+                    self.size += 1
+                    self.positions[recipe_id] = row
+                self.recipe_ids[row] = recipe_id
+                self.versions[row] = version
+                self.signatures[row] = sig
+                for band, key in enumerate(row_keys):
+                    self.recent[band].setdefault(key, []).append(row)
+
+    def upsert_names(self, rows: Sequence[Tuple[int, int, List[str]]], batch_size: int = 500):
+        """(recipe_id, version, ingredient names) in bulk, holding the lock for batch_size recipes at a time."""
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            self.upsert_many([(recipe_id, version, signature(names)) for recipe_id, version, names in batch])
+
+    def remove(self, recipe_ids: Iterable[int]):
+        with self._lock:
+            self.generation += 1
+            for recipe_id in recipe_ids:
+                self.empty.pop(recipe_id, None)
+                row = self.positions.pop(recipe_id, None)
+                if row is not None:
+                    self.recipe_ids[row] = -1
+
+    def changes(self, current: Iterable[Tuple[int, int]]) -> Tuple[List[int], List[int]]:
+        """Given every recipe's (id, version), the ids to (re)index and the ids to drop."""
+        with self._lock:
+            recipe_ids = self.recipe_ids[:self.size].copy()
+            versions = self.versions[:self.size].copy()
+            empty = dict(self.empty)
+        indexed = dict(zip(recipe_ids.tolist(), versions.tolist()))
+        indexed.pop(-1, None)
+        indexed.update(empty)
+        changed, last_id = [], 0
+        for recipe_id, version in current:
+            last_id = max(last_id, recipe_id)
+            if indexed.pop(recipe_id, -1) < version:
+                changed.append(recipe_id)
+        # Recipes created by this worker after `current` was read are not gone
+        return changed, [recipe_id for recipe_id in indexed if recipe_id <= last_id]
+
+    def candidates(self, sig: np.ndarray) -> np.ndarray:
+        keys = band_keys(sig[None])[0]
+        found = []
+        for band, key in enumerate(keys.tolist()):
+            lo = np.searchsorted(self.base_keys[band], key, side="left")
+            hi = np.searchsorted(self.base_keys[band], key, side="right")
+            found.append(self.base_rows[band][lo:hi])
+            found.append(np.asarray(self.recent[band].get(key, ()), dtype=np.int64))
+        return np.unique(np.concatenate(found))
+
+    def query(
+        self, sig: np.ndarray, limit: int = 10, min_score: float = 0.0, exclude: Optional[int] = None
+    ) -> List[Tuple[int, float]]:
+        """(recipe_id, estimated Jaccard) of the closest candidates, best first, ties by id."""
+        with self._lock:
+            rows = self.candidates(sig)
+            rows = rows[self.recipe_ids[rows] >= 0]
+            recipe_ids = self.recipe_ids[rows]
+            scores = (self.signatures[rows] == sig).mean(axis=1)
+        # Stale bucket keys can bring in recipes that share nothing any more
+        keep = (scores > 0) & (scores >= min_score) & (recipe_ids != (exclude if exclude is not None else -1))
+        recipe_ids, scores = recipe_ids[keep], scores[keep]
+        order = np.lexsort((recipe_ids, -scores))[:limit]
+        return list(zip(recipe_ids[order].tolist(), scores[order].tolist()))
+
+    def similar_to(self, recipe_id: int, limit: int = 10, min_score: float = 0.0) -> Optional[List[Tuple[int, float]]]:
+        """Neighbours of an indexed recipe, or None when it isn't indexed."""
+        with self._lock:
+            row = self.positions.get(recipe_id)
+            if row is None:
+                return None
+            sig = self.signatures[row].copy()
+        return self.query(sig, limit, min_score, exclude=recipe_id)
+
+    def compact(self) -> bool:
+        """Drop removed rows and fold recent keys into the sorted bucket arrays.
+
+        Sorts a copy outside the lock. Returns False, leaving the index as it
+        was, when a write landed meanwhile; the next sync compacts instead.
+        """
+        with self._lock:
+            generation = self.generation
+            live = np.flatnonzero(self.recipe_ids[:self.size] >= 0)
+            recipe_ids = self.recipe_ids[live]
+            versions = self.versions[live]
+            signatures = self.signatures[live]
+        keys = band_keys(signatures).T
+        order = np.argsort(keys, axis=1, kind="stable")
+        base_keys = np.take_along_axis(keys, order, axis=1)
+        positions = dict(zip(recipe_ids.tolist(), range(len(recipe_ids))))
+        with self._lock:
+            if self.generation != generation:
+                return False
+            self._swap(recipe_ids, versions, signatures, positions, base_keys, order.astype(np.int64))
+        return True
+
+    def _swap(self, recipe_ids, versions, signatures, positions, base_keys, base_rows):
+        self.recipe_ids, self.versions, self.signatures = recipe_ids, versions, signatures
+        self.size = len(recipe_ids)
+        self.positions = positions
+        self.base_keys, self.base_rows = base_keys, base_rows
+        self.recent = [{} for _ in range(BANDS)]
+        self.generation += 1
+
+    def save(self, path: str):
+        """Write the index atomically, so workers never load a half-written file."""
+        with self._lock:
+            while not self.compact():
+                pass
+            tmp = f"{path}.tmp"
+            with open(tmp, "wb") as f:
+                np.savez(
+                    f,
+                    params=np.array([NUM_PERM, BANDS, SEED]),
+                    recipe_ids=self.recipe_ids,
+                    versions=self.versions,
+                    signatures=self.signatures,
+                    base_keys=self.base_keys,
+                    base_rows=self.base_rows,
+                    empty_ids=np.fromiter(self.empty, dtype=np.int64, count=len(self.empty)),
+                    empty_versions=np.fromiter(self.empty.values(), dtype=np.int64, count=len(self.empty)),
+                )
+            os.replace(tmp, path)
+
+    def load(self, path: str) -> bool:
+        """Load a saved index; False when it was built with other MinHash parameters."""
+        with np.load(path) as data:
+            if data["params"].tolist() != [NUM_PERM, BANDS, SEED]:
+                return False
+            arrays = [data[name] for name in ("recipe_ids", "versions", "signatures", "base_keys", "base_rows")]
+            empty = dict(zip(data["empty_ids"].tolist(), data["empty_versions"].tolist())) if "empty_ids" in data else {}
+        positions = dict(zip(arrays[0].tolist(), range(len(arrays[0]))))
+        # Writes made before the load are lost here, but the sync that follows
+        # finds them again: their database versions are newer than the file's
+        with self._lock:
+            self._swap(*arrays[:3], positions, *arrays[3:])
+            self.empty = empty
+        return True
+
+    def clear(self):
+        with self._lock:
+            self.__init__()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self.positions),
+                "empty": len(self.empty),
+                "recent_keys": sum(len(bucket) for bucket in self.recent),
+                "age_seconds": None if self.synced_at is None else time.monotonic() - self.synced_at,
+            }
+
+
+ingredient_index = IngredientIndex()
+
+
+def sync_ingredient_index(db: Session, path: Optional[str] = INGREDIENT_INDEX_PATH, index: IngredientIndex = ingredient_index):
+    """Catch the index up with recipes written by other workers and bulk imports.
+
+    Blocking: the API runs it on a thread from a background task, never in a request.
+    """
+    # Starting from a saved index leaves only the recipes written since it was saved to read
+    if path and not index.ready and os.path.exists(path):
+        index.load(path)
+    # Every write bumps Recipe.version, so comparing versions finds what changed
+    versions = dict(db.execute(select(Recipe.id, Recipe.version)).tuples().all())
+    changed, removed = index.changes(versions.items())
+    index.remove(removed)
+    for start in range(0, len(changed), SYNC_CHUNK_SIZE):
+        chunk = changed[start:start + SYNC_CHUNK_SIZE]
+        names: Dict[int, List[str]] = {recipe_id: [] for recipe_id in chunk}
+        stmt = select(RecipeIngredient.recipe_id, RecipeIngredient.name).where(RecipeIngredient.recipe_id.in_(chunk))
+        for recipe_id, name in db.execute(stmt):
+            names[recipe_id].append(name)
+        index.upsert_names([(recipe_id, versions[recipe_id], names[recipe_id]) for recipe_id in chunk])
+    index.compact()
+    index.synced_at = time.monotonic()
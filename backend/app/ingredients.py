@@ -0,0 +1,128 @@
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import List, Optional
+
+# Canonical unit for each accepted spelling
+UNIT_ALIASES = {
+    "g": "g", "gram": "g", "grams": "g", "gr": "g",
+    "kg": "kg", "kilo": "kg", "kilos": "kg", "kilogram": "kg", "kilograms": "kg",
+    "mg": "mg", "milligram": "mg", "milligrams": "mg",
+    "ml": "ml", "millilitre": "ml", "millilitres": "ml", "milliliter": "ml", "milliliters": "ml",
+    "l": "l", "litre": "l", "litres": "l", "liter": "l", "liters": "l",
+    "tsp": "tsp", "teaspoon": "tsp", "teaspoons": "tsp",
+    "tbsp": "tbsp", "tbs": "tbsp", "tablespoon": "tbsp", "tablespoons": "tbsp",
+    "cup": "cup", "cups": "cup",
+    "oz": "oz", "ounce": "oz", "ounces": "oz",
+    "lb": "lb", "lbs": "lb", "pound": "lb", "pounds": "lb",
+    "pinch": "pinch", "pinches": "pinch",
+    "clove": "clove", "cloves": "clove",
+    "can": "can", "cans": "can", "tin": "can", "tins": "can",
+    "slice": "slice", "slices": "slice",
+    "bunch": "bunch", "bunches": "bunch",
+    "handful": "handful", "handfuls": "handful",
+}
+
+# Preparation words that don't change which ingredient is meant
+DESCRIPTORS = {
+    "fresh", "freshly", "chopped", "minced", "diced", "sliced", "grated", "peeled",
+    "finely", "roughly", "large", "small", "medium", "whole", "crushed",
+}
+
+UNICODE_FRACTIONS = {"½": "1/2", "⅓": "1/3", "⅔": "2/3", "¼": "1/4", "¾": "3/4", "⅛": "1/8"}
+
+FRACTION_CHAR_RE = re.compile(r"(\d)?([" + "".join(UNICODE_FRACTIONS) + "])")
+QUANTITY_RE = re.compile(r"^(\d+\s+\d+/\d+|\d+/\d+|\d+(?:\.\d+)?)(?:\s*-\s*\d+(?:\.\d+)?)?\s*")
+SPLIT_RE = re.compile(r"[,;\n]+")
+WORD_RE = re.compile(r"[a-z]+")
+
+
+@dataclass(frozen=True)
+class ParsedIngredient:
+    name: str
+    quantity: Optional[float]
+    unit: Optional[str]
+    raw: str
+
+
+def singular(word: str) -> str:
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 4 and word.endswith("oes"):
+        return word[:-2]
+    if len(word) > 3 and word.endswith("s") and not word.endswith(("ss", "us")):
+        return word[:-1]
+    return word
+
+
+@lru_cache(maxsize=8192)
+def normalize_name(text: str) -> str:
+    """Lowercase, drop preparation words and plurals: 'Fresh Tomatoes' -> 'tomato'."""
+    text = re.sub(r"\([^)]*\)", " ", text.lower())
+    words = [word for word in WORD_RE.findall(text) if word not in DESCRIPTORS]
+    if words and words[0] == "of":
+        words = words[1:]
+    return " ".join(singular(word) for word in words)
+
+
+def _ascii_fraction(match) -> str:
+    fraction = UNICODE_FRACTIONS[match.group(2)]
+    return f"{match.group(1)} {fraction}" if match.group(1) else fraction
+
+
+def _parse_quantity(text: str):
+    if FRACTION_CHAR_RE.search(text):
+        text = FRACTION_CHAR_RE.sub(_ascii_fraction, text)
+    match = QUANTITY_RE.match(text)
+    if not match:
+        return None, text
+    quantity = 0.0
+    for part in match.group(1).split():
+        numerator, _, denominator = part.partition("/")
+        if not denominator:
+            quantity += float(part)
+        elif int(denominator):
+            quantity += int(numerator) / int(denominator)
+        else:
+            return None, text
+    return quantity, text[match.end():]
+
+
+def parse_ingredient(raw: str) -> Optional[ParsedIngredient]:
+    text = raw.strip().lstrip("-*•").strip()
+    if not text:
+        return None
+    quantity, rest = _parse_quantity(text)
+    unit = None
+    first, _, remainder = rest.partition(" ")
+    candidate = first.lower().rstrip(".")
+    if candidate in UNIT_ALIASES and (quantity is not None or remainder):
+        unit = UNIT_ALIASES[candidate]
+        rest = remainder
+    name = normalize_name(rest)
+    if not name:
+        return None
+    return ParsedIngredient(name=name, quantity=quantity, unit=unit, raw=text)
+
+
+def parse_ingredients(text: Optional[str]) -> List[ParsedIngredient]:
+    """Parse a free-text ingredient list separated by commas, semicolons or newlines."""
+    if not text:
+        return []
+    parsed = (parse_ingredient(part) for part in SPLIT_RE.split(text))
+    return [ingredient for ingredient in parsed if ingredient is not None]
+
+
+def ingredient_rows(recipe_id: int, text: Optional[str]) -> List[dict]:
+    """recipe_ingredients rows for a recipe's free-text ingredients."""
+    return [
+        {
+            "recipe_id": recipe_id,
+            "position": position,
+            "name": ingredient.name,
+            "quantity": ingredient.quantity,
+            "unit": ingredient.unit,
+            "raw": ingredient.raw,
+        }
+        for position, ingredient in enumerate(parse_ingredients(text))
+    ]
@@ -0,0 +1,145 @@
+import bisect
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+POPULAR_MAX_LIMIT = 100
+# Twice what the endpoint serves, so drift at the tail between rebuilds (see
+# Leaderboard) stays out of the positions anyone reads
+LEADERBOARD_SIZE = int(os.getenv("LEADERBOARD_SIZE", str(2 * POPULAR_MAX_LIMIT)))
+LEADERBOARD_REBUILD_INTERVAL = float(os.getenv("LEADERBOARD_REBUILD_INTERVAL", "300"))
+
+
+class Ranking:
+    """The top ``size`` recipes of one scope, as (-count, recipe_id) keys kept sorted."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.keys: List[Tuple[int, int]] = []
+        self.counts: Dict[int, int] = {}
+
+    def set(self, recipe_id: int, count: int):
+        old = self.counts.pop(recipe_id, None)
+        if old is not None:
+            del self.keys[bisect.bisect_left(self.keys, (-old, recipe_id))]
+        if count <= 0:
+            return
+        key = (-count, recipe_id)
+        if len(self.keys) >= self.size and key > self.keys[-1]:
+            return
+        bisect.insort(self.keys, key)
+        self.counts[recipe_id] = count
+        if len(self.keys) > self.size:
+            _, dropped = self.keys.pop()
+            del self.counts[dropped]
+
+    def top(self, limit: int) -> List[Tuple[int, int]]:
+        return [(recipe_id, -negated) for negated, recipe_id in self.keys[:limit]]
+
+
+class Leaderboard:
+    """Most favourited recipes overall and per cuisine, moved by every favourite toggle.
+
+    Toggles report the recipe's new absolute count, so applying one is a bisect
+    insert into at most three rankings and reading the top N is a slice. Each
+    worker holds its own copy and sees other workers' toggles only through the
+    periodic rebuild from recipes.favourite_count. Recipes that fall out of a
+    full ranking are not tracked until the next rebuild either, which is why a
+    ranking holds twice as many recipes as are served.
+    """
+
+    def __init__(self, size: int = LEADERBOARD_SIZE, rebuild_interval: float = LEADERBOARD_REBUILD_INTERVAL):
+        self.size = size
+        self.rebuild_interval = rebuild_interval
+        self._lock = threading.Lock()
+        self._rankings: Dict[Optional[str], Ranking] = {}
+        # Cuisine of each recipe held in a cuisine ranking, to move it when that changes
+        self._cuisines: Dict[int, str] = {}
+        self._built_at: Optional[float] = None
+        # Toggles that land while a rebuild is querying; replayed onto its result
+        self._pending: Optional[list] = None
+        self.rebuilds = 0
+        self.updates = 0
+
+    def needs_rebuild(self) -> bool:
+        with self._lock:
+            if self._built_at is None:
+                return True
+            if self._pending is not None:
+                # Another request is rebuilding; serve the current rankings meanwhile
+                return False
+            return time.monotonic() - self._built_at >= self.rebuild_interval
+
+    def start_rebuild(self):
+        with self._lock:
+            self._pending = []
+
+    def finish_rebuild(self, rows: Iterable[Tuple[int, str, int]]):
+        """Replace the rankings with (recipe_id, cuisine_type, count) rows from the database."""
+        rankings: Dict[Optional[str], Ranking] = {None: Ranking(self.size)}
+        cuisines = {}
+        for recipe_id, cuisine_type, count in rows:
+            rankings[None].set(recipe_id, count)
+            rankings.setdefault(cuisine_type, Ranking(self.size)).set(recipe_id, count)
+            cuisines[recipe_id] = cuisine_type
+        with self._lock:
+            self._rankings, self._cuisines = rankings, cuisines
+            # Counts are absolute, so replaying toggles the query already saw is harmless
+            for update in self._pending or ():
+                self._apply(*update)
+            self._pending = None
+            self._built_at = time.monotonic()
+            self.rebuilds += 1
+
+    def abort_rebuild(self):
+        with self._lock:
+            self._pending = None
+
+    def update(self, recipe_id: int, cuisine_type: Optional[str], count: int):
+        """Record a recipe's new favourite count (0 removes it)."""
+        with self._lock:
+            self.updates += 1
+            if self._pending is not None:
+                self._pending.append((recipe_id, cuisine_type, count))
+            if self._built_at is not None:
+                self._apply(recipe_id, cuisine_type, count)
+
+    def discard(self, recipe_id: int):
+        self.update(recipe_id, None, 0)
+
+    def _apply(self, recipe_id: int, cuisine_type: Optional[str], count: int):
+        self._rankings[None].set(recipe_id, count)
+        previous = self._cuisines.pop(recipe_id, None)
+        if previous is not None and previous != cuisine_type:
+            self._rankings[previous].set(recipe_id, 0)
+        if cuisine_type is None:
+            return
+        ranking = self._rankings.setdefault(cuisine_type, Ranking(self.size))
+        ranking.set(recipe_id, count)
+        if recipe_id in ranking.counts:
+            self._cuisines[recipe_id] = cuisine_type
+
+    def top(self, limit: int, cuisine_type: Optional[str] = None) -> List[Tuple[int, int]]:
+        """(recipe_id, count) pairs, most favourited first, ties by id."""
+        with self._lock:
+            ranking = self._rankings.get(cuisine_type)
+            return ranking.top(limit) if ranking else []
+
+    def clear(self):
+        with self._lock:
+            self._rankings, self._cuisines, self._built_at, self._pending = {}, {}, None, None
+
+    def stats(self) -> dict:
+        with self._lock:
+            overall = self._rankings.get(None)
+            return {
+                "size": len(overall.keys) if overall else 0,
+                "scopes": len(self._rankings),
+                "rebuilds": self.rebuilds,
+                "updates": self.updates,
+                "age_seconds": None if self._built_at is None else time.monotonic() - self._built_at,
+            }
+
+
+leaderboard = Leaderboard()
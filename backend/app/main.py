@@ -1,18 +1,67 @@
-from fastapi import FastAPI, Depends
+import asyncio
+import contextlib
+import logging
+from contextlib import asynccontextmanager
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware  # Import CORSMiddleware
-from .database import SessionLocal, engine, IS_TESTING
-from . import models
-from .api import recipes, auth, favourites
-from dotenv import load_dotenv
-import os
+from sqlalchemy import text
+from .database import SessionLocal, async_engine
+from .hashing import password_pool
+from .ingredient_index import INGREDIENT_INDEX_SYNC_INTERVAL, sync_ingredient_index
+from .metrics import MetricsMiddleware, request_metrics
+from .pagination import NEXT_CURSOR_HEADER
+from .api import (
+    recipes, auth, favourites, diagnostics, ingredients, meal_plans, metrics, recommendations, shopping_list
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _sync_ingredient_index():
+    db = SessionLocal()
+    try:
+        sync_ingredient_index(db)
+    finally:
+        db.close()
 
-load_dotenv()
-DATABASE_URL = os.getenv("DATABASE_URL")
 
-if not IS_TESTING:
-    models.Base.metadata.create_all(bind=engine)
+async def sync_ingredient_index_periodically():
+    # The first run loads the saved index, if any; later runs pick up other workers' writes.
+    # On a thread, so neither the queries nor the NumPy work hold up the event loop.
+    loop = asyncio.get_running_loop()
+    while True:
+        sync = loop.run_in_executor(None, _sync_ingredient_index)
+        try:
+            await asyncio.shield(sync)
+        except asyncio.CancelledError:
+            # A thread can't be interrupted: let a sync in flight finish, so it
+            # doesn't outlive shutdown and write to the index afterwards
+            with contextlib.suppress(Exception):
+                await sync
+            raise
+        except Exception:
+            logger.exception("Ingredient index sync failed")
+        await asyncio.sleep(INGREDIENT_INDEX_SYNC_INTERVAL)
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # The schema is managed by Alembic (`alembic upgrade head`), so startup
+    # does no reflection or DDL. Opening one pooled connection here moves the
+    # connect cost off the first request and fails fast on a bad DATABASE_URL.
+    async with async_engine.connect() as connection:
+        await connection.execute(text("SELECT 1"))
+    # In the background so startup does not wait for a cold index build
+    ingredient_sync = asyncio.create_task(sync_ingredient_index_periodically())
+    yield
+    ingredient_sync.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await ingredient_sync
+    password_pool.shutdown()
+    await async_engine.dispose()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -21,19 +70,20 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # Allow all methods (GET, POST, etc.)
     allow_headers=["*"],  # Allow all headers
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag"],  # Let the frontend read pagination cursors and ETags
 )
+# Added last so it wraps every other middleware and times the whole request
+app.add_middleware(MetricsMiddleware, metrics=request_metrics)
 
 app.include_router(recipes.router, prefix="/api")
 app.include_router(favourites.router, prefix="/api")
 app.include_router(auth.router, prefix="/api")
-
-# Dependency to get the database session
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+app.include_router(ingredients.router, prefix="/api")
+app.include_router(shopping_list.router, prefix="/api")
+app.include_router(meal_plans.router, prefix="/api")
+app.include_router(recommendations.router, prefix="/api")
+app.include_router(diagnostics.router, prefix="/api")
+app.include_router(metrics.router)
 
 @app.get("/")
 def read_root():
@@ -0,0 +1,59 @@
+# Offline jobs that repair or rebuild derived data. They run outside the
+# request path (see manage.py) against a regular synchronous session.
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from .ingredients import ingredient_rows
+from .models import Recipe, RecipeIngredient, favourites
+
+
+def reconcile_favourite_counts(db: Session) -> int:
+    """Rebuild Recipe.favourite_count from the favourites table.
+
+    Only rows whose counter has drifted are written. Returns the number of
+    recipes that were corrected.
+    """
+    actual = (
+        select(func.count())
+        .select_from(favourites)
+        .where(favourites.c.recipe_id == Recipe.id)
+        .scalar_subquery()
+    )
+    result = db.execute(
+        update(Recipe)
+        .where(Recipe.favourite_count != actual)
+        .values(favourite_count=actual)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount
+
+
+def backfill_recipe_ingredients(db: Session, batch_size: int = 1000, rebuild: bool = False) -> int:
+    """Parse Recipe.ingredients into recipe_ingredients for existing rows.
+
+    By default only recipes without parsed rows are processed; ``rebuild``
+    reparses everything. Work is committed per batch of recipes, walking
+    the table by id. Returns the number of recipes parsed.
+    """
+    if rebuild:
+        db.execute(delete(RecipeIngredient))
+        db.commit()
+    parsed = select(RecipeIngredient.recipe_id).where(RecipeIngredient.recipe_id == Recipe.id).exists()
+    last_id = 0
+    total = 0
+    while True:
+        batch = db.execute(
+            select(Recipe.id, Recipe.ingredients)
+            .where(Recipe.id > last_id, ~parsed)
+            .order_by(Recipe.id)
+            .limit(batch_size)
+        ).all()
+        if not batch:
+            return total
+        rows = [row for recipe_id, text in batch for row in ingredient_rows(recipe_id, text)]
+        if rows:
+            db.execute(insert(RecipeIngredient.__table__), rows)
+        db.commit()
+        total += len(batch)
+        last_id = batch[-1].id
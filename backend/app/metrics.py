@@ -0,0 +1,368 @@
+import bisect
+import threading
+import time
+from contextvars import ContextVar
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import QueuePool
+
+# Latency buckets in seconds, shared by every histogram in the app
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Response body sizes in bytes
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+# Requests that matched no route share one label so clients can't grow the series set
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class Histogram:
+    """Fixed-bucket histogram; observe() is a bisect plus two additions."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """(upper bound, cumulative count) pairs, ending with +Inf."""
+        total = 0
+        result = []
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "buckets": {("+Inf" if bound == float("inf") else str(bound)): count for bound, count in self.cumulative()},
+        }
+
+
+class PoolMetrics:
+    """Connection pool health for one engine.
+
+    Checkouts, checkins, connects and invalidations are collected with
+    SQLAlchemy pool events. The time spent waiting for a connection and
+    checkout timeouts are recorded by the pool class returned from
+    ``pool_class()``, since no pool event fires before a checkout starts.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.engine = None
+        self._lock = threading.Lock()
+        self.checkout_wait = Histogram()
+        self.hold_time = Histogram()
+        self.checkouts = 0
+        self.checkins = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.max_overflow_seen = 0
+
+    def pool_class(self, base=QueuePool):
+        metrics = self
+
+        class TimedPool(base):
+            def _do_get(self):
+                started = time.perf_counter()
+                try:
+                    connection = super()._do_get()
+                except exc.TimeoutError:
+                    with metrics._lock:
+                        metrics.timeouts += 1
+                    raise
+                with metrics._lock:
+                    metrics.checkout_wait.observe(time.perf_counter() - started)
+                return connection
+
+        TimedPool.__name__ = f"Timed{base.__name__}"
+        return TimedPool
+
+    def attach(self, engine):
+        """Register pool event listeners on a (sync) engine."""
+        self.engine = engine
+        event.listen(engine, "checkout", self._on_checkout)
+        event.listen(engine, "checkin", self._on_checkin)
+        event.listen(engine, "connect", self._on_connect)
+        event.listen(engine, "invalidate", self._on_invalidate)
+        return self
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        connection_record.info["checked_out_at"] = time.perf_counter()
+        pool = self.engine.pool
+        overflow = pool.overflow() if isinstance(pool, QueuePool) else 0
+        with self._lock:
+            self.checkouts += 1
+            self.max_overflow_seen = max(self.max_overflow_seen, overflow)
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        checked_out_at = connection_record.info.pop("checked_out_at", None)
+        with self._lock:
+            self.checkins += 1
+            if checked_out_at is not None:
+                self.hold_time.observe(time.perf_counter() - checked_out_at)
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.connects += 1
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        with self._lock:
+            self.invalidations += 1
+
+    def stats(self):
+        pool = self.engine.pool
+        with self._lock:
+            stats = {
+                "pool_class": type(pool).__name__,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+                "timeouts": self.timeouts,
+                "max_overflow_seen": self.max_overflow_seen,
+                "checkout_wait_seconds": self.checkout_wait.snapshot(),
+                "connection_hold_seconds": self.hold_time.snapshot(),
+            }
+        if isinstance(pool, QueuePool):
+            stats.update(
+                size=pool.size(),
+                checked_out=pool.checkedout(),
+                checked_in=pool.checkedin(),
+                overflow=max(pool.overflow(), 0),
+                max_overflow=pool._max_overflow,
+                timeout_seconds=pool.timeout(),
+            )
+        return stats
+
+
+class RequestTiming:
+    """Database time and statement count accumulated by the current request."""
+
+    __slots__ = ("db_seconds", "queries")
+
+    def __init__(self):
+        self.db_seconds = 0.0
+        self.queries = 0
+
+
+_request_timing: ContextVar = ContextVar("request_timing", default=None)
+
+
+class RouteMetrics:
+    __slots__ = ("latency", "response_size", "db_time", "queries")
+
+    def __init__(self):
+        self.latency = Histogram()
+        self.response_size = Histogram(SIZE_BUCKETS)
+        self.db_time = Histogram()
+        self.queries = 0
+
+
+class RequestMetrics:
+    """Per-route request metrics, collected by MetricsMiddleware.
+
+    Series are keyed by the route template (``/api/recipes/{recipe_id}``),
+    not the raw path, so their number stays bounded.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.routes = {}  # (method, route) -> RouteMetrics
+        self.statuses = {}  # (method, route, status) -> count
+        self.in_flight = 0
+
+    def attach(self, engine):
+        """Time the statements a (sync) engine runs on behalf of the current request."""
+        event.listen(engine, "before_cursor_execute", self._before_execute)
+        event.listen(engine, "after_cursor_execute", self._after_execute)
+        return self
+
+    @staticmethod
+    def _before_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info["query_started_at"] = time.perf_counter()
+
+    @staticmethod
+    def _after_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.pop("query_started_at", None)
+        timing = _request_timing.get()
+        if timing is not None and started is not None:
+            timing.db_seconds += time.perf_counter() - started
+            timing.queries += 1
+
+    def observe(self, method: str, route: str, status: int, seconds: float, size: int, timing: RequestTiming):
+        key = (method, route)
+        with self._lock:
+            metrics = self.routes.get(key)
+            if metrics is None:
+                metrics = self.routes[key] = RouteMetrics()
+            metrics.latency.observe(seconds)
+            metrics.response_size.observe(size)
+            metrics.db_time.observe(timing.db_seconds)
+            metrics.queries += timing.queries
+            status_key = (method, route, status)
+            self.statuses[status_key] = self.statuses.get(status_key, 0) + 1
+
+    def write(self, out: "PrometheusWriter"):
+        with self._lock:
+            out.gauge("http_requests_in_flight", "Requests currently being served", [({}, self.in_flight)])
+            out.counter(
+                "http_requests_total", "Requests by route and status code",
+                [({"method": m, "route": r, "status": str(s)}, n) for (m, r, s), n in sorted(self.statuses.items())],
+            )
+            routes = sorted(self.routes.items())
+            out.histogram(
+                "http_request_duration_seconds", "Time from request start to the last response byte",
+                [({"method": m, "route": r}, metrics.latency) for (m, r), metrics in routes],
+            )
+            out.histogram(
+                "http_response_size_bytes", "Response body size",
+                [({"method": m, "route": r}, metrics.response_size) for (m, r), metrics in routes],
+            )
+            out.histogram(
+                "http_request_db_seconds", "Time spent executing SQL per request",
+                [({"method": m, "route": r}, metrics.db_time) for (m, r), metrics in routes],
+            )
+            out.counter(
+                "http_request_db_queries_total", "SQL statements executed while serving requests",
+                [({"method": m, "route": r}, metrics.queries) for (m, r), metrics in routes],
+            )
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware feeding RequestMetrics.
+
+    It wraps ``send`` to see the status code and count body bytes, so it
+    adds no task or buffering to the request path and works for streamed
+    responses too.
+    """
+
+    def __init__(self, app, metrics: RequestMetrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        timing = RequestTiming()
+        token = _request_timing.set(timing)
+        metrics = self.metrics
+        with metrics._lock:
+            metrics.in_flight += 1
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            _request_timing.reset(token)
+            with metrics._lock:
+                metrics.in_flight -= 1
+            route = scope.get("route")
+            route = getattr(route, "path_format", None) or UNMATCHED_ROUTE
+            metrics.observe(scope["method"], route, status, elapsed, size, timing)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _number(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(round(value, 6)) if isinstance(value, float) else str(value)
+
+
+class PrometheusWriter:
+    """Builds the Prometheus text exposition format (version 0.0.4)."""
+
+    def __init__(self, namespace: str):
+        self.namespace = namespace
+        self.lines = []
+
+    def _header(self, name: str, help: str, kind: str) -> str:
+        name = f"{self.namespace}_{name}"
+        self.lines.append(f"# HELP {name} {help}")
+        self.lines.append(f"# TYPE {name} {kind}")
+        return name
+
+    def _samples(self, name, help, kind, samples):
+        name = self._header(name, help, kind)
+        for labels, value in samples:
+            self.lines.append(f"{name}{_labels(labels)} {_number(value)}")
+
+    def counter(self, name: str, help: str, samples):
+        self._samples(name, help, "counter", samples)
+
+    def gauge(self, name: str, help: str, samples):
+        self._samples(name, help, "gauge", samples)
+
+    def histogram(self, name: str, help: str, samples):
+        name = self._header(name, help, "histogram")
+        for labels, histogram in samples:
+            for bound, count in histogram.cumulative():
+                self.lines.append(f"{name}_bucket{_labels({**labels, 'le': _number(bound)})} {count}")
+            self.lines.append(f"{name}_sum{_labels(labels)} {_number(float(histogram.sum))}")
+            self.lines.append(f"{name}_count{_labels(labels)} {histogram.count}")
+
+    def render(self) -> str:
+        return "\n".join(self.lines) + "\n"
+
+
+def write_pool_metrics(out: PrometheusWriter, pools):
+    """Connection pool series for several PoolMetrics, labelled by pool name."""
+    stats = [(pool, pool.stats()) for pool in pools]
+    for name, help in (
+        ("size", "Configured number of persistent connections"),
+        ("checked_out", "Connections currently checked out"),
+        ("overflow", "Overflow connections currently open"),
+    ):
+        out.gauge(f"db_pool_{name}", help, [({"pool": pool.name}, s[name]) for pool, s in stats if name in s])
+    for name, help in (
+        ("checkouts", "Connection checkouts"),
+        ("connects", "New DBAPI connections opened"),
+        ("invalidations", "Connections invalidated after errors"),
+        ("timeouts", "Checkouts that timed out waiting for a connection"),
+    ):
+        out.counter(f"db_pool_{name}_total", help, [({"pool": pool.name}, s[name]) for pool, s in stats])
+    for name, attribute, help in (
+        ("checkout_wait_seconds", "checkout_wait", "Time spent waiting to check out a connection"),
+        ("connection_hold_seconds", "hold_time", "Time a connection stayed checked out"),
+    ):
+        samples = []
+        for pool, _ in stats:
+            with pool._lock:
+                histogram = getattr(pool, attribute)
+                copy = Histogram(histogram.buckets)
+                copy.counts, copy.sum, copy.count = list(histogram.counts), histogram.sum, histogram.count
+            samples.append(({"pool": pool.name}, copy))
+        out.histogram(f"db_pool_{name}", help, samples)
+
+
+request_metrics = RequestMetrics()
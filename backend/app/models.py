@@ -1,9 +1,7 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, Table, UniqueConstraint
+from sqlalchemy import Column, Boolean, Integer, Float, Date, String, Text, ForeignKey, Table, UniqueConstraint, Index, DDL, event, text
 from sqlalchemy.orm import relationship
 from .database import Base
-from passlib.context import CryptContext
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from .passwords import hash_password, verify_password
 
 # Association table for many-to-many relationship between User and Recipe
 favourites = Table(
@@ -24,20 +22,126 @@ class User(Base):
     favourites = relationship("Recipe", secondary=favourites, back_populates="users_who_favourited")
 
     def verify_password(self, password: str):
-        return pwd_context.verify(password, self.hashed_password)
+        return verify_password(password, self.hashed_password)
     
     @staticmethod
     def get_password_hash(password: str):
-        return pwd_context.hash(password)
+        return hash_password(password)
 
 class Recipe(Base):
     __tablename__ = "recipes"
+    # Composite indexes backing keyset pagination: each sort key is paired
+    # with id so the seek predicate and ORDER BY are answered from the index.
+    __table_args__ = (
+        Index("ix_recipes_cooking_time_id", "cooking_time", "id"),
+        Index("ix_recipes_title_id", "title", "id"),
+        Index("ix_recipes_user_id_id", "user_id", "id"),
+        # Filters on GET /recipes/: cuisine alone (seeking on id), and cuisine
+        # with a cooking time range or cooking time sort
+        Index("ix_recipes_cuisine_type_id", "cuisine_type", "id"),
+        Index("ix_recipes_cuisine_type_cooking_time_id", "cuisine_type", "cooking_time", "id"),
+        # Only the few recipes waiting for a similarity refresh are indexed
+        Index(
+            "ix_recipes_similarities_stale", "id",
+            postgresql_where=text("similarities_stale"), sqlite_where=text("similarities_stale"),
+        ),
+    )
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, index=True)
     cuisine_type = Column(String)
     cooking_time = Column(Integer)
     ingredients = Column(Text)
     instructions = Column(Text)
+    # Denormalized number of rows in favourites for this recipe, maintained by
+    # crud.toggle_favorite and rebuilt by maintenance.reconcile_favourite_counts
+    favourite_count = Column(Integer, nullable=False, default=0, server_default="0")
+    # Set by crud.toggle_favorite; recommendations.refresh_similarities recomputes
+    # the neighbours of flagged recipes and clears it
+    similarities_stale = Column(Boolean, nullable=False, default=False, server_default=text("false"))
+    # Bumped by the ORM on every update; drives the ETags of recipe reads
+    version = Column(Integer, nullable=False, server_default="1")
     user_id = Column(Integer, ForeignKey("users.id"))
     user = relationship("User", back_populates="recipes")
-    users_who_favourited = relationship("User", secondary=favourites, back_populates="favourites")
\ No newline at end of file
+    users_who_favourited = relationship("User", secondary=favourites, back_populates="favourites")
+
+    __mapper_args__ = {"version_id_col": version}
+
+# One parsed line of Recipe.ingredients, kept in sync by crud
+class RecipeIngredient(Base):
+    __tablename__ = "recipe_ingredients"
+    # (name, recipe_id) turns "recipes using X" into an index probe
+    __table_args__ = (
+        Index("ix_recipe_ingredients_name_recipe_id", "name", "recipe_id"),
+    )
+    id = Column(Integer, primary_key=True)
+    recipe_id = Column(Integer, ForeignKey("recipes.id", ondelete="CASCADE"), nullable=False, index=True)
+    position = Column(Integer, nullable=False)
+    name = Column(String, nullable=False)
+    quantity = Column(Float)
+    unit = Column(String)
+    raw = Column(String, nullable=False)
+
+# One recipe planned for a meal slot on a given day
+class MealPlan(Base):
+    __tablename__ = "meal_plans"
+    # The unique (user_id, date, slot) index is the upsert conflict target and
+    # also answers a user's date-range query in index order
+    __table_args__ = (
+        UniqueConstraint("user_id", "date", "slot", name="uq_meal_plans_user_date_slot"),
+    )
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    date = Column(Date, nullable=False)
+    slot = Column(String(20), nullable=False)
+    recipe_id = Column(Integer, ForeignKey("recipes.id", ondelete="CASCADE"), nullable=False, index=True)
+    recipe = relationship("Recipe")
+
+# A recipe's nearest neighbours in the favourites graph, written by app.recommendations
+class RecipeSimilarity(Base):
+    __tablename__ = "recipe_similarities"
+    recipe_id = Column(Integer, ForeignKey("recipes.id", ondelete="CASCADE"), primary_key=True)
+    # Indexed for the reverse lookup: which lists mention a recipe
+    similar_recipe_id = Column(Integer, ForeignKey("recipes.id", ondelete="CASCADE"), primary_key=True, index=True)
+    score = Column(Float, nullable=False)
+
+# Full-text search index over recipe titles and ingredients.
+# Postgres uses a GIN expression index, which the database keeps current on
+# every write. SQLite (the test path) uses an external-content FTS5 table
+# that triggers keep in sync with inserts, updates and deletes on recipes.
+SEARCH_DOCUMENT_SQL = (
+    "to_tsvector('english', coalesce(recipes.title, '') || ' ' || coalesce(recipes.ingredients, ''))"
+)
+
+event.listen(
+    Recipe.__table__,
+    "after_create",
+    DDL(f"CREATE INDEX IF NOT EXISTS ix_recipes_search ON recipes USING GIN (({SEARCH_DOCUMENT_SQL}))")
+    .execute_if(dialect="postgresql"),
+)
+
+SQLITE_FTS_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS recipes_fts USING fts5(
+        title, ingredients, content='recipes', content_rowid='id', tokenize='porter unicode61'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS recipes_fts_ai AFTER INSERT ON recipes BEGIN
+        INSERT INTO recipes_fts(rowid, title, ingredients) VALUES (new.id, new.title, new.ingredients);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS recipes_fts_ad AFTER DELETE ON recipes BEGIN
+        INSERT INTO recipes_fts(recipes_fts, rowid, title, ingredients)
+        VALUES ('delete', old.id, old.title, old.ingredients);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS recipes_fts_au AFTER UPDATE OF title, ingredients ON recipes BEGIN
+        INSERT INTO recipes_fts(recipes_fts, rowid, title, ingredients)
+        VALUES ('delete', old.id, old.title, old.ingredients);
+        INSERT INTO recipes_fts(rowid, title, ingredients) VALUES (new.id, new.title, new.ingredients);
+    END""",
+]
+
+for statement in SQLITE_FTS_DDL:
+    event.listen(Recipe.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+
+event.listen(
+    Recipe.__table__,
+    "before_drop",
+    DDL("DROP TABLE IF EXISTS recipes_fts").execute_if(dialect="sqlite"),
+)
@@ -0,0 +1,95 @@
+import base64
+import json
+from typing import Any, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import and_, or_
+
+from . import models
+
+# Sort keys a client may page on. Every ordering ends with Recipe.id so
+# rows sharing a sort value still come back in a stable order.
+SORT_COLUMNS = {
+    "id": None,
+    "cooking_time": models.Recipe.cooking_time,
+    "title": models.Recipe.title,
+}
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# Bounds of the 64-bit integer columns a cursor value is bound against
+MIN_BIGINT, MAX_BIGINT = -2**63, 2**63 - 1
+
+
+def _valid_value(value: Any, python_type: type) -> bool:
+    # bool is an int subclass, but true/false is never a valid sort value
+    if python_type is int:
+        return type(value) is int and MIN_BIGINT <= value <= MAX_BIGINT
+    return isinstance(value, python_type)
+
+
+def encode_cursor(sort: str, value: Any, last_id: int) -> str:
+    """Build an opaque cursor pointing just past the given row."""
+    payload = json.dumps([sort, value, last_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str) -> Tuple[Any, int]:
+    """Return the (sort value, id) pair stored in a cursor."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort, value, last_id = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    if cursor_sort != sort:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor does not match sort order")
+    # Anything else reaching the query would fail at bind time as a 500
+    sort_column = SORT_COLUMNS[sort]
+    if sort_column is None:
+        valid_value = value is None
+    else:
+        # Nullable columns page past NULLs with a null value
+        valid_value = value is None or _valid_value(value, sort_column.type.python_type)
+    if not valid_value or not _valid_value(last_id, int):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    return value, last_id
+
+
+def validate_sort(sort: str) -> str:
+    if sort not in SORT_COLUMNS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported sort key '{sort}'. Use one of: {', '.join(SORT_COLUMNS)}",
+        )
+    return sort
+
+
+def apply_keyset(query, sort: str = "id", cursor: Optional[str] = None, id_column=models.Recipe.id):
+    """Order a recipe query by (sort key, id) and seek past the cursor.
+
+    The seek predicate lets the database jump straight to the start of the
+    page through the matching index instead of scanning and discarding
+    earlier rows, so page N costs the same as page one.
+    """
+    sort_column = SORT_COLUMNS[validate_sort(sort)]
+    if cursor is not None:
+        value, last_id = decode_cursor(cursor, sort)
+        if sort_column is None:
+            query = query.where(id_column > last_id)
+        else:
+            query = query.where(
+                or_(sort_column > value, and_(sort_column == value, id_column > last_id))
+            )
+    if sort_column is None:
+        return query.order_by(id_column)
+    return query.order_by(sort_column, id_column)
+
+
+def next_cursor(rows, sort: str, limit: int) -> Optional[str]:
+    """Cursor for the page after ``rows``, or None when this was the last page."""
+    if limit <= 0 or len(rows) < limit:
+        return None
+    last = rows[-1]
+    sort_column = SORT_COLUMNS[sort]
+    value = None if sort_column is None else getattr(last, sort_column.key)
+    return encode_cursor(sort, value, last.id)
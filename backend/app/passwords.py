@@ -0,0 +1,18 @@
+from functools import lru_cache
+
+
+@lru_cache(maxsize=None)
+def password_context():
+    # Built once, on first use: importing passlib and loading the bcrypt
+    # backend is skipped entirely by processes that never touch a password
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+def hash_password(password: str) -> str:
+    return password_context().hash(password)
+
+
+def verify_password(password: str, hashed_password: str) -> bool:
+    return password_context().verify(password, hashed_password)
@@ -0,0 +1,202 @@
+"""Item-item recommendations from the favourites graph.
+
+Two recipes are similar when the same users favourited them: the cosine of
+their columns in the binary user x recipe matrix, |A ∩ B| / sqrt(|A| |B|).
+Each recipe keeps its SIMILAR_RECIPES_K best neighbours in
+recipe_similarities, which the API reads. Everything here runs offline from
+manage.py, never in a request, so the API does not import SciPy.
+"""
+import os
+from itertools import chain
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+
+from .models import Recipe, RecipeSimilarity, favourites
+
+SIMILAR_RECIPES_K = int(os.getenv("SIMILAR_RECIPES_K", "20"))
+# Recipes whose co-occurrence rows are multiplied out at once. A row of a popular
+# recipe can touch most of the catalogue, so this bounds peak memory.
+SIMILARITY_BATCH_SIZE = 256
+WRITE_BATCH_SIZE = 10_000
+
+recipes = Recipe.__table__
+
+
+class FavouritesMatrix:
+    """Binary user x recipe matrix over (user_id, recipe_id) pairs.
+
+    ``favourite_counts`` gives the column norms when the pairs are only the
+    part of the graph around some recipes; by default they are counted from
+    the pairs themselves.
+    """
+
+    def __init__(self, pairs: np.ndarray, favourite_counts: Optional[Dict[int, int]] = None):
+        users, user_index = np.unique(pairs[:, 0], return_inverse=True)
+        self.recipe_ids, recipe_index = np.unique(pairs[:, 1], return_inverse=True)
+        shape = (len(users), len(self.recipe_ids))
+        ones = np.ones(len(pairs), dtype=np.float32)
+        self.by_user = sparse.csr_matrix((ones, (user_index, recipe_index)), shape=shape)
+        self.by_recipe = self.by_user.T.tocsr()
+        if favourite_counts is None:
+            counts = np.diff(self.by_recipe.indptr)
+        else:
+            counts = np.array([favourite_counts[recipe_id] for recipe_id in self.recipe_ids.tolist()])
+        self.norms = np.sqrt(np.maximum(counts, 1)).astype(np.float64)
+
+    def similarities(
+        self, columns: np.ndarray, batch_size: int = SIMILARITY_BATCH_SIZE
+    ) -> Iterator[Tuple[int, np.ndarray, np.ndarray]]:
+        """(recipe_id, neighbour_ids, scores) for each column, best first, ties by id."""
+        for start in range(0, len(columns), batch_size):
+            batch = columns[start:start + batch_size]
+            cooccurrence = (self.by_recipe[batch] @ self.by_user).tocsr()
+            for row, column in enumerate(batch):
+                lo, hi = cooccurrence.indptr[row], cooccurrence.indptr[row + 1]
+                neighbours = cooccurrence.indices[lo:hi]
+                keep = neighbours != column
+                neighbours = neighbours[keep]
+                scores = cooccurrence.data[lo:hi][keep] / (self.norms[column] * self.norms[neighbours])
+                neighbour_ids = self.recipe_ids[neighbours]
+                order = np.lexsort((neighbour_ids, -scores))
+                yield int(self.recipe_ids[column]), neighbour_ids[order], scores[order]
+
+
+def _pairs(db: Session, stmt) -> np.ndarray:
+    # fromiter over the flattened rows; np.array() on Row objects probes them by key
+    values = chain.from_iterable(db.execute(stmt).tuples())
+    return np.fromiter(values, dtype=np.int64).reshape(-1, 2)
+
+
+def _favourites_of(users=None):
+    # Favourites of recipes that still exist, optionally for a subset of users
+    stmt = select(favourites.c.user_id, favourites.c.recipe_id).join(recipes, recipes.c.id == favourites.c.recipe_id)
+    if users is not None:
+        stmt = stmt.where(favourites.c.user_id.in_(users))
+    return stmt
+
+
+def _write_lists(db: Session, lists: Dict[int, List[Tuple[int, float]]]):
+    recipe_ids = list(lists)
+    for start in range(0, len(recipe_ids), WRITE_BATCH_SIZE):
+        chunk = recipe_ids[start:start + WRITE_BATCH_SIZE]
+        db.execute(delete(RecipeSimilarity).where(RecipeSimilarity.recipe_id.in_(chunk)))
+    rows = [
+        {"recipe_id": recipe_id, "similar_recipe_id": neighbour, "score": score}
+        for recipe_id, neighbours in lists.items()
+        for neighbour, score in neighbours
+    ]
+    for start in range(0, len(rows), WRITE_BATCH_SIZE):
+        db.execute(insert(RecipeSimilarity.__table__), rows[start:start + WRITE_BATCH_SIZE])
+
+
+def _claim_stale(db: Session) -> List[int]:
+    # Cleared before the favourites are read: a toggle that lands during the
+    # computation flags its recipe again and is picked up by the next refresh
+    stmt = (
+        recipes.update()
+        .where(recipes.c.similarities_stale.is_(True))
+        .values(similarities_stale=False)
+        .returning(recipes.c.id)
+    )
+    stale = [recipe_id for recipe_id, in db.execute(stmt)]
+    db.commit()
+    return stale
+
+
+def rebuild_similarities(db: Session, k: int = SIMILAR_RECIPES_K, batch_size: int = SIMILARITY_BATCH_SIZE) -> int:
+    """Recompute every recipe's neighbours from the whole favourites graph. Returns rows written."""
+    _claim_stale(db)
+    pairs = _pairs(db, _favourites_of())
+    db.execute(delete(RecipeSimilarity))
+    lists = {}
+    if len(pairs):
+        matrix = FavouritesMatrix(pairs)
+        for recipe_id, neighbour_ids, scores in matrix.similarities(np.arange(len(matrix.recipe_ids)), batch_size):
+            if len(neighbour_ids):
+                lists[recipe_id] = list(zip(neighbour_ids[:k].tolist(), scores[:k].tolist()))
+    _write_lists(db, lists)
+    db.commit()
+    return sum(len(neighbours) for neighbours in lists.values())
+
+
+def _current_lists(db: Session, recipe_ids: List[int]) -> Dict[int, Dict[int, float]]:
+    lists = {recipe_id: {} for recipe_id in recipe_ids}
+    for start in range(0, len(recipe_ids), WRITE_BATCH_SIZE):
+        chunk = recipe_ids[start:start + WRITE_BATCH_SIZE]
+        for recipe_id, neighbour, score in db.execute(
+            select(RecipeSimilarity.recipe_id, RecipeSimilarity.similar_recipe_id, RecipeSimilarity.score)
+            .where(RecipeSimilarity.recipe_id.in_(chunk))
+        ):
+            lists[recipe_id][neighbour] = score
+    return lists
+
+
+def _refresh(db: Session, stale: List[int], k: int, batch_size: int):
+    # Which lists mention each stale recipe; they get its new score, or lose it
+    listed_by: Dict[int, List[int]] = {}
+    for recipe_id, neighbour in db.execute(
+        select(RecipeSimilarity.recipe_id, RecipeSimilarity.similar_recipe_id)
+        .where(RecipeSimilarity.similar_recipe_id.in_(stale))
+    ):
+        listed_by.setdefault(neighbour, []).append(recipe_id)
+    patches: Dict[int, Dict[int, float]] = {}
+    for recipe_id, listing in listed_by.items():
+        for neighbour in listing:
+            patches.setdefault(neighbour, {})[recipe_id] = 0.0
+
+    # Every favourite of the users who liked a stale recipe: all the
+    # co-occurrences those recipes have. Norms come from favourite_count.
+    likers = select(favourites.c.user_id).where(favourites.c.recipe_id.in_(stale)).distinct()
+    pairs = _pairs(db, _favourites_of(likers))
+    lists: Dict[int, List[Tuple[int, float]]] = {recipe_id: [] for recipe_id in stale}
+    if len(pairs):
+        counts = dict(db.execute(
+            select(recipes.c.id, recipes.c.favourite_count)
+            .where(recipes.c.id.in_(select(favourites.c.recipe_id).where(favourites.c.user_id.in_(likers))))
+        ).all())
+        matrix = FavouritesMatrix(pairs, counts)
+        columns = np.flatnonzero(np.isin(matrix.recipe_ids, stale))
+        for recipe_id, neighbour_ids, scores in matrix.similarities(columns, batch_size):
+            lists[recipe_id] = list(zip(neighbour_ids[:k].tolist(), scores[:k].tolist()))
+            for neighbour, score in lists[recipe_id]:
+                patches.setdefault(neighbour, {})[recipe_id] = score
+            found = np.isin(neighbour_ids, listed_by.get(recipe_id, []))
+            for neighbour, score in zip(neighbour_ids[found].tolist(), scores[found].tolist()):
+                patches[neighbour][recipe_id] = score
+
+    # Stale recipes have exact lists already
+    for recipe_id in lists:
+        patches.pop(recipe_id, None)
+    current = _current_lists(db, list(patches))
+    for recipe_id, changes in patches.items():
+        neighbours = current[recipe_id]
+        for neighbour, score in changes.items():
+            if score > 0:
+                neighbours[neighbour] = score
+            else:
+                neighbours.pop(neighbour, None)
+        lists[recipe_id] = sorted(neighbours.items(), key=lambda item: (-item[1], item[0]))[:k]
+    _write_lists(db, lists)
+
+
+def refresh_similarities(
+    db: Session, k: int = SIMILAR_RECIPES_K, batch_size: int = SIMILARITY_BATCH_SIZE, chunk_size: int = 1000
+) -> int:
+    """Recompute the neighbours of recipes flagged by favourite toggles. Returns recipes refreshed.
+
+    A toggle on recipe R changes R's norm and its co-occurrences, so it changes
+    R's whole list and R's score in other lists, but no other pair. R's list is
+    recomputed from the favourites of the users who liked R. R's entry is then
+    patched into the lists of its new neighbours and of recipes that already
+    listed it. A recipe that R now beats but which is not among R's own top k
+    is missed until the next rebuild_similarities.
+    """
+    stale = _claim_stale(db)
+    for start in range(0, len(stale), chunk_size):
+        _refresh(db, stale[start:start + chunk_size], k, batch_size)
+        db.commit()
+    return len(stale)
@@ -0,0 +1,23 @@
+import logging
+from typing import Optional, Sequence
+
+from fastapi import HTTPException, status
+from fastapi.responses import ORJSONResponse
+
+logger = logging.getLogger(__name__)
+
+
+def rows_response(rows: Sequence, fields: Sequence[str], headers: Optional[dict] = None) -> ORJSONResponse:
+    """Encode Core rows whose leading columns are ``fields`` with orjson.
+
+    The rows were selected to match the route's response_model, so they skip
+    FastAPI's validation and jsonable_encoder pass. Trailing columns (e.g. the
+    version used for ETags) are dropped by zip().
+    """
+    return ORJSONResponse([dict(zip(fields, row)) for row in rows], headers=headers)
+
+
+def database_error(error: Exception) -> HTTPException:
+    """A 500 for a failed query. The error is logged; its SQL never reaches the client."""
+    logger.error("Database error", exc_info=error)
+    return HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Database error")
@@ -1,5 +1,6 @@
-from pydantic import BaseModel, EmailStr
-from typing import Optional
+import datetime
+from pydantic import BaseModel, EmailStr, Field
+from typing import Dict, List, Literal, Optional
 
 class RecipeCreate(BaseModel):
     title: str
@@ -15,6 +16,24 @@ class Recipe(RecipeCreate):
     class Config:
         orm_mode = True
 
+class RecipeCreated(Recipe):
+    # Existing recipes whose ingredients the new one nearly copies
+    near_duplicates: List[int] = []
+
+class RecipeSummary(BaseModel):
+    """What list views show; the same as ?fields=summary on the list endpoints"""
+    id: int
+    title: str
+    cuisine_type: str
+    cooking_time: int
+    user_id: int
+
+class PopularRecipe(Recipe):
+    favourite_count: int
+
+class ScoredRecipe(Recipe):
+    score: float
+
 class RecipeOut(BaseModel):
     id: int
     title: str
@@ -26,6 +45,78 @@ class RecipeOut(BaseModel):
     class Config:
         from_attributes = True
 
+class ParsedIngredient(BaseModel):
+    name: str
+    quantity: Optional[float] = None
+    unit: Optional[str] = None
+    raw: str
+
+    class Config:
+        from_attributes = True
+
+class CuisineFacet(BaseModel):
+    value: Optional[str] = None
+    count: int
+
+class CookingTimeFacet(BaseModel):
+    bucket: str
+    min_cooking_time: Optional[int] = None
+    max_cooking_time: Optional[int] = None
+    count: int
+
+class RecipeFacets(BaseModel):
+    total: int
+    cuisine_types: List[CuisineFacet]
+    cooking_times: List[CookingTimeFacet]
+
+class ShoppingListItem(BaseModel):
+    recipe_id: int
+    servings: float = Field(1.0, gt=0, le=100)
+
+class ShoppingListRequest(BaseModel):
+    items: List[ShoppingListItem] = []
+    include_favourites: bool = False
+
+class ShoppingListEntry(BaseModel):
+    name: str
+    quantity: Optional[float] = None
+    unit: Optional[str] = None
+    recipe_ids: List[int]
+
+class ShoppingList(BaseModel):
+    recipe_ids: List[int]
+    missing: List[int]
+    items: List[ShoppingListEntry]
+
+MealSlot = Literal["breakfast", "lunch", "dinner", "snack"]
+
+class MealPlanSlot(BaseModel):
+    date: datetime.date
+    slot: MealSlot
+    # None clears the slot
+    recipe_id: Optional[int] = None
+
+class MealPlanUpdate(BaseModel):
+    entries: List[MealPlanSlot]
+
+class MealPlanEntry(BaseModel):
+    date: datetime.date
+    slot: MealSlot
+    recipe: RecipeOut
+
+    class Config:
+        from_attributes = True
+
+class ImportRowError(BaseModel):
+    row: int
+    error: str
+
+class ImportResult(BaseModel):
+    imported: int
+    failed: int
+    batches: int
+    errors: List[ImportRowError]
+
 class UserCreate(BaseModel):
     username: str
     email: EmailStr
@@ -71,10 +162,15 @@ class Favourite(FavouriteCreate):
 
 class FavouriteOut(BaseModel):
     message: str
+    liked: bool
+    count: int
 
 class FavouriteCount(BaseModel):
     count: int
 
+class FavouriteCounts(BaseModel):
+    counts: Dict[int, int]
+
 class Token(BaseModel):
     access_token: str
     token_type: str
@@ -0,0 +1,71 @@
+import re
+from typing import List
+
+from fastapi import HTTPException, status
+from sqlalchemy import Integer, column, func, literal_column, select, table
+
+from .models import Recipe, SEARCH_DOCUMENT_SQL
+
+MAX_TERMS = 10
+
+recipes_fts = table("recipes_fts", column("rowid", Integer))
+
+
+def parse_terms(q: str) -> List[str]:
+    """Split a comma separated query into search terms.
+
+    Each term may contain several words ("olive oil"), which are matched
+    as a phrase.
+    """
+    terms = [" ".join(re.findall(r"\w+", term)) for term in q.split(",")]
+    terms = [term for term in terms if term]
+    if not terms:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Search query is empty")
+    if len(terms) > MAX_TERMS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=f"At most {MAX_TERMS} search terms are allowed"
+        )
+    return terms
+
+
+def _fts5_query(terms: List[str], match_all: bool) -> str:
+    phrases = ['"{}"'.format(term.replace('"', '""')) for term in terms]
+    return (" AND " if match_all else " OR ").join(phrases)
+
+
+def _sqlite_search(terms: List[str], match_all: bool):
+    return (
+        select(Recipe)
+        .join(recipes_fts, recipes_fts.c.rowid == Recipe.id)
+        .where(literal_column("recipes_fts").op("MATCH")(_fts5_query(terms, match_all)))
+        # bm25() is lower for better matches
+        .order_by(func.bm25(literal_column("recipes_fts")), Recipe.id)
+    )
+
+
+def _postgres_search(terms: List[str], match_all: bool):
+    # Must match the indexed expression exactly so the GIN index is used
+    document = literal_column(SEARCH_DOCUMENT_SQL)
+    query = None
+    for term in terms:
+        term_query = func.phraseto_tsquery(literal_column("'english'"), term)
+        if query is None:
+            query = term_query
+        else:
+            query = query.op("&&" if match_all else "||")(term_query)
+    return (
+        select(Recipe)
+        .where(document.op("@@")(query))
+        .order_by(func.ts_rank_cd(document, query).desc(), Recipe.id)
+    )
+
+
+def build_search_query(dialect_name: str, terms: List[str], match_all: bool = True):
+    """Ranked full-text search over recipe titles and ingredients."""
+    if dialect_name == "sqlite":
+        return _sqlite_search(terms, match_all)
+    if dialect_name == "postgresql":
+        return _postgres_search(terms, match_all)
+    raise HTTPException(
+        status_code=status.HTTP_501_NOT_IMPLEMENTED, detail=f"Search is not supported on {dialect_name}"
+    )
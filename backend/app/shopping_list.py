@@ -0,0 +1,49 @@
+from typing import Dict, Iterable, Optional, Tuple
+
+# Factor to the base unit of each dimension, so "1 kg" and "250 g" add up
+UNIT_CONVERSIONS = {
+    "g": ("g", 1.0),
+    "kg": ("g", 1000.0),
+    "mg": ("g", 0.001),
+    "oz": ("g", 28.3495),
+    "lb": ("g", 453.592),
+    "ml": ("ml", 1.0),
+    "l": ("ml", 1000.0),
+    "tsp": ("ml", 4.92892),
+    "tbsp": ("ml", 14.7868),
+    "cup": ("ml", 236.588),
+}
+
+
+def normalize_quantity(quantity: Optional[float], unit: Optional[str]):
+    if unit in UNIT_CONVERSIONS:
+        base, factor = UNIT_CONVERSIONS[unit]
+        return (quantity * factor if quantity is not None else None), base
+    return quantity, unit
+
+
+def build_shopping_list(
+    rows: Iterable[Tuple[int, Optional[str], Optional[float], Optional[str]]], servings: Dict[int, float]
+):
+    """Aggregate (recipe id, name, quantity, unit) rows from recipe_ingredients in a single pass.
+
+    Lines are merged by ingredient name and base unit; quantities are scaled
+    by the recipe's servings multiplier. A row with no name is a recipe
+    without parsed ingredients.
+    """
+    totals: Dict[Tuple[str, Optional[str]], dict] = {}
+    for recipe_id, name, quantity, unit in rows:
+        if name is None:
+            continue
+        quantity, unit = normalize_quantity(quantity, unit)
+        entry = totals.get((name, unit))
+        if entry is None:
+            entry = totals[(name, unit)] = {"name": name, "quantity": None, "unit": unit, "recipe_ids": []}
+        if quantity is not None:
+            entry["quantity"] = (entry["quantity"] or 0.0) + quantity * servings.get(recipe_id, 1.0)
+        if recipe_id not in entry["recipe_ids"]:
+            entry["recipe_ids"].append(recipe_id)
+    for entry in totals.values():
+        if entry["quantity"] is not None:
+            entry["quantity"] = round(entry["quantity"], 2)
+    return sorted(totals.values(), key=lambda entry: (entry["name"], entry["unit"] or ""))
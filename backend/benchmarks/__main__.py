@@ -0,0 +1,134 @@
+# Endpoint benchmarks. Run from backend/:
+#   python -m benchmarks                               # in-process against ./benchmark.db
+#   python -m benchmarks --recipes 50000 --output results.json
+#   python -m benchmarks --baseline results.json --fail-on-regression
+#   python -m benchmarks --base-url http://localhost:8000 --email user1@example.com
+# In-process runs generate their dataset with app.datagen and also count SQL
+# statements per request; --base-url runs measure a live server as-is.
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+import httpx
+
+from . import scenarios
+from .dataset import DEFAULT_DATABASE_URL, prepare_dataset
+from .runner import compare, run_all
+from .scenarios import Context
+
+def parse_args():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Benchmark the Flavour Fusion API")
+    parser.add_argument("--base-url", help="Benchmark a running server instead of the app in-process")
+    parser.add_argument("--database-url", default=os.getenv("BENCH_DATABASE_URL", DEFAULT_DATABASE_URL),
+                        help="Database for in-process runs; its data is replaced when the dataset size differs")
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--recipes", type=int, default=10_000)
+    parser.add_argument("--favourites-per-user", type=float, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--regenerate", action="store_true", help="Always rebuild the dataset")
+    parser.add_argument("--email", default="user1@example.com", help="Login used with --base-url")
+    parser.add_argument("--password", default="password1")
+    parser.add_argument("--requests", type=int, default=200, help="Measured requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--scenario", action="append", help="Scenario name or prefix, e.g. 'recipes'; repeatable")
+    parser.add_argument("--output", help="Write results as JSON")
+    parser.add_argument("--baseline", help="JSON from an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed relative slowdown, default 20%%")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    return parser.parse_args()
+
+
+async def load_context(client: httpx.AsyncClient, args) -> Context:
+    recipe_ids, cuisines, cursor = [], set(), None
+    while len(recipe_ids) < 5000:
+        params = {"limit": 500, **({"cursor": cursor} if cursor else {})}
+        response = await client.get("/api/recipes/", params=params)
+        response.raise_for_status()
+        page = response.json()
+        recipe_ids += [recipe["id"] for recipe in page]
+        cuisines.update(recipe["cuisine_type"] for recipe in page)
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    if not recipe_ids:
+        raise SystemExit("The benchmark database has no recipes")
+    return Context(recipe_ids, sorted(cuisines), args.email, args.password, rng=random.Random(args.seed))
+
+
+async def main():
+    args = parse_args()
+    counter = None
+    if args.base_url:
+        client = httpx.AsyncClient(base_url=args.base_url, timeout=60)
+        mode = "server"
+    else:
+        args.email = prepare_dataset(
+            args.database_url, args.users, args.recipes, args.favourites_per_user, args.seed, args.password,
+            regenerate=args.regenerate,
+        ) or args.email
+        from app.admission import admission
+        from app.database import SessionLocal, async_engine, engine
+        from app.ingredient_index import sync_ingredient_index
+        from app.main import app
+        from .runner import QueryCounter
+
+        # auth.login measures bcrypt throughput; repeated logins as one user would hit the per-email limit
+        admission.enabled = False
+        # ASGITransport doesn't run the lifespan, whose background task would sync the index
+        with SessionLocal() as db:
+            sync_ingredient_index(db)
+
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://benchmark", timeout=60)
+        counter = QueryCounter([async_engine.sync_engine, engine])
+        mode = "in-process"
+
+    async with client:
+        ctx = await load_context(client, args)
+        results = await run_all(
+            client, ctx, scenarios.select(args.scenario), args.requests, args.concurrency, args.warmup, counter
+        )
+    if counter:
+        counter.close()
+        await async_engine.dispose()
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "mode": mode,
+            "target": args.base_url or args.database_url,
+            "dataset": None if args.base_url else {
+                "users": args.users, "recipes": args.recipes,
+                "favourites_per_user": args.favourites_per_user, "seed": args.seed,
+            },
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if not regressions:
+            print(f"No regressions against {args.baseline}")
+        if regressions and args.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,63 @@
+import os
+from typing import Optional
+
+DEFAULT_DATABASE_URL = "sqlite:///./benchmark.db"
+
+
+def prepare_dataset(
+    database_url: str,
+    users: int,
+    recipes: int,
+    favourites_per_user: float,
+    seed: int,
+    password: str,
+    regenerate: bool = False,
+) -> Optional[str]:
+    """Point the app at the benchmark database and make sure it holds the requested dataset.
+
+    Must run before anything imports app.database. Returns the email of the
+    most prolific author, whose dashboard gives a realistic page.
+    """
+    os.environ["TESTING"] = "false"
+    os.environ["DATABASE_URL"] = database_url
+    from sqlalchemy import func, inspect, select
+
+    from app.database import SessionLocal, engine
+    from app.datagen import GeneratorConfig, generate
+    from app.models import Base, Recipe, User
+    from app.recommendations import rebuild_similarities
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        existing = (
+            db.execute(select(func.count()).select_from(User)).scalar(),
+            db.execute(select(func.count()).select_from(Recipe)).scalar(),
+        )
+        # A database generated before a schema change is rebuilt as well
+        columns = {column["name"] for column in inspect(engine).get_columns("recipes")}
+        outdated = not columns.issuperset(Recipe.__table__.columns.keys())
+        if regenerate or outdated or existing != (users, recipes):
+            print(f"Generating {users} users and {recipes} recipes into {database_url}")
+            db.close()
+            Base.metadata.drop_all(bind=engine)
+            Base.metadata.create_all(bind=engine)
+            db = SessionLocal()
+            generate(db, GeneratorConfig(
+                users=users,
+                recipes=recipes,
+                favourites_per_user=favourites_per_user,
+                seed=seed,
+                password=password,
+            ))
+            rebuild_similarities(db)
+        top_author = (
+            select(User.email)
+            .join(Recipe, Recipe.user_id == User.id)
+            .group_by(User.id, User.email)
+            .order_by(func.count().desc())
+            .limit(1)
+        )
+        return db.execute(top_author).scalar()
+    finally:
+        db.close()
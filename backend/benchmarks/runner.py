@@ -0,0 +1,157 @@
+import asyncio
+import math
+import statistics
+import time
+from dataclasses import dataclass
+from typing import List, Optional
+
+import httpx
+
+from .scenarios import Context, Scenario
+
+
+class QueryCounter:
+    """Counts SQL statements sent by the given engines (in-process runs only)."""
+
+    def __init__(self, engines):
+        from sqlalchemy import event
+
+        self._event = event
+        self.engines = engines
+        self.count = 0
+        for engine in engines:
+            event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+    def close(self):
+        for engine in self.engines:
+            self._event.remove(engine, "before_cursor_execute", self._on_execute)
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    # Nearest-rank percentile; stable for the small samples a run produces
+    if not sorted_values:
+        return float("nan")
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+@dataclass
+class Result:
+    name: str
+    requests: int
+    errors: int
+    seconds: float
+    latencies: List[float]
+    queries: Optional[int]
+
+    def summary(self) -> dict:
+        latencies = sorted(self.latencies)
+        ms = lambda value: round(value * 1000, 3)
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "p50_ms": ms(percentile(latencies, 0.50)),
+            "p95_ms": ms(percentile(latencies, 0.95)),
+            "p99_ms": ms(percentile(latencies, 0.99)),
+            "mean_ms": ms(statistics.fmean(latencies)) if latencies else None,
+            "throughput_rps": round(self.requests / self.seconds, 1) if self.seconds else None,
+            "queries_per_request": round(self.queries / self.requests, 2) if self.queries is not None else None,
+        }
+
+
+async def send(client: httpx.AsyncClient, ctx: Context, scenario: Scenario) -> bool:
+    request = scenario.build(ctx)
+    response = await client.request(
+        request.method, request.path, params=request.params, headers=request.headers, data=request.data
+    )
+    return response.status_code < 400
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    ctx: Context,
+    scenario: Scenario,
+    requests: int,
+    concurrency: int,
+    warmup: int,
+    counter: Optional[QueryCounter],
+) -> Result:
+    for _ in range(warmup):
+        await send(client, ctx, scenario)
+
+    latencies: List[float] = []
+    errors = 0
+    remaining = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            started = time.perf_counter()
+            ok = await send(client, ctx, scenario)
+            latencies.append(time.perf_counter() - started)
+            errors += not ok
+
+    queries_before = counter.count if counter else None
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    seconds = time.perf_counter() - started
+    queries = counter.count - queries_before if counter else None
+    return Result(scenario.name, requests, errors, seconds, latencies, queries)
+
+
+async def login(client: httpx.AsyncClient, ctx: Context):
+    response = await client.post("/api/login", data={"email": ctx.email, "password": ctx.password})
+    response.raise_for_status()
+    ctx.token = response.json()["access_token"]
+
+
+async def run_all(
+    client: httpx.AsyncClient,
+    ctx: Context,
+    scenarios: List[Scenario],
+    requests: int,
+    concurrency: int,
+    warmup: int,
+    counter: Optional[QueryCounter] = None,
+    log=print,
+) -> dict:
+    await login(client, ctx)
+    results = {}
+    for scenario in scenarios:
+        result = await run_scenario(
+            client, ctx, scenario, scenario.requests or requests, concurrency, warmup, counter
+        )
+        results[scenario.name] = result.summary()
+        log(format_row(scenario.name, results[scenario.name]))
+    return results
+
+
+def format_row(name: str, summary: dict) -> str:
+    queries = summary["queries_per_request"]
+    return (
+        f"{name:<26} p50 {summary['p50_ms']:>8.2f}ms  p95 {summary['p95_ms']:>8.2f}ms  "
+        f"p99 {summary['p99_ms']:>8.2f}ms  {summary['throughput_rps']:>8.1f} req/s  "
+        f"{'-' if queries is None else queries:>5} q/req  {summary['errors']} errors"
+    )
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> List[str]:
+    """Scenarios that got slower (p95), lost throughput or issue more queries than the baseline."""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        if previous["p95_ms"] and current["p95_ms"] > previous["p95_ms"] * (1 + threshold):
+            regressions.append(f"{name}: p95 {previous['p95_ms']}ms -> {current['p95_ms']}ms")
+        if previous["throughput_rps"] and current["throughput_rps"] < previous["throughput_rps"] * (1 - threshold):
+            regressions.append(
+                f"{name}: throughput {previous['throughput_rps']} -> {current['throughput_rps']} req/s"
+            )
+        before, after = previous.get("queries_per_request"), current.get("queries_per_request")
+        if before is not None and after is not None and after > before:
+            regressions.append(f"{name}: queries per request {before} -> {after}")
+    return regressions
@@ -0,0 +1,86 @@
+import random
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+
+@dataclass
+class Context:
+    """What scenarios need to know about the benchmark dataset."""
+    recipe_ids: List[int]
+    cuisines: List[str]
+    email: str
+    password: str
+    token: Optional[str] = None
+    rng: random.Random = field(default_factory=lambda: random.Random(0))
+
+    @property
+    def auth(self) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {self.token}"}
+
+    def recipe_id(self) -> int:
+        return self.rng.choice(self.recipe_ids)
+
+
+@dataclass
+class Request:
+    method: str
+    path: str
+    params: Optional[dict] = None
+    headers: Optional[dict] = None
+    data: Optional[dict] = None
+
+
+@dataclass
+class Scenario:
+    name: str
+    build: Callable[[Context], Request]
+    # bcrypt-bound endpoints run fewer iterations than the default
+    requests: Optional[int] = None
+
+
+SCENARIOS = [
+    Scenario("recipes.list", lambda ctx: Request("GET", "/api/recipes/", {"limit": 50})),
+    Scenario("recipes.list_summary", lambda ctx: Request("GET", "/api/recipes/", {"limit": 50, "fields": "summary"})),
+    Scenario("recipes.list_sorted", lambda ctx: Request("GET", "/api/recipes/", {"limit": 50, "sort": "cooking_time"})),
+    Scenario("recipes.list_filtered", lambda ctx: Request(
+        "GET", "/api/recipes/", {"limit": 50, "cuisine_type": ctx.rng.choice(ctx.cuisines), "max_cooking_time": 45}
+    )),
+    Scenario("recipes.facets", lambda ctx: Request("GET", "/api/recipes/facets")),
+    Scenario("recipes.popular", lambda ctx: Request("GET", "/api/recipes/popular", {"limit": 20, "fields": "summary"})),
+    Scenario("recipes.popular_cuisine", lambda ctx: Request(
+        "GET", "/api/recipes/popular", {"limit": 20, "cuisine_type": ctx.rng.choice(ctx.cuisines), "fields": "summary"}
+    )),
+    Scenario("recipes.detail", lambda ctx: Request("GET", f"/api/recipes/{ctx.recipe_id()}")),
+    Scenario("recipes.search", lambda ctx: Request(
+        "GET", "/api/recipes/search", {"q": ctx.rng.choice(["garlic", "rice", "tomato, onion", "coconut milk"])}
+    )),
+    Scenario("recipes.dashboard", lambda ctx: Request("GET", "/api/recipes/dashboard", {"limit": 50}, ctx.auth)),
+    Scenario("favourites.toggle", lambda ctx: Request("POST", f"/api/recipes/{ctx.recipe_id()}/favorite", headers=ctx.auth)),
+    Scenario("favourites.list", lambda ctx: Request("GET", "/api/users/favorites", {"limit": 50}, ctx.auth)),
+    Scenario("favourites.count", lambda ctx: Request("GET", f"/api/recipes/{ctx.recipe_id()}/favorite-count")),
+    Scenario("favourites.batch_count", lambda ctx: Request(
+        "GET", "/api/favorite-counts", {"ids": ctx.rng.sample(ctx.recipe_ids, min(50, len(ctx.recipe_ids)))}
+    )),
+    Scenario("recommendations.similar", lambda ctx: Request(
+        "GET", f"/api/recipes/{ctx.recipe_id()}/similar", {"fields": "summary"}
+    )),
+    Scenario("recommendations.user", lambda ctx: Request(
+        "GET", "/api/users/recommendations", {"fields": "summary"}, ctx.auth
+    )),
+    Scenario("recommendations.similar_ingredients", lambda ctx: Request(
+        "GET", f"/api/recipes/{ctx.recipe_id()}/similar-ingredients", {"fields": "summary"}
+    )),
+    Scenario("auth.login", lambda ctx: Request(
+        "POST", "/api/login", data={"email": ctx.email, "password": ctx.password}
+    ), requests=20),
+]
+
+
+def select(names: Optional[List[str]]) -> List[Scenario]:
+    """Scenarios whose name matches one of ``names`` exactly or by prefix, e.g. 'recipes'."""
+    if not names:
+        return SCENARIOS
+    chosen = [s for s in SCENARIOS if any(s.name == n or s.name.startswith(n + ".") for n in names)]
+    if not chosen:
+        raise SystemExit(f"No scenarios match {names}; available: {[s.name for s in SCENARIOS]}")
+    return chosen
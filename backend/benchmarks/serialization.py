@@ -0,0 +1,91 @@
+# Serialization cost of a recipe list page, ORM + response_model versus the
+# Core rows + orjson path the list endpoints use. Run from backend/:
+#   python -m benchmarks.serialization --limit 100 --iterations 500
+import argparse
+import asyncio
+import gc
+import json
+import time
+import tracemalloc
+from typing import List
+
+from .dataset import DEFAULT_DATABASE_URL, prepare_dataset
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.serialization")
+    parser.add_argument("--database-url", default=DEFAULT_DATABASE_URL)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--recipes", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--limit", type=int, default=100, help="Recipes per page")
+    parser.add_argument("--iterations", type=int, default=300)
+    parser.add_argument("--output", help="Write results as JSON")
+    return parser.parse_args()
+
+
+async def main():
+    args = parse_args()
+    prepare_dataset(args.database_url, args.users, args.recipes, 20, args.seed, "password1")
+
+    from pydantic import TypeAdapter
+    from sqlalchemy import select
+
+    from app import crud, schemas
+    from app.database import AsyncSessionLocal, async_engine
+    from app.models import Recipe
+    from app.responses import rows_response
+
+    adapter = TypeAdapter(List[schemas.Recipe])
+
+    async def orm_page() -> bytes:
+        # What the endpoints did before: ORM entities, response_model validation
+        # and serialization, then the stdlib encoder used by JSONResponse
+        async with AsyncSessionLocal() as db:
+            recipes = (await db.execute(select(Recipe).order_by(Recipe.id).limit(args.limit))).scalars().all()
+            content = adapter.dump_python(adapter.validate_python(recipes, from_attributes=True), mode="json")
+            return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+    async def core_page() -> bytes:
+        async with AsyncSessionLocal() as db:
+            rows = await crud.get_recipes(db, limit=args.limit)
+            return rows_response(rows, crud.RECIPE_FIELDS).body
+
+    assert json.loads(await orm_page()) == json.loads(await core_page()), "Both paths must produce the same body"
+
+    results = {}
+    for name, page in (("orm_response_model", orm_page), ("core_orjson", core_page)):
+        for _ in range(10):
+            await page()
+        gc.collect()
+        cpu, wall = time.process_time(), time.perf_counter()
+        for _ in range(args.iterations):
+            body = await page()
+        cpu, wall = time.process_time() - cpu, time.perf_counter() - wall
+
+        tracemalloc.start()
+        await page()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        results[name] = {
+            "cpu_ms_per_request": round(cpu / args.iterations * 1000, 3),
+            "wall_ms_per_request": round(wall / args.iterations * 1000, 3),
+            "peak_kib_per_request": round(peak / 1024, 1),
+            "body_bytes": len(body),
+        }
+    await async_engine.dispose()
+
+    before, after = results["orm_response_model"], results["core_orjson"]
+    for name, result in results.items():
+        print(f"{name:<20} cpu {result['cpu_ms_per_request']:>7.3f}ms  wall {result['wall_ms_per_request']:>7.3f}ms  "
+              f"peak {result['peak_kib_per_request']:>8.1f}KiB  body {result['body_bytes']}B")
+    print(f"CPU per request -{1 - after['cpu_ms_per_request'] / before['cpu_ms_per_request']:.0%}, "
+          f"peak memory -{1 - after['peak_kib_per_request'] / before['peak_kib_per_request']:.0%}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"limit": args.limit, "iterations": args.iterations, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
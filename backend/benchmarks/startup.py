@@ -0,0 +1,109 @@
+# Cold-start cost of a worker: importing app.main, running the lifespan
+# startup and serving the first requests, each in a fresh interpreter.
+# Run from backend/:
+#   python -m benchmarks.startup --runs 10
+#   python -m benchmarks.startup --importtime     # slowest imports of one run
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from .dataset import DEFAULT_DATABASE_URL, prepare_dataset
+
+# Executed in each child interpreter
+PROBE = """
+import time
+started = time.perf_counter()
+from app.main import app
+imported = time.perf_counter()
+
+import asyncio, json, httpx
+
+async def probe():
+    before_startup = time.perf_counter()
+    async with app.router.lifespan_context(app):
+        started_up = time.perf_counter()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://startup") as client:
+            timings = []
+            for _ in range(2):
+                request_started = time.perf_counter()
+                response = await client.get("/api/recipes/", params={"limit": 20})
+                response.raise_for_status()
+                timings.append(time.perf_counter() - request_started)
+    return started_up - before_startup, timings
+
+startup, (first, second) = asyncio.run(probe())
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "startup_ms": startup * 1000,
+    "first_request_ms": first * 1000,
+    "second_request_ms": second * 1000,
+    "ready_to_first_response_ms": (imported - started + startup + first) * 1000,
+}))
+"""
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.startup")
+    parser.add_argument("--database-url", default=DEFAULT_DATABASE_URL)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--recipes", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--importtime", action="store_true", help="Show the slowest imports of one cold start")
+    parser.add_argument("--output", help="Write results as JSON")
+    return parser.parse_args()
+
+
+def child_env(database_url: str) -> dict:
+    return {**os.environ, "TESTING": "false", "DATABASE_URL": database_url, "PYTHONDONTWRITEBYTECODE": "0"}
+
+
+def show_importtime(env: dict, top: int = 15):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"], env=env, capture_output=True, text=True
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        parts = [part.strip() for part in line.removeprefix("import time:").split("|")]
+        if len(parts) == 3 and parts[1].isdigit():
+            rows.append((int(parts[1]), parts[2]))
+    print(f"Slowest imports by cumulative time (of {len(rows)} modules):")
+    for cumulative, module in sorted(rows, reverse=True)[:top]:
+        print(f"  {cumulative / 1000:>8.1f}ms  {module}")
+
+
+def main():
+    args = parse_args()
+    prepare_dataset(args.database_url, args.users, args.recipes, 20, args.seed, "password1")
+    env = child_env(args.database_url)
+    if args.importtime:
+        show_importtime(env)
+
+    runs = []
+    for _ in range(args.runs):
+        result = subprocess.run([sys.executable, "-c", PROBE], env=env, capture_output=True, text=True)
+        if result.returncode:
+            raise SystemExit(result.stderr)
+        runs.append(json.loads(result.stdout.strip().splitlines()[-1]))
+
+    summary = {
+        metric: {
+            "median": round(statistics.median(run[metric] for run in runs), 2),
+            "min": round(min(run[metric] for run in runs), 2),
+            "max": round(max(run[metric] for run in runs), 2),
+        }
+        for metric in runs[0]
+    }
+    for metric, values in summary.items():
+        print(f"{metric:<28} median {values['median']:>8.2f}ms  min {values['min']:>8.2f}ms  max {values['max']:>8.2f}ms")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"runs": args.runs, "results": summary}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
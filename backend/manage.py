@@ -0,0 +1,95 @@
+# Maintenance commands, e.g. `python manage.py reconcile-favourite-counts`
+import argparse
+
+from app.database import SessionLocal
+from app import maintenance
+
+
+def reconcile_favourite_counts(args):
+    db = SessionLocal()
+    try:
+        fixed = maintenance.reconcile_favourite_counts(db)
+        print(f"Reconciled favourite counts for {fixed} recipes")
+    finally:
+        db.close()
+
+
+def backfill_ingredients(args):
+    db = SessionLocal()
+    try:
+        parsed = maintenance.backfill_recipe_ingredients(db, batch_size=args.batch_size, rebuild=args.rebuild)
+        print(f"Parsed ingredients for {parsed} recipes")
+    finally:
+        db.close()
+
+
+def similarities(args):
+    # SciPy is only needed here, not by the API
+    from app import recommendations
+
+    k = args.k or recommendations.SIMILAR_RECIPES_K
+    db = SessionLocal()
+    try:
+        if args.full:
+            written = recommendations.rebuild_similarities(db, k=k, batch_size=args.batch_size)
+            print(f"Rebuilt recipe similarities: {written} rows")
+        else:
+            refreshed = recommendations.refresh_similarities(db, k=k, batch_size=args.batch_size)
+            print(f"Refreshed similarities of {refreshed} recipes")
+    finally:
+        db.close()
+
+
+def ingredient_index(args):
+    from app.ingredient_index import INGREDIENT_INDEX_PATH, ingredient_index, sync_ingredient_index
+
+    path = args.path or INGREDIENT_INDEX_PATH
+    if not path:
+        raise SystemExit("Pass --path or set INGREDIENT_INDEX_PATH")
+    db = SessionLocal()
+    try:
+        sync_ingredient_index(db, path=None if args.rebuild else path)
+    finally:
+        db.close()
+    ingredient_index.save(path)
+    print(f"Saved ingredient index of {len(ingredient_index)} recipes to {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Flavour Fusion maintenance commands")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    reconcile = subparsers.add_parser(
+        "reconcile-favourite-counts", help="Rebuild recipe favourite counters from the favourites table"
+    )
+    reconcile.set_defaults(func=reconcile_favourite_counts)
+
+    backfill = subparsers.add_parser(
+        "backfill-ingredients", help="Parse free-text ingredients into the recipe_ingredients table"
+    )
+    backfill.add_argument("--batch-size", type=int, default=1000)
+    backfill.add_argument("--rebuild", action="store_true", help="Reparse recipes that were already parsed")
+    backfill.set_defaults(func=backfill_ingredients)
+
+    similar = subparsers.add_parser(
+        "similarities",
+        help="Refresh similar-recipe lists of recipes whose favourites changed (run periodically)",
+    )
+    similar.add_argument("--full", action="store_true", help="Rebuild every list from the whole favourites graph")
+    similar.add_argument("--k", type=int, default=None, help="Neighbours kept per recipe, default SIMILAR_RECIPES_K or 20")
+    similar.add_argument("--batch-size", type=int, default=256, help="Recipes multiplied out at once")
+    similar.set_defaults(func=similarities)
+
+    index = subparsers.add_parser(
+        "ingredient-index", help="Save the ingredient similarity index for API workers to load at startup"
+    )
+    index.add_argument("--path", default=None, help="Output file, default INGREDIENT_INDEX_PATH")
+    index.add_argument("--rebuild", action="store_true", help="Recompute every signature instead of updating the saved file")
+    index.set_defaults(func=ingredient_index)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""baseline schema
+
+The schema the app created through Base.metadata.create_all before
+migrations were introduced: users, recipes and favourites. Databases built
+that way already have these tables and are left as they are, so
+``alembic upgrade head`` brings both new and existing databases up to date.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if sa.inspect(op.get_bind()).has_table('users'):
+        return
+    op.create_table(
+        'users',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('username', sa.String(), nullable=False),
+        sa.Column('email', sa.String(), nullable=False),
+        sa.Column('hashed_password', sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_users_id', 'users', ['id'])
+    op.create_index('ix_users_username', 'users', ['username'], unique=True)
+    op.create_index('ix_users_email', 'users', ['email'], unique=True)
+
+    op.create_table(
+        'recipes',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('title', sa.String(), nullable=True),
+        sa.Column('cuisine_type', sa.String(), nullable=True),
+        sa.Column('cooking_time', sa.Integer(), nullable=True),
+        sa.Column('ingredients', sa.Text(), nullable=True),
+        sa.Column('instructions', sa.Text(), nullable=True),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_recipes_id', 'recipes', ['id'])
+    op.create_index('ix_recipes_title', 'recipes', ['title'])
+
+    op.create_table(
+        'favourites',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('recipe_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['recipe_id'], ['recipes.id']),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('user_id', 'recipe_id'),
+        sa.UniqueConstraint('user_id', 'recipe_id', name='unique_user_recipe'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('favourites')
+    op.drop_table('recipes')
+    op.drop_table('users')
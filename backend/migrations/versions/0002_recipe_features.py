@@ -0,0 +1,95 @@
+"""recipe features
+
+Everything the schema gained on top of the baseline before migrations
+existed: the favourite count and version columns on recipes, the keyset
+pagination indexes, full-text search, parsed ingredients and meal plans.
+Existing favourites are counted into favourite_count and every recipe starts
+at version 1. Parsed ingredients of existing recipes are filled in afterwards
+by ``python manage.py backfill-ingredients``.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 09:15:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.models import SEARCH_DOCUMENT_SQL, SQLITE_FTS_DDL
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('recipes', sa.Column('favourite_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('recipes', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+    op.execute(
+        "UPDATE recipes SET favourite_count = "
+        "(SELECT count(*) FROM favourites WHERE favourites.recipe_id = recipes.id)"
+    )
+    op.create_index('ix_recipes_cooking_time_id', 'recipes', ['cooking_time', 'id'])
+    op.create_index('ix_recipes_title_id', 'recipes', ['title', 'id'])
+    op.create_index('ix_recipes_user_id_id', 'recipes', ['user_id', 'id'])
+
+    op.create_table(
+        'recipe_ingredients',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('recipe_id', sa.Integer(), nullable=False),
+        sa.Column('position', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('quantity', sa.Float(), nullable=True),
+        sa.Column('unit', sa.String(), nullable=True),
+        sa.Column('raw', sa.String(), nullable=False),
+        sa.ForeignKeyConstraint(['recipe_id'], ['recipes.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_recipe_ingredients_recipe_id', 'recipe_ingredients', ['recipe_id'])
+    op.create_index('ix_recipe_ingredients_name_recipe_id', 'recipe_ingredients', ['name', 'recipe_id'])
+
+    op.create_table(
+        'meal_plans',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.Column('slot', sa.String(length=20), nullable=False),
+        sa.Column('recipe_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['recipe_id'], ['recipes.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id', 'date', 'slot', name='uq_meal_plans_user_date_slot'),
+    )
+    op.create_index('ix_meal_plans_recipe_id', 'meal_plans', ['recipe_id'])
+
+    # Full-text search, see app.models
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute(f"CREATE INDEX ix_recipes_search ON recipes USING GIN (({SEARCH_DOCUMENT_SQL}))")
+    elif dialect == 'sqlite':
+        for statement in SQLITE_FTS_DDL:
+            op.execute(statement)
+        # The triggers only see later writes; index the recipes that already exist
+        op.execute("INSERT INTO recipes_fts(recipes_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_recipes_search")
+    elif dialect == 'sqlite':
+        for trigger in ('recipes_fts_ai', 'recipes_fts_ad', 'recipes_fts_au'):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS recipes_fts")
+    op.drop_table('meal_plans')
+    op.drop_table('recipe_ingredients')
+    op.drop_index('ix_recipes_user_id_id', table_name='recipes')
+    op.drop_index('ix_recipes_title_id', table_name='recipes')
+    op.drop_index('ix_recipes_cooking_time_id', table_name='recipes')
+    op.drop_column('recipes', 'version')
+    op.drop_column('recipes', 'favourite_count')
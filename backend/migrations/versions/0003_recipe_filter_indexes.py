@@ -0,0 +1,31 @@
+"""recipe filter indexes
+
+Composite indexes behind the cuisine_type and cooking_time filters of
+GET /api/recipes/.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 09:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_recipes_cuisine_type_id', 'recipes', ['cuisine_type', 'id'])
+    op.create_index('ix_recipes_cuisine_type_cooking_time_id', 'recipes', ['cuisine_type', 'cooking_time', 'id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_recipes_cuisine_type_cooking_time_id', table_name='recipes')
+    op.drop_index('ix_recipes_cuisine_type_id', table_name='recipes')
@@ -0,0 +1,51 @@
+"""recipe similarities
+
+Top-k neighbours per recipe from the favourites graph, and the flag marking
+recipes whose neighbours need recomputing.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'recipes',
+        sa.Column('similarities_stale', sa.Boolean(), nullable=False, server_default=sa.text('false')),
+    )
+    op.create_index(
+        'ix_recipes_similarities_stale', 'recipes', ['id'],
+        postgresql_where=sa.text('similarities_stale'), sqlite_where=sa.text('similarities_stale'),
+    )
+    op.create_table(
+        'recipe_similarities',
+        sa.Column('recipe_id', sa.Integer(), nullable=False),
+        sa.Column('similar_recipe_id', sa.Integer(), nullable=False),
+        sa.Column('score', sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(['recipe_id'], ['recipes.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['similar_recipe_id'], ['recipes.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('recipe_id', 'similar_recipe_id'),
+    )
+    op.create_index(
+        'ix_recipe_similarities_similar_recipe_id', 'recipe_similarities', ['similar_recipe_id']
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_recipe_similarities_similar_recipe_id', table_name='recipe_similarities')
+    op.drop_table('recipe_similarities')
+    op.drop_index('ix_recipes_similarities_stale', table_name='recipes')
+    op.drop_column('recipes', 'similarities_stale')
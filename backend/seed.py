@@ -1,65 +1,57 @@
-from app.database import SessionLocal, engine
-from app.models import Base, User, Recipe, favourites
-import random
-from passlib.context import CryptContext
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-# Create a new session
-db = SessionLocal()
-
-try:
-    # Drop all tables and recreate them
-    Base.metadata.drop_all(bind=engine)
-    Base.metadata.create_all(bind=engine)
-
-    # Create fake users
-    users = [
-        User(username="user1", email="user1@example.com", hashed_password=pwd_context.hash("password1")),
-        User(username="user2", email="user2@example.com", hashed_password=pwd_context.hash("password2")),
-    ]
-
-    db.add_all(users)
-    db.commit()  # Commit to ensure users have IDs
-
-    # Refresh users to get their IDs
-    for user in users:
-        db.refresh(user)
-
-    # Create fake recipes
-    recipes = [
-        Recipe(
-            title=f"Recipe {i}",
-            cuisine_type=random.choice(["italian", "mexican", "chinese", "japanese", "indian"]),
-            cooking_time=random.randint(10, 120),
-            ingredients="ingredient1, ingredient2, ingredient3",
-            instructions="Cook it!",
-            user_id=random.choice([user.id for user in users]),
-        )
-        for i in range(10)
-    ]
+# Synthetic data for development and load testing, e.g.
+#   python seed.py                                   # 2 users, 10 recipes, fresh schema
+#   python seed.py --users 100000 --recipes 1000000 --favourites-per-user 25
+# Every generated user logs in with --password. Runs are deterministic for a given --seed.
+import argparse
 
-    db.add_all(recipes)
-    db.commit()  # Commit to ensure recipes have IDs
-
-    # Refresh recipes to get their IDs
-    for recipe in recipes:
-        db.refresh(recipe)
-
-    # Add some favourites
-    for user in users:
-        favourite_recipes = random.sample(recipes, 3)
-        for recipe in favourite_recipes:
-            stmt = favourites.insert().values(user_id=user.id, recipe_id=recipe.id)
-            db.execute(stmt)
-
-    db.commit()
-
-    print("Database seeded successfully")
-
-except Exception as e:
-    db.rollback()
-    print("Error seeding database:", e)
-
-finally:
-    db.close()
+from app.database import SessionLocal, engine
+from app.datagen import GeneratorConfig, generate
+from app.models import Base
+
+
+def main():
+    defaults = GeneratorConfig()
+    parser = argparse.ArgumentParser(description="Generate users, recipes and favourites")
+    parser.add_argument("--users", type=int, default=defaults.users)
+    parser.add_argument("--recipes", type=int, default=defaults.recipes)
+    parser.add_argument("--favourites-per-user", type=float, default=defaults.favourites_per_user,
+                        help="Mean number of favourites per user")
+    parser.add_argument("--zipf-exponent", type=float, default=defaults.zipf_exponent,
+                        help="Skew of recipe popularity; higher concentrates likes on fewer recipes")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--password", default=defaults.password)
+    parser.add_argument("--batch-size", type=int, default=defaults.batch_size)
+    parser.add_argument("--append", action="store_true",
+                        help="Add to the existing data instead of dropping and recreating all tables")
+    args = parser.parse_args()
+
+    if args.users < 1 or args.recipes < 0:
+        parser.error("--users must be at least 1 and --recipes must not be negative")
+
+    if not args.append:
+        Base.metadata.drop_all(bind=engine)
+        Base.metadata.create_all(bind=engine)
+
+    config = GeneratorConfig(
+        users=args.users,
+        recipes=args.recipes,
+        favourites_per_user=args.favourites_per_user,
+        zipf_exponent=args.zipf_exponent,
+        seed=args.seed,
+        password=args.password,
+        batch_size=args.batch_size,
+    )
+    db = SessionLocal()
+    try:
+        counts = generate(db, config)
+        print("Database seeded successfully:", ", ".join(f"{count} {name}" for name, count in counts.items()))
+    except Exception as e:
+        db.rollback()
+        print("Error seeding database:", e)
+        raise SystemExit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,19 @@
 import os
+import uuid
+from datetime import timedelta
 
 # Ensure TESTING is set to true before anything else
 os.environ["TESTING"] = "true"
 
 import pytest
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from app.database import Base, get_db
+from sqlalchemy.pool import NullPool
+from app.database import Base, get_async_db, get_async_url
 from app.main import app
 from app.models import User
-from app.auth import get_current_user
+from app.auth import create_access_token, get_password_hash, principal_cache
 from fastapi.testclient import TestClient
 
 # Use SQLite for test database
@@ -18,6 +22,11 @@ TEST_DATABASE_URL = "sqlite:///./test.db"
 engine = create_engine(TEST_DATABASE_URL, connect_args={"check_same_thread": False})
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Routes use async sessions; tests hand them ones on the test database. NullPool,
+# because each TestClient request (and each asyncio.run) runs on a fresh event loop.
+async_engine = create_async_engine(get_async_url(TEST_DATABASE_URL), poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 # Create test database session
 @pytest.fixture(scope="function")
 def db():
@@ -32,11 +41,39 @@ def db():
 # Override FastAPI dependency
 @pytest.fixture(scope="function")
 def client(db):
-    def override_get_db():
-        yield db
-    app.dependency_overrides[get_db] = override_get_db
+    async def override_get_async_db():
+        async with TestingAsyncSessionLocal() as session:
+            yield session
+    app.dependency_overrides[get_async_db] = override_get_async_db
 
     client = TestClient(app)
     yield client
 
     app.dependency_overrides.clear()
+
+@pytest.fixture(scope="function")
+def db_session(db):
+    yield db
+
+# For tests that call async crud functions directly
+@pytest.fixture(scope="function")
+def async_session_factory(db):
+    return TestingAsyncSessionLocal
+
+# make_headers("alice") adds a fresh user and returns auth headers for them
+@pytest.fixture(scope="function")
+def make_headers(db_session):
+    def make(name: str):
+        email = f"{name}-{uuid.uuid4().hex[:8]}@example.com"
+        db_session.add(User(username=email, email=email, hashed_password=get_password_hash("password1")))
+        db_session.commit()
+        token = create_access_token(data={"sub": email}, expires_delta=timedelta(minutes=30))
+        return {"Authorization": f"Bearer {token}"}
+    return make
+
+# Tables are dropped between tests, so cached principals must not outlive them
+@pytest.fixture(autouse=True)
+def clear_principal_cache():
+    principal_cache.clear()
+    yield
+    principal_cache.clear()
@@ -1,19 +1,10 @@
+import asyncio
+
 import pytest
-from fastapi.testclient import TestClient
-from app.main import app
+from app.admission import ConcurrencyGate, Rate, Rejected, admission
 from app.models import User
-from app.auth import get_password_hash
-from app.database import get_db
-
-@pytest.fixture
-def client():
-    """Fixture to create a FastAPI TestClient."""
-    return TestClient(app)
-
-@pytest.fixture
-def db_session(db):
-    yield db
-
+from app.auth import create_access_token, get_password_hash, principal_cache
+from app.hashing import password_pool
 
 @pytest.fixture
 def test_user(db_session):
@@ -62,4 +53,82 @@ def test_register(client, db_session):
     assert data["id"] == 1
     assert data["username"] == "newuser"
     assert data["email"] == "newuser@test.net"
-    
+
+
+def test_login_rejected_when_hash_pool_saturated(client, db_session, test_user, make_headers, monkeypatch):
+    """Test that logins are shed with 503 instead of queueing behind a full hashing pool."""
+    admission.backend.clear()
+    credentials = {"email": "testuser@example.com", "password": "password1"}
+    completed = password_pool.stats()["completed"]
+    assert client.post("/api/login", data=credentials).status_code == 200
+
+    monkeypatch.setattr(password_pool, "max_pending", 0)
+    response = client.post("/api/login", data=credentials)
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+    stats = client.get("/api/diagnostics/password-hashing", headers=make_headers("ops")).json()
+    assert stats["rejected"] >= 1
+    assert stats["completed"] > completed
+
+
+def test_login_rate_limited_before_hashing(client, db_session, test_user, make_headers, monkeypatch):
+    """Test that attempts over the per-email budget get a fast 429 without touching bcrypt."""
+    monkeypatch.setitem(admission.limits, "login", (Rate.parse("100/minute"), Rate.parse("2/minute")))
+    admission.backend.clear()
+    attempt = {"email": "testuser@example.com", "password": "wrong-password"}
+    assert client.post("/api/login", data=attempt).status_code == 401
+    assert client.post("/api/login", data=attempt).status_code == 401
+
+    completed = password_pool.stats()["completed"]
+    response = client.post("/api/login", data=attempt)
+    assert response.status_code == 429
+    # One token per 30 s, less whatever refilled while bcrypt ran for the first two attempts
+    assert 0 < int(response.headers["Retry-After"]) <= 30
+    assert password_pool.stats()["completed"] == completed
+
+    # Other accounts from the same client are unaffected
+    other = {"email": "someone@example.com", "password": "password1"}
+    assert client.post("/api/login", data=other).status_code == 401
+    stats = client.get("/api/diagnostics/admission", headers=make_headers("ops")).json()
+    assert {"route": "login", "reason": "email", "count": 1} in stats["rejected"]
+    admission.backend.clear()
+
+
+def test_concurrency_gate_queues_then_rejects():
+    """Test that the gate queues up to max_queue attempts, each for at most max_wait."""
+    async def scenario():
+        gate = ConcurrencyGate(limit=1, max_queue=1, max_wait=0.05)
+        await gate.acquire()
+        waiting = asyncio.create_task(gate.acquire())
+        await asyncio.sleep(0)
+        with pytest.raises(Rejected) as full:
+            await gate.acquire()
+        assert full.value.reason == "queue_full"
+        gate.release()  # handed to the waiter, which now holds the slot
+        await waiting
+        assert (gate.active, gate.queued) == (1, 0)
+        with pytest.raises(Rejected) as timeout:
+            await gate.acquire()
+        assert timeout.value.reason == "queue_timeout"
+        gate.release()
+        assert (gate.active, gate.queued) == (0, 0)
+
+    asyncio.run(scenario())
+
+
+def test_current_user_cache_and_invalidation(client, db_session, test_user):
+    """Test that warm tokens skip the user lookup and user changes take effect immediately."""
+    headers = {"Authorization": f"Bearer {create_access_token(data={'sub': test_user.email})}"}
+
+    assert client.get("/api/users/favorites", headers=headers).status_code == 200
+    assert client.get("/api/users/favorites", headers=headers).status_code == 200
+    stats = principal_cache.stats()
+    assert stats["misses"] == 1
+    assert stats["hits"] == 1
+    assert stats["size"] == 1
+
+    db_session.delete(test_user)
+    db_session.commit()
+    assert client.get("/api/users/favorites", headers=headers).status_code == 401
+    assert principal_cache.stats()["invalidations"] == 1
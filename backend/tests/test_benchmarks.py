@@ -0,0 +1,23 @@
+from benchmarks.runner import compare, percentile
+from benchmarks.scenarios import SCENARIOS, select
+
+
+def test_percentile():
+    values = sorted(float(i) for i in range(1, 101))
+    assert percentile(values, 0.50) == 50
+    assert percentile(values, 0.99) == 99
+    assert percentile([3.0], 0.95) == 3
+
+
+def test_select_scenarios_by_prefix():
+    assert [s.name for s in select(["favourites.count"])] == ["favourites.count"]
+    assert all(s.name.startswith("recipes.") for s in select(["recipes"]))
+    assert select(None) == SCENARIOS
+
+
+def test_compare_flags_regressions():
+    baseline = {"recipes.list": {"p95_ms": 10.0, "throughput_rps": 100.0, "queries_per_request": 1.0}}
+    same = {"recipes.list": {"p95_ms": 11.0, "throughput_rps": 95.0, "queries_per_request": 1.0}}
+    worse = {"recipes.list": {"p95_ms": 15.0, "throughput_rps": 60.0, "queries_per_request": 2.0}}
+    assert compare(same, baseline, threshold=0.2) == []
+    assert len(compare(worse, baseline, threshold=0.2)) == 3
@@ -0,0 +1,49 @@
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+
+from app.datagen import GeneratorConfig, generate
+from app.models import Base, Recipe, RecipeIngredient, User, favourites
+
+
+def generate_into(path, **options):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    try:
+        counts = generate(db, GeneratorConfig(**options), log=lambda message: None)
+        recipes = db.execute(select(Recipe.title, Recipe.ingredients, Recipe.user_id).order_by(Recipe.id)).all()
+        liked = db.execute(select(favourites).order_by(favourites.c.user_id, favourites.c.recipe_id)).all()
+        drifted = db.execute(
+            select(func.count()).select_from(Recipe).where(
+                Recipe.favourite_count != select(func.count()).select_from(favourites)
+                .where(favourites.c.recipe_id == Recipe.id).scalar_subquery()
+            )
+        ).scalar()
+        # Liked recipes the periodic similarities refresh would never look at
+        drifted += db.execute(
+            select(func.count()).select_from(Recipe).where(Recipe.favourite_count > 0, ~Recipe.similarities_stale)
+        ).scalar()
+        parsed = db.execute(select(func.count()).select_from(RecipeIngredient)).scalar()
+        users = db.execute(select(func.count(func.distinct(User.hashed_password)))).scalar()
+        return counts, recipes, liked, drifted, parsed, users
+    finally:
+        db.close()
+        engine.dispose()
+
+
+def test_generate_is_deterministic_and_consistent(tmp_path):
+    options = {"users": 30, "recipes": 300, "favourites_per_user": 8, "seed": 7, "batch_size": 64}
+    counts, recipes, liked, drifted, parsed, hashes = generate_into(tmp_path / "a.db", **options)
+
+    assert counts["users"] == 30 and counts["recipes"] == 300
+    assert counts["favourites"] == len(liked) > 0
+    assert counts["recipe_ingredients"] == parsed > 300
+    assert drifted == 0
+    # One bcrypt hash shared by every generated user
+    assert hashes == 1
+
+    again = generate_into(tmp_path / "b.db", **options)
+    assert (again[1], again[2]) == (recipes, liked)
+
+    other = generate_into(tmp_path / "c.db", **{**options, "seed": 8})
+    assert other[1] != recipes
@@ -0,0 +1,62 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, exc
+
+from app.auth import Principal, get_current_user
+from app.main import app
+from app.metrics import PoolMetrics
+
+
+@pytest.fixture
+def client():
+    """Fixture to create a FastAPI TestClient."""
+    return TestClient(app)
+
+
+@pytest.fixture
+def signed_in():
+    """Fixture that authenticates every request without a user lookup, so only the route's own queries count."""
+    app.dependency_overrides[get_current_user] = lambda: Principal(id=1, email="ops@example.com", username="ops")
+    yield
+    app.dependency_overrides.pop(get_current_user, None)
+
+
+def test_diagnostics_require_a_signed_in_user(client: TestClient):
+    for name in ("password-hashing", "auth-cache", "db-pool", "admission"):
+        assert client.get(f"/api/diagnostics/{name}").status_code == 401
+
+
+def test_db_pool_diagnostics(client: TestClient, signed_in):
+    """Test that API pool checkouts are reported with their wait times."""
+    client.get("/api/recipes/")
+    response = client.get("/api/diagnostics/db-pool")
+    assert response.status_code == 200
+    api = response.json()["api"]
+    assert api["pool_class"] == "TimedAsyncAdaptedQueuePool"
+    assert api["checkouts"] >= 1
+    assert api["checkout_wait_seconds"]["count"] >= 1
+    assert api["timeouts"] == 0
+
+
+def test_pool_metrics_count_timeouts(tmp_path):
+    """Test that an exhausted pool records the checkout timeout."""
+    metrics = PoolMetrics("test")
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=metrics.pool_class(),
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.05,
+    )
+    metrics.attach(engine)
+
+    held = engine.connect()
+    with pytest.raises(exc.TimeoutError):
+        engine.connect()
+    stats = metrics.stats()
+    assert stats["timeouts"] == 1
+    assert stats["checked_out"] == 1
+
+    held.close()
+    assert metrics.stats()["checkins"] == 1
+    engine.dispose()
@@ -1,18 +1,15 @@
+import asyncio
+
 import pytest
 from fastapi.testclient import TestClient
 from datetime import timedelta
+from sqlalchemy import update
 from sqlalchemy.orm import Session
 
-from app.main import app
-from app.models import User
+from app.models import User, Recipe
+from app.maintenance import reconcile_favourite_counts
 from app.auth import create_access_token, get_password_hash
-from app.database import get_db
-
-
-@pytest.fixture
-def client():
-    """Fixture to create a FastAPI TestClient."""
-    return TestClient(app)
+from app import crud
 
 
 @pytest.fixture
@@ -27,16 +24,6 @@ def test_recipe():
     }
 
 
-@pytest.fixture
-def db_session():
-    """Fixture to provide a database session."""
-    db = next(get_db())  # Get DB session
-    try:
-        yield db
-    finally:
-        db.close()  # Ensure DB session is closed
-
-
 @pytest.fixture
 def test_user(db_session):
     """Fixture to create a test user in the database."""
@@ -79,12 +66,34 @@ def test_toggle_favorite(client: TestClient, test_recipe, auth_headers):
     # Step 2: Toggle favorite (add)
     toggle_response = client.post(f"/api/recipes/{recipe_id}/favorite", headers=auth_headers)
     assert toggle_response.status_code == 200
-    assert toggle_response.json()["message"] == "Recipe liked successfully"
+    assert toggle_response.json() == {"message": "Recipe liked successfully", "liked": True, "count": 1}
 
     # Step 3: Toggle favorite again (remove)
     toggle_response = client.post(f"/api/recipes/{recipe_id}/favorite", headers=auth_headers)
     assert toggle_response.status_code == 200
-    assert toggle_response.json()["message"] == "Recipe unliked successfully"
+    assert toggle_response.json() == {"message": "Recipe unliked successfully", "liked": False, "count": 0}
+
+    # Unknown recipes are rejected without touching the favourites table
+    assert client.post("/api/recipes/999999999/favorite", headers=auth_headers).status_code == 404
+
+
+def test_concurrent_toggles_keep_count_consistent(client: TestClient, async_session_factory, test_recipe, test_user, auth_headers):
+    """Test that racing toggles neither fail nor let the counter drift from the favourites table."""
+    recipe_id = client.post("/api/recipes/", json=test_recipe, headers=auth_headers).json()["id"]
+
+    async def toggle_many(times):
+        async def toggle():
+            async with async_session_factory() as db:
+                return await crud.toggle_favorite(db, recipe_id, test_user.id)
+        return await asyncio.gather(*(toggle() for _ in range(times)))
+
+    results = asyncio.run(toggle_many(7))
+    assert all(result["count"] in (0, 1) for result in results)
+    assert sum(result["liked"] for result in results) - sum(not result["liked"] for result in results) == 1
+
+    count_response = client.get(f"/api/recipes/{recipe_id}/favorite-count")
+    assert count_response.json()["count"] == 1
+    assert any(recipe["id"] == recipe_id for recipe in client.get("/api/users/favorites", headers=auth_headers).json())
 
 
 def test_get_favorites(client: TestClient, test_recipe, auth_headers):
@@ -130,3 +139,30 @@ def test_get_favorite_count(client: TestClient, test_recipe, auth_headers):
     count_response = client.get(f"/api/recipes/{recipe_id}/favorite-count")
     assert count_response.status_code == 200
     assert count_response.json()["count"] == 1  # Should now be 1
+
+
+def test_get_favorite_counts_batch(client: TestClient, test_recipe, auth_headers):
+    """Test fetching favourite counts for several recipes in one request."""
+    liked = client.post("/api/recipes/", json=test_recipe, headers=auth_headers).json()["id"]
+    other = client.post("/api/recipes/", json=test_recipe, headers=auth_headers).json()["id"]
+    client.post(f"/api/recipes/{liked}/favorite", headers=auth_headers)
+
+    response = client.get("/api/favorite-counts", params={"ids": [liked, other]})
+    assert response.status_code == 200
+    assert response.json()["counts"] == {str(liked): 1, str(other): 0}
+
+    response = client.get("/api/favorite-counts", params={"ids": list(range(501))})
+    assert response.status_code == 400
+
+
+def test_reconcile_favourite_counts(client: TestClient, db_session, test_recipe, auth_headers):
+    """Test rebuilding drifted favourite counters from the favourites table."""
+    recipe_id = client.post("/api/recipes/", json=test_recipe, headers=auth_headers).json()["id"]
+    client.post(f"/api/recipes/{recipe_id}/favorite", headers=auth_headers)
+
+    db_session.execute(update(Recipe).where(Recipe.id == recipe_id).values(favourite_count=42))
+    db_session.commit()
+
+    assert reconcile_favourite_counts(db_session) >= 1
+    count_response = client.get(f"/api/recipes/{recipe_id}/favorite-count")
+    assert count_response.json()["count"] == 1
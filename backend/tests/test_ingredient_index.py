@@ -0,0 +1,84 @@
+import time
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.ingredient_index import IngredientIndex, ingredient_index, signature
+from app.main import app
+
+
+def names(count: int, prefix: str = "item"):
+    return [f"{prefix} {i}" for i in range(count)]
+
+
+def test_index_estimates_jaccard_and_survives_save(tmp_path):
+    index = IngredientIndex()
+    index.upsert(1, 1, signature(names(40)))
+    index.upsert(2, 1, signature(names(40)))
+    index.upsert(3, 1, signature(names(36) + names(4, "other")))  # Jaccard 36/44
+    index.upsert(4, 1, signature(names(40, "other")))
+    assert signature([]) is None
+
+    result = dict(index.similar_to(1))
+    assert result[2] == 1.0
+    assert result[3] == pytest.approx(36 / 44, abs=0.15)
+    assert 4 not in result
+
+    # A newer version replaces the signature; an older one doesn't
+    index.upsert(2, 3, signature(names(40, "other")))
+    index.upsert(2, 2, signature(names(40)))
+    assert 2 not in dict(index.similar_to(1))
+
+    # Recipes without ingredients aren't indexed, but their version is kept
+    index.upsert(6, 2, None)
+    assert index.similar_to(6) is None
+    assert index.changes([(1, 1), (2, 3), (3, 1), (4, 1), (6, 2)]) == ([], [])
+
+    index.remove([3])
+    path = str(tmp_path / "index.npz")
+    index.save(path)
+    loaded = IngredientIndex()
+    assert loaded.load(path)
+    assert len(loaded) == 3
+    assert loaded.similar_to(4) == [(2, 1.0)]
+    assert loaded.changes([(1, 1), (2, 4), (5, 1), (6, 2)]) == ([2, 5], [4])
+    assert loaded.changes([(1, 1), (2, 3), (4, 1), (6, 3)]) == ([6], [])
+
+
+def wait_until_synced():
+    for _ in range(200):
+        if ingredient_index.ready:
+            return
+        time.sleep(0.05)
+    raise AssertionError("ingredient index was not synced")
+
+
+def test_near_duplicates_and_similar_ingredients(client: TestClient, make_headers):
+    ingredient_index.clear()
+    headers = make_headers("alice")
+    base = "\n".join(f"1 cup {name}" for name in names(12, uuid.uuid4().hex[:8]))
+    recipe = {"title": "Stew", "cuisine_type": "Irish", "cooking_time": 90, "ingredients": base, "instructions": "Simmer"}
+    first = client.post("/api/recipes/", json=recipe, headers=headers).json()
+    assert first["near_duplicates"] == []
+    # Requests never sync the index themselves; until the lifespan task has, there are no answers
+    assert client.get(f"/api/recipes/{first['id']}/similar-ingredients").status_code == 503
+
+    with TestClient(app) as client:
+        wait_until_synced()
+        second = client.post("/api/recipes/", json=recipe, headers=headers).json()
+        assert second["near_duplicates"] == [first["id"]]
+
+        # Editing the ingredients re-indexes the recipe straight away
+        changed = {**recipe, "ingredients": "2 eggs\n1 cup flour"}
+        client.put(f"/api/recipes/{second['id']}", json=changed, headers=headers)
+        response = client.get(f"/api/recipes/{first['id']}/similar-ingredients", params={"fields": "summary"})
+        assert response.status_code == 200
+        assert second["id"] not in [r["id"] for r in response.json()]
+
+        third = client.post("/api/recipes/", json=recipe, headers=headers).json()
+        response = client.get(f"/api/recipes/{third['id']}/similar-ingredients", params={"fields": "summary"})
+        assert [(r["id"], r["score"]) for r in response.json()][0] == (first["id"], 1.0)
+        assert "instructions" not in response.json()[0]
+
+        assert client.get("/api/recipes/999999999/similar-ingredients").status_code == 404
@@ -0,0 +1,145 @@
+import uuid
+import pytest
+from fastapi.testclient import TestClient
+from datetime import timedelta
+from sqlalchemy import delete
+
+from app.main import app
+from app.models import User, RecipeIngredient
+from app.ingredients import parse_ingredient, parse_ingredients
+from app.maintenance import backfill_recipe_ingredients
+from app.auth import create_access_token, get_password_hash
+from app.database import get_db
+
+
+def unique_word(prefix):
+    # Ingredient names are alphabetic, so map the uuid digits to letters
+    return prefix + uuid.uuid4().hex[:8].translate(str.maketrans("0123456789", "ghijklmnop"))
+
+
+@pytest.fixture
+def client():
+    """Fixture to create a FastAPI TestClient."""
+    return TestClient(app)
+
+
+@pytest.fixture
+def db_session():
+    """Fixture to provide a database session."""
+    db = next(get_db())
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+@pytest.fixture
+def auth_headers(db_session):
+    """Fixture to generate authentication headers for a test user."""
+    user = db_session.query(User).filter(User.email == "testuser@example.com").first()
+    if not user:
+        user = User(
+            username="testuser",
+            email="testuser@example.com",
+            hashed_password=get_password_hash("password1")
+        )
+        db_session.add(user)
+        db_session.commit()
+    access_token = create_access_token(data={"sub": user.email}, expires_delta=timedelta(minutes=30))
+    return {"Authorization": f"Bearer {access_token}"}
+
+
+def test_parse_ingredient():
+    ingredient = parse_ingredient("1 1/2 cups Fresh Tomatoes")
+    assert (ingredient.name, ingredient.quantity, ingredient.unit) == ("tomato", 1.5, "cup")
+    ingredient = parse_ingredient("½ tsp salt")
+    assert (ingredient.name, ingredient.quantity, ingredient.unit) == ("salt", 0.5, "tsp")
+    assert [i.name for i in parse_ingredients("2 cloves garlic; 200g spaghetti\nOlive oil")] == [
+        "garlic", "spaghetti", "olive oil"
+    ]
+
+
+def test_recipes_by_ingredient(client: TestClient, auth_headers):
+    marker = unique_word("saffron")
+    recipe = {
+        "title": "Paella",
+        "cuisine_type": "Spanish",
+        "cooking_time": 45,
+        "ingredients": f"300g rice, 1 pinch {marker}, 2 cloves garlic",
+        "instructions": "Cook slowly",
+    }
+    created = client.post("/api/recipes/", json=recipe, headers=auth_headers).json()
+
+    response = client.get(f"/api/ingredients/{marker.capitalize()}/recipes")
+    assert response.status_code == 200
+    assert [r["id"] for r in response.json()] == [created["id"]]
+
+    parsed = client.get(f"/api/recipes/{created['id']}/ingredients").json()
+    assert [(i["name"], i["quantity"], i["unit"]) for i in parsed] == [
+        ("rice", 300.0, "g"), (marker, 1.0, "pinch"), ("garlic", 2.0, "clove")
+    ]
+
+    # Editing the ingredient text keeps the reverse index in sync
+    recipe["ingredients"] = "300g rice, 2 cloves garlic"
+    client.put(f"/api/recipes/{created['id']}", json=recipe, headers=auth_headers)
+    assert client.get(f"/api/ingredients/{marker}/recipes").json() == []
+
+    client.delete(f"/api/recipes/{created['id']}", headers=auth_headers)
+    assert client.get(f"/api/recipes/{created['id']}/ingredients").status_code == 404
+
+
+def test_backfill_recipe_ingredients(client: TestClient, auth_headers, db_session):
+    marker = unique_word("sumac")
+    recipe = {
+        "title": "Fattoush",
+        "cuisine_type": "Lebanese",
+        "cooking_time": 15,
+        "ingredients": f"1 tsp {marker}, 2 tomatoes",
+        "instructions": "Toss",
+    }
+    created = client.post("/api/recipes/", json=recipe, headers=auth_headers).json()
+    db_session.execute(delete(RecipeIngredient).where(RecipeIngredient.recipe_id == created["id"]))
+    db_session.commit()
+    assert client.get(f"/api/ingredients/{marker}/recipes").json() == []
+
+    assert backfill_recipe_ingredients(db_session, batch_size=2) >= 1
+    assert [r["id"] for r in client.get(f"/api/ingredients/{marker}/recipes").json()] == [created["id"]]
+
+
+def test_shopping_list(client: TestClient, auth_headers):
+    base = {"cuisine_type": "Italian", "cooking_time": 20, "instructions": "Cook"}
+    pasta = client.post("/api/recipes/", headers=auth_headers, json={
+        **base, "title": "Pasta", "ingredients": "200g spaghetti, 2 cloves garlic, 1 tbsp olive oil"
+    }).json()
+    bread = client.post("/api/recipes/", headers=auth_headers, json={
+        **base, "title": "Garlic bread", "ingredients": "1 clove garlic, 1 cup olive oil, bread"
+    }).json()
+    empty = client.post("/api/recipes/", headers=auth_headers, json={**base, "title": "Water", "ingredients": ""}).json()
+
+    body = {"items": [
+        {"recipe_id": pasta["id"], "servings": 2}, {"recipe_id": bread["id"]}, {"recipe_id": empty["id"]},
+        {"recipe_id": 999999},
+    ]}
+    response = client.post("/api/shopping-list", json=body, headers=auth_headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["missing"] == [999999]
+    assert data["recipe_ids"] == [pasta["id"], bread["id"], empty["id"]]
+    items = {(item["name"], item["unit"]): item for item in data["items"]}
+    assert items[("garlic", "clove")]["quantity"] == 5
+    assert items[("spaghetti", "g")]["quantity"] == 400
+    assert items[("olive oil", "ml")]["quantity"] == round(2 * 14.7868 + 236.588, 2)
+    assert items[("olive oil", "ml")]["recipe_ids"] == [pasta["id"], bread["id"]]
+    assert items[("bread", None)]["quantity"] is None
+
+    # Lists are built from recipe_ingredients, which edits keep in step
+    client.put(f"/api/recipes/{bread['id']}", headers=auth_headers, json={
+        **base, "title": "Garlic bread", "ingredients": "3 cloves garlic, bread"
+    })
+    items = {(item["name"], item["unit"]): item for item in
+             client.post("/api/shopping-list", json=body, headers=auth_headers).json()["items"]}
+    assert items[("garlic", "clove")]["quantity"] == 7
+    assert items[("olive oil", "ml")]["recipe_ids"] == [pasta["id"]]
+
+    assert client.post("/api/shopping-list", json={}, headers=auth_headers).status_code == 400
+    assert client.post("/api/shopping-list", json=body).status_code == 401
@@ -0,0 +1,65 @@
+import uuid
+
+from fastapi.testclient import TestClient
+
+from app.leaderboard import Leaderboard, leaderboard
+
+
+def test_leaderboard_orders_and_truncates():
+    board = Leaderboard(size=3, rebuild_interval=300)
+    board.update(1, "Thai", 5)
+    assert board.top(10) == []  # Nothing is tracked before the first rebuild
+
+    board.finish_rebuild([(1, "Thai", 5), (2, "Thai", 3), (3, "French", 3), (4, "French", 1)])
+    assert board.top(10) == [(1, 5), (2, 3), (3, 3)]
+    assert board.top(10, "French") == [(3, 3), (4, 1)]
+
+    board.update(4, "French", 4)
+    board.update(1, "Thai", 0)
+    # 4 pushed 3 out of the full overall ranking; it comes back with the next rebuild
+    assert board.top(10) == [(4, 4), (2, 3)]
+    assert board.top(1, "Thai") == [(2, 3)]
+
+    # A recipe moved to another cuisine leaves its old ranking
+    board.update(2, "French", 3)
+    assert board.top(10, "Thai") == []
+    assert board.top(10, "French") == [(4, 4), (2, 3), (3, 3)]
+
+
+def test_leaderboard_replays_toggles_made_during_rebuild():
+    board = Leaderboard(size=10, rebuild_interval=300)
+    assert board.needs_rebuild()
+    board.start_rebuild()
+    board.update(7, "Thai", 2)
+    board.finish_rebuild([(7, "Thai", 1), (8, "Thai", 1)])
+    assert board.top(10) == [(7, 2), (8, 1)]
+    assert not board.needs_rebuild()
+
+
+def test_read_popular_recipes(client: TestClient, make_headers):
+    leaderboard.clear()
+    alice, bob = make_headers("alice"), make_headers("bob")
+    cuisine = f"Popular {uuid.uuid4().hex[:8]}"
+    recipe = {"title": "Pho", "cuisine_type": cuisine, "cooking_time": 60, "ingredients": "noodles", "instructions": "Simmer"}
+    first, second, third = (client.post("/api/recipes/", json=recipe, headers=alice).json()["id"] for _ in range(3))
+    client.post(f"/api/recipes/{first}/favorite", headers=alice)
+    client.post(f"/api/recipes/{second}/favorite", headers=alice)
+    client.post(f"/api/recipes/{second}/favorite", headers=bob)
+
+    response = client.get("/api/recipes/popular", params={"cuisine_type": cuisine, "fields": "summary"})
+    assert response.status_code == 200
+    assert [(r["id"], r["favourite_count"]) for r in response.json()] == [(second, 2), (first, 1)]
+    assert "instructions" not in response.json()[0]
+    rebuilds = leaderboard.rebuilds
+
+    # Later toggles move the ranking without another rebuild
+    client.post(f"/api/recipes/{second}/favorite", headers=bob)
+    client.post(f"/api/recipes/{third}/favorite", headers=bob)
+    response = client.get("/api/recipes/popular", params={"cuisine_type": cuisine, "limit": 2})
+    assert [(r["id"], r["favourite_count"]) for r in response.json()] == [(first, 1), (second, 1)]
+    assert leaderboard.rebuilds == rebuilds
+
+    client.delete(f"/api/recipes/{first}", headers=alice)
+    response = client.get("/api/recipes/popular", params={"cuisine_type": cuisine})
+    assert [r["id"] for r in response.json()] == [second, third]
+    assert client.get("/api/recipes/popular", params={"limit": 101}).status_code == 422
@@ -0,0 +1,94 @@
+import pytest
+from fastapi.testclient import TestClient
+from datetime import timedelta
+from sqlalchemy import event
+
+from app.main import app
+from app.models import User
+from app.auth import create_access_token, get_password_hash
+from app.database import Base, async_engine, engine, get_db
+
+
+@pytest.fixture
+def client():
+    """Fixture to create a FastAPI TestClient."""
+    Base.metadata.create_all(bind=engine)
+    return TestClient(app)
+
+
+@pytest.fixture
+def auth_headers(client):
+    """Fixture to generate authentication headers for a dedicated planner user."""
+    db = next(get_db())
+    try:
+        user = db.query(User).filter(User.email == "planner@example.com").first()
+        if not user:
+            user = User(username="planner", email="planner@example.com", hashed_password=get_password_hash("password1"))
+            db.add(user)
+            db.commit()
+    finally:
+        db.close()
+    access_token = create_access_token(data={"sub": "planner@example.com"}, expires_delta=timedelta(minutes=30))
+    return {"Authorization": f"Bearer {access_token}"}
+
+
+@pytest.fixture
+def recipe_ids(client, auth_headers):
+    ids = []
+    for title in ("Porridge", "Soup", "Curry"):
+        recipe = {
+            "title": title,
+            "cuisine_type": "Any",
+            "cooking_time": 10,
+            "ingredients": "water",
+            "instructions": "Cook",
+        }
+        ids.append(client.post("/api/recipes/", json=recipe, headers=auth_headers).json()["id"])
+    return ids
+
+
+def test_meal_plan_bulk_upsert_and_range(client: TestClient, auth_headers, recipe_ids):
+    porridge, soup, curry = recipe_ids
+    week = [f"2031-03-{day:02d}" for day in range(3, 10)]
+    entries = [
+        {"date": day, "slot": slot, "recipe_id": recipe_id}
+        for day in week
+        for slot, recipe_id in (("breakfast", porridge), ("lunch", soup), ("dinner", curry))
+    ]
+    response = client.put("/api/meal-plan", json={"entries": entries}, headers=auth_headers)
+    assert response.status_code == 200
+    assert len(response.json()) == 21
+
+    # Overwrite one slot and clear another in the same request
+    update = [
+        {"date": week[0], "slot": "dinner", "recipe_id": soup},
+        {"date": week[1], "slot": "lunch", "recipe_id": None},
+    ]
+    assert client.put("/api/meal-plan", json={"entries": update}, headers=auth_headers).status_code == 200
+
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(async_engine.sync_engine, "before_cursor_execute", listener)
+    try:
+        response = client.get(f"/api/meal-plan?start={week[0]}", headers=auth_headers)
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", listener)
+    assert response.status_code == 200
+    # Recipes come back joined, not one query per entry
+    assert len([sql for sql in statements if "meal_plans" in sql or "recipes" in sql]) == 1
+
+    plan = response.json()
+    assert len(plan) == 20
+    assert [(entry["slot"], entry["recipe"]["title"]) for entry in plan[:3]] == [
+        ("breakfast", "Porridge"), ("lunch", "Soup"), ("dinner", "Soup")
+    ]
+    assert [entry["slot"] for entry in plan if entry["date"] == week[1]] == ["breakfast", "dinner"]
+
+
+def test_meal_plan_validation(client: TestClient, auth_headers):
+    missing = {"entries": [{"date": "2031-04-01", "slot": "lunch", "recipe_id": 999999}]}
+    assert client.put("/api/meal-plan", json=missing, headers=auth_headers).status_code == 404
+    bad_slot = {"entries": [{"date": "2031-04-01", "slot": "brunch", "recipe_id": None}]}
+    assert client.put("/api/meal-plan", json=bad_slot, headers=auth_headers).status_code == 422
+    assert client.get("/api/meal-plan?start=2031-01-01&end=2031-06-01", headers=auth_headers).status_code == 400
+    assert client.get("/api/meal-plan?start=2031-01-01").status_code == 401
@@ -0,0 +1,53 @@
+import re
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+
+@pytest.fixture
+def client():
+    """Fixture to create a FastAPI TestClient."""
+    return TestClient(app)
+
+
+def sample(text: str, name: str, **labels) -> float:
+    """Value of one series from a Prometheus exposition."""
+    for line in text.splitlines():
+        match = re.match(r"^(\w+)(?:\{(.*)\})? (\S+)$", line)
+        if not match or match.group(1) != name:
+            continue
+        found = dict(re.findall(r'(\w+)="((?:[^"\\]|\\.)*)"', match.group(2) or ""))
+        if all(found.get(key) == value for key, value in labels.items()):
+            return float(match.group(3))
+    return 0.0
+
+
+def test_metrics_endpoint(client: TestClient):
+    before = client.get("/metrics").text
+    route = {"method": "GET", "route": "/api/recipes/{recipe_id}"}
+    requests_before = sample(before, "flavour_fusion_http_requests_total", status="404", **route)
+    db_count_before = sample(before, "flavour_fusion_http_request_db_seconds_count", **route)
+
+    assert client.get("/api/recipes/999999").status_code == 404
+    client.get("/api/does-not-exist")
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = response.text
+
+    # Series are keyed by route template, not by the raw path
+    assert sample(text, "flavour_fusion_http_requests_total", status="404", **route) == requests_before + 1
+    assert sample(text, "flavour_fusion_http_request_db_seconds_count", **route) == db_count_before + 1
+    assert sample(text, "flavour_fusion_http_request_db_queries_total", **route) >= 1
+    assert sample(text, "flavour_fusion_http_request_duration_seconds_bucket", le="+Inf", **route) >= 1
+    assert sample(text, "flavour_fusion_http_response_size_bytes_sum", **route) > 0
+    assert sample(text, "flavour_fusion_http_requests_total", route="<unmatched>", status="404") >= 1
+    assert "999999" not in text
+
+    assert "# TYPE flavour_fusion_http_requests_in_flight gauge" in text
+    assert "# TYPE flavour_fusion_db_pool_checkout_wait_seconds histogram" in text
+    assert 'flavour_fusion_cache_hits_total{cache="principal"}' in text
+    assert "flavour_fusion_password_hash_rejected_total" in text
+    assert "# TYPE flavour_fusion_admission_rejected_total counter" in text
@@ -0,0 +1,55 @@
+from pathlib import Path
+
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from sqlalchemy import create_engine, text
+
+from app.models import Base
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+
+def test_migrations_match_models(tmp_path):
+    url = f"sqlite:///{tmp_path / 'migrations.db'}"
+    config = Config(BACKEND_DIR / "alembic.ini")
+    config.set_main_option("script_location", str(BACKEND_DIR / "migrations"))
+    config.set_main_option("sqlalchemy.url", url)
+    command.upgrade(config, "head")
+
+    engine = create_engine(url)
+    with engine.connect() as connection:
+        context = MigrationContext.configure(
+            connection, opts={"include_object": lambda obj, name, type_, *_: not name.startswith("recipes_fts")}
+        )
+        assert compare_metadata(context, Base.metadata) == []
+    engine.dispose()
+
+    command.downgrade(config, "base")
+
+
+def test_upgrade_database_built_before_migrations(tmp_path):
+    url = f"sqlite:///{tmp_path / 'legacy.db'}"
+    config = Config(BACKEND_DIR / "alembic.ini")
+    config.set_main_option("script_location", str(BACKEND_DIR / "migrations"))
+    config.set_main_option("sqlalchemy.url", url)
+    # What create_all built before migrations: the baseline tables, no alembic_version
+    command.upgrade(config, "0001")
+    engine = create_engine(url)
+    with engine.begin() as connection:
+        connection.execute(text("DROP TABLE alembic_version"))
+        connection.execute(text("INSERT INTO users VALUES (1, 'cook', 'cook@example.com', 'x')"))
+        connection.execute(text(
+            "INSERT INTO recipes (id, title, cuisine_type, cooking_time, ingredients, instructions, user_id) "
+            "VALUES (1, 'Garlic soup', 'French', 30, 'garlic', 'Simmer', 1), (2, 'Toast', 'British', 5, 'bread', 'Toast', 1)"
+        ))
+        connection.execute(text("INSERT INTO favourites VALUES (1, 1)"))
+
+    command.upgrade(config, "head")
+    with engine.connect() as connection:
+        rows = connection.execute(text("SELECT id, favourite_count, version FROM recipes ORDER BY id")).all()
+        assert [tuple(row) for row in rows] == [(1, 1, 1), (2, 0, 1)]
+        found = connection.execute(text("SELECT rowid FROM recipes_fts WHERE recipes_fts MATCH 'garlic'")).all()
+        assert [row[0] for row in found] == [1]
+    engine.dispose()
@@ -1,13 +1,23 @@
+import asyncio
+import csv
+import gzip
+import io
+import json
+import uuid
 import pytest
+from fastapi import HTTPException
 from fastapi.testclient import TestClient
 from datetime import timedelta
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import Session
 
+from app import crud
 from app.main import app
 from app.models import User, Recipe
 from app.schemas import RecipeCreate
-from app.auth import create_access_token, get_password_hash
-from app.database import get_db
+from app.auth import Principal, create_access_token, get_password_hash
+from app.database import AsyncSessionLocal, get_db
+from app.pagination import encode_cursor
 
 
 @pytest.fixture
@@ -127,6 +137,28 @@ def test_update_recipe(client: TestClient, test_recipe, auth_headers):
     assert data["instructions"] == updated_recipe["instructions"]
 
 
+def test_concurrent_recipe_edits_conflict(client: TestClient, test_recipe, test_user, auth_headers):
+    """Test that an edit or delete based on an outdated copy gets a 409 instead of a 500."""
+    recipe_id = client.post("/api/recipes/", json=test_recipe, headers=auth_headers).json()["id"]
+    principal = Principal(id=test_user.id, email=test_user.email, username=test_user.username)
+
+    def edit(db, title):
+        return crud.update_recipe(db, recipe_id, RecipeCreate(**{**test_recipe, "title": title}), principal)
+
+    async def write_from_stale_copy(write):
+        async with AsyncSessionLocal() as stale, AsyncSessionLocal() as fresh:
+            # Held, so the session's identity map keeps serving this copy
+            outdated = await stale.get(Recipe, recipe_id)  # noqa: F841
+            await edit(fresh, f"Changed {uuid.uuid4().hex[:8]}")
+            with pytest.raises(HTTPException) as conflict:
+                await write(stale)
+        return conflict.value.status_code
+
+    assert asyncio.run(write_from_stale_copy(lambda db: edit(db, "Lost update"))) == 409
+    assert asyncio.run(write_from_stale_copy(lambda db: crud.delete_recipe(db, recipe_id, principal))) == 409
+    assert client.get(f"/api/recipes/{recipe_id}").json()["title"].startswith("Changed ")
+
+
 def test_delete_recipe(client: TestClient, test_recipe, auth_headers):
     """Test deleting a recipe."""
     # First, create a recipe
@@ -143,3 +175,287 @@ def test_delete_recipe(client: TestClient, test_recipe, auth_headers):
     assert get_response.status_code == 404
     assert get_response.json()["detail"] == "Recipe not found"
 
+
+
+def test_database_errors_are_not_echoed(client: TestClient, monkeypatch):
+    """Test that a failed query gives a generic 500 instead of the SQL."""
+    async def broken(*args, **kwargs):
+        raise OperationalError("SELECT secret FROM recipes", {}, Exception("disk I/O error"))
+    monkeypatch.setattr(crud, "get_recipe", broken)
+    monkeypatch.setattr(crud, "search_recipes", broken)
+
+    for url, params in (("/api/recipes/1", {}), ("/api/recipes/search", {"q": "garlic"})):
+        response = client.get(url, params=params)
+        assert response.status_code == 500
+        assert response.json() == {"detail": "Database error"}
+
+
+def test_read_recipes_keyset_pagination(client: TestClient, test_recipe, auth_headers):
+    """Test paging through recipes with the opaque next cursor."""
+    created = []
+    for cooking_time in (50, 10, 50):
+        response = client.post(
+            "/api/recipes/", json={**test_recipe, "cooking_time": cooking_time}, headers=auth_headers
+        )
+        assert response.status_code == 200
+        created.append(response.json()["id"])
+
+    seen = []
+    params = {"limit": 2, "sort": "cooking_time"}
+    while True:
+        response = client.get("/api/recipes/", params=params)
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page) <= 2
+        seen.extend(page)
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+        params["cursor"] = cursor
+
+    keys = [(recipe["cooking_time"], recipe["id"]) for recipe in seen]
+    assert keys == sorted(keys)
+    assert len({recipe["id"] for recipe in seen}) == len(seen)
+    assert set(created) <= {recipe["id"] for recipe in seen}
+
+
+def test_read_recipes_invalid_cursor(client: TestClient):
+    response = client.get("/api/recipes/", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+    response = client.get("/api/recipes/", params={"sort": "instructions"})
+    assert response.status_code == 400
+
+    # Well-formed cursors whose values don't fit the sort key are rejected the same way
+    for sort, value, last_id in (
+        ("title", {"a": 1}, 1),
+        ("title", 5, 1),
+        ("cooking_time", [1], 1),
+        ("cooking_time", "10", 1),
+        ("cooking_time", 10**30, 1),
+        ("id", None, 10**30),
+        ("id", None, True),
+    ):
+        response = client.get("/api/recipes/", params={"sort": sort, "cursor": encode_cursor(sort, value, last_id)})
+        assert response.status_code == 400, (sort, value, last_id)
+        assert response.json()["detail"] == "Invalid cursor"
+
+
+def test_search_recipes(client: TestClient, test_recipe, auth_headers):
+    """Test ranked ingredient search stays in sync with create, update and delete."""
+    garlic = client.post(
+        "/api/recipes/",
+        json={**test_recipe, "title": "Garlic Prawns", "ingredients": "prawns, garlic, chilli flakes"},
+        headers=auth_headers,
+    ).json()
+    pesto = client.post(
+        "/api/recipes/",
+        json={**test_recipe, "title": "Pesto", "ingredients": "basil, garlic, pine nuts, olive oil"},
+        headers=auth_headers,
+    ).json()
+
+    response = client.get("/api/recipes/search", params={"q": "garlic, olive oil"})
+    assert response.status_code == 200
+    ids = [recipe["id"] for recipe in response.json()]
+    assert pesto["id"] in ids
+    assert garlic["id"] not in ids
+
+    response = client.get("/api/recipes/search", params={"q": "chilli flakes, pine nuts", "match": "any"})
+    ids = [recipe["id"] for recipe in response.json()]
+    assert {garlic["id"], pesto["id"]} <= set(ids)
+
+    client.put(
+        f"/api/recipes/{pesto['id']}",
+        json={**test_recipe, "title": "Pesto", "ingredients": "basil, walnuts"},
+        headers=auth_headers,
+    )
+    client.delete(f"/api/recipes/{garlic['id']}", headers=auth_headers)
+    ids = [recipe["id"] for recipe in client.get("/api/recipes/search", params={"q": "garlic"}).json()]
+    assert garlic["id"] not in ids
+    assert pesto["id"] not in ids
+
+    assert client.get("/api/recipes/search", params={"q": " , "}).status_code == 400
+
+
+def test_read_recipe_conditional_get(client: TestClient, test_recipe, auth_headers):
+    """Test that a matching If-None-Match gets a 304 until the recipe changes."""
+    recipe_id = client.post("/api/recipes/", json=test_recipe, headers=auth_headers).json()["id"]
+
+    response = client.get(f"/api/recipes/{recipe_id}")
+    etag = response.headers["ETag"]
+    response = client.get(f"/api/recipes/{recipe_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert response.content == b""
+
+    client.put(f"/api/recipes/{recipe_id}", json={**test_recipe, "title": "Changed"}, headers=auth_headers)
+    response = client.get(f"/api/recipes/{recipe_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert response.json()["title"] == "Changed"
+
+
+def test_read_recipes_conditional_get(client: TestClient, test_recipe, auth_headers):
+    """Test list ETags change when a recipe on the page is edited."""
+    client.post("/api/recipes/", json=test_recipe, headers=auth_headers)
+    params = {"limit": 1000}
+    response = client.get("/api/recipes/", params=params)
+    etag = response.headers["ETag"]
+    last_id = response.json()[-1]["id"]
+
+    response = client.get("/api/recipes/", params=params, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+    client.put(f"/api/recipes/{last_id}", json={**test_recipe, "title": "Edited"}, headers=auth_headers)
+    response = client.get("/api/recipes/", params=params, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+def test_import_recipes_ndjson(client: TestClient, test_recipe, auth_headers):
+    """Test a streamed NDJSON import reports bad rows and keeps the good ones."""
+    lines = [
+        json.dumps({**test_recipe, "title": "Imported 1"}),
+        "{not json",
+        json.dumps({**test_recipe, "cooking_time": "soon"}),
+        "",
+        json.dumps({**test_recipe, "title": "Imported 2"}),
+    ]
+
+    def body():
+        for line in lines:
+            yield (line + "\n").encode()
+
+    response = client.post(
+        "/api/recipes/import", params={"batch_size": 1}, content=body(),
+        headers={**auth_headers, "Content-Type": "application/x-ndjson"},
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["imported"] == 2
+    assert data["failed"] == 2
+    assert data["batches"] == 2
+    assert [error["row"] for error in data["errors"]] == [2, 3]
+
+
+def test_import_recipes_csv(client: TestClient, test_recipe, auth_headers):
+    """Test CSV import with a quoted multi-line field."""
+    body = (
+        "title,cuisine_type,cooking_time,ingredients,instructions\n"
+        'CSV Soup,French,20,"onion, stock","Chop.\nSimmer, then serve."\n'
+        "Bad Row,French,20\n"
+    )
+    response = client.post(
+        "/api/recipes/import", content=body.encode(), headers={**auth_headers, "Content-Type": "text/csv"}
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["imported"] == 1
+    assert data["errors"] == [{"row": 2, "error": "Expected 5 fields, got 3"}]
+
+    results = client.get("/api/recipes/search", params={"q": "CSV Soup"}).json()
+    assert results[0]["instructions"] == "Chop.\nSimmer, then serve."
+
+
+def test_export_recipes(client: TestClient, test_recipe, auth_headers, test_user):
+    """Test streaming a user's recipes as NDJSON, gzipped NDJSON and CSV."""
+    created = client.post("/api/recipes/", json=test_recipe, headers=auth_headers).json()
+
+    assert client.get("/api/recipes/export").status_code == 401
+    response = client.get("/api/recipes/export", params={"user_id": test_user.id}, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert created["id"] in [row["id"] for row in rows]
+    assert {row["user_id"] for row in rows} == {test_user.id}
+
+    response = client.get("/api/recipes/export", params={"user_id": test_user.id, "gzip": True}, headers=auth_headers)
+    assert response.headers["content-type"] == "application/gzip"
+    assert gzip.decompress(response.content).decode().splitlines() == [
+        json.dumps(row) for row in rows
+    ]
+
+    response = client.get("/api/recipes/export", params={"user_id": test_user.id, "format": "csv"}, headers=auth_headers)
+    records = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(records) == len(rows)
+    assert records[-1]["title"] == rows[-1]["title"]
+
+
+def test_read_recipes_filters(client: TestClient, test_recipe, auth_headers, test_user):
+    cuisine = f"Filtered {uuid.uuid4().hex[:8]}"
+    for cooking_time in (10, 25, 45, 90):
+        client.post(
+            "/api/recipes/", json={**test_recipe, "cuisine_type": cuisine, "cooking_time": cooking_time},
+            headers=auth_headers
+        )
+
+    response = client.get("/api/recipes/", params={"cuisine_type": cuisine})
+    assert [r["cooking_time"] for r in response.json()] == [10, 25, 45, 90]
+
+    params = {"cuisine_type": cuisine, "min_cooking_time": 20, "max_cooking_time": 60, "sort": "cooking_time"}
+    response = client.get("/api/recipes/", params=params)
+    assert [r["cooking_time"] for r in response.json()] == [25, 45]
+
+    response = client.get("/api/recipes/", params={**params, "user_id": test_user.id + 1000})
+    assert response.json() == []
+
+    response = client.get("/api/recipes/", params={"min_cooking_time": 60, "max_cooking_time": 30})
+    assert response.status_code == 400
+
+
+def test_read_recipe_facets(client: TestClient, test_recipe, auth_headers):
+    from app.facets import facet_cache
+
+    cuisine = f"Faceted {uuid.uuid4().hex[:8]}"
+    for cooking_time in (5, 20, 30, 120):
+        client.post(
+            "/api/recipes/", json={**test_recipe, "cuisine_type": cuisine, "cooking_time": cooking_time},
+            headers=auth_headers
+        )
+    facet_cache.clear()
+
+    response = client.get("/api/recipes/facets", params={"cuisine_type": cuisine})
+    assert response.status_code == 200
+    facets = response.json()
+    assert facets["total"] == 4
+    assert facets["cuisine_types"] == [{"value": cuisine, "count": 4}]
+    assert {f["bucket"]: f["count"] for f in facets["cooking_times"]} == {
+        "under_15": 1, "15_to_30": 2, "31_to_60": 0, "over_60": 1
+    }
+
+    # Served from the cache until the TTL expires
+    client.post("/api/recipes/", json={**test_recipe, "cuisine_type": cuisine}, headers=auth_headers)
+    assert client.get("/api/recipes/facets", params={"cuisine_type": cuisine}).json()["total"] == 4
+
+
+def test_read_recipes_sparse_fields(client: TestClient, test_recipe, auth_headers):
+    cuisine = f"Sparse {uuid.uuid4().hex[:8]}"
+    for cooking_time in (40, 10, 25):
+        client.post(
+            "/api/recipes/", json={**test_recipe, "cuisine_type": cuisine, "cooking_time": cooking_time},
+            headers=auth_headers
+        )
+
+    response = client.get("/api/recipes/", params={"cuisine_type": cuisine, "fields": "summary"})
+    assert response.status_code == 200
+    assert all(set(r) == {"id", "title", "cuisine_type", "cooking_time", "user_id"} for r in response.json())
+
+    # id always comes back; the sort key still drives cursors when it isn't selected
+    params = {"cuisine_type": cuisine, "fields": "title", "sort": "cooking_time", "limit": 2}
+    first = client.get("/api/recipes/", params=params)
+    assert [set(r) for r in first.json()] == [{"id", "title"}] * 2
+    second = client.get("/api/recipes/", params={**params, "cursor": first.headers["X-Next-Cursor"]})
+    assert len(second.json()) == 1
+
+    full = client.get("/api/recipes/", params={"cuisine_type": cuisine})
+    assert full.json()[0]["instructions"] == test_recipe["instructions"]
+    assert full.headers["ETag"] != client.get(
+        "/api/recipes/", params={"cuisine_type": cuisine, "fields": "summary"}
+    ).headers["ETag"]
+
+    search = client.get("/api/recipes/search", params={"q": "test ingredient", "fields": "summary"})
+    assert search.status_code == 200
+    assert "ingredients" not in search.json()[0]
+
+    assert client.get("/api/recipes/", params={"fields": "title,password"}).status_code == 400
+    assert client.get("/api/users/favorites", params={"fields": "summary"}, headers=auth_headers).status_code == 200
@@ -0,0 +1,47 @@
+import math
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app.models import Recipe
+from app.recommendations import FavouritesMatrix, rebuild_similarities, refresh_similarities
+
+
+def test_cosine_similarities():
+    pairs = np.array([(1, 10), (1, 11), (2, 10), (2, 11), (3, 10), (3, 12)])
+    matrix = FavouritesMatrix(pairs)
+    rows = {recipe_id: dict(zip(ids.tolist(), scores.tolist()))
+            for recipe_id, ids, scores in matrix.similarities(np.arange(3), batch_size=2)}
+    assert rows[10] == pytest.approx({11: 2 / math.sqrt(6), 12: 1 / math.sqrt(3)})
+    assert rows[11] == pytest.approx({10: 2 / math.sqrt(6)})
+    assert list(rows[12]) == [10]
+
+
+def test_similar_recipes_and_recommendations(client: TestClient, db_session, make_headers):
+    alice, bob, carol = (make_headers(name) for name in ("alice", "bob", "carol"))
+    recipe = {"title": "Laksa", "cuisine_type": "Malaysian", "cooking_time": 40, "ingredients": "noodles", "instructions": "Simmer"}
+    a, b, c = (client.post("/api/recipes/", json=recipe, headers=alice).json()["id"] for _ in range(3))
+    for headers, liked in ((alice, (a, b)), (bob, (a, c)), (carol, (b,))):
+        for recipe_id in liked:
+            client.post(f"/api/recipes/{recipe_id}/favorite", headers=headers)
+    rebuild_similarities(db_session)
+
+    response = client.get(f"/api/recipes/{a}/similar", params={"fields": "summary"})
+    assert response.status_code == 200
+    assert [(r["id"], r["score"]) for r in response.json()] == [(c, 0.7071), (b, 0.5)]
+    assert "instructions" not in response.json()[0]
+
+    # carol liked b, which alice also liked alongside a
+    response = client.get("/api/users/recommendations", headers=carol)
+    assert [r["id"] for r in response.json()] == [a]
+
+    # Toggles only flag recipes; a refresh recomputes them without a full rebuild
+    client.post(f"/api/recipes/{c}/favorite", headers=bob)
+    db_session.expire_all()
+    assert db_session.get(Recipe, c).similarities_stale
+    assert refresh_similarities(db_session) == 1
+    assert [r["id"] for r in client.get(f"/api/recipes/{a}/similar").json()] == [b]
+    assert client.get(f"/api/recipes/{c}/similar").json() == []
+
+    assert client.get("/api/recipes/999999999/similar").status_code == 404
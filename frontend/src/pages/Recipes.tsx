@@ -29,35 +29,37 @@ const Recipes = () => {
   
       const data = await response.json();
   
-      // Fetch likes count and user like status for each recipe
-      const recipesWithLikes = await Promise.all(
-        data.map(async (recipe) => {
-          const likeResponse = await fetch(
-            `http://localhost:8000/api/recipes/${recipe.id}/favorite-count`
-          );
-          const likeData = await likeResponse.json();
-  
-          // Check if the logged-in user has liked this recipe
-          const userLikesResponse = await fetch(
-            `http://localhost:8000/api/users/favorites`,
-            {
-              headers: {
-                Authorization: `Bearer ${localStorage.getItem("token")}`,
-                "Content-Type": "application/json",
-              },
-            }
-          );
-          const userLikes = await userLikesResponse.json();
-          const userHasLiked = userLikes.some((fav: any) => fav.id === recipe.id);
-  
-          return {
-            ...recipe,
-            id: Number(recipe.id), // Ensure ID is a number
-            likes: likeData.count || 0, // Ensure likes count is available
-            userHasLiked, // Boolean to track if user liked this recipe
-          };
-        })
+      // Fetch like counts for every recipe in one batch request; the endpoint
+      // rejects an empty id list, so an empty page skips it
+      let counts: Record<number, number> = {};
+      if (data.length > 0) {
+        const ids = new URLSearchParams();
+        data.forEach((recipe) => ids.append("ids", String(recipe.id)));
+        const countsResponse = await fetch(
+          `http://localhost:8000/api/favorite-counts?${ids.toString()}`
+        );
+        ({ counts } = await countsResponse.json());
+      }
+
+      // Check which recipes the logged-in user has liked
+      const userLikesResponse = await fetch(
+        `http://localhost:8000/api/users/favorites`,
+        {
+          headers: {
+            Authorization: `Bearer ${localStorage.getItem("token")}`,
+            "Content-Type": "application/json",
+          },
+        }
       );
+      const userLikes = userLikesResponse.ok ? await userLikesResponse.json() : [];
+      const likedIds = new Set(userLikes.map((fav: any) => fav.id));
+
+      const recipesWithLikes = data.map((recipe) => ({
+        ...recipe,
+        id: Number(recipe.id), // Ensure ID is a number
+        likes: counts[recipe.id] || 0, // Ensure likes count is available
+        userHasLiked: likedIds.has(recipe.id), // Boolean to track if user liked this recipe
+      }));
   
       return recipesWithLikes;
     },
@@ -94,16 +96,11 @@ const Recipes = () => {
         );
       });
     },
-    onSuccess: async (_, recipeId) => {
-      // Fetch updated like count
-      const response = await fetch(
-        `http://localhost:8000/api/recipes/${recipeId}/favorite-count`
-      );
-      const data = await response.json();
-  
+    onSuccess: (data: { liked: boolean; count: number }, recipeId) => {
+      // The toggle response carries the new state and count
       queryClient.setQueryData(["allRecipes"], (oldRecipes: Recipe[]) => {
         return oldRecipes.map((recipe) =>
-          recipe.id === recipeId ? { ...recipe, likes: data.count } : recipe
+          recipe.id === recipeId ? { ...recipe, likes: data.count, userHasLiked: data.liked } : recipe
         );
       });
     },